@@ -0,0 +1,72 @@
+"""Throughput benchmark for text extraction.
+
+Compares extract_text_from_html with the extraction pipelines in
+extractors.EXTRACTORS on synthetic pages that carry typical navigation,
+sidebar, cookie-banner and footer boilerplate. Pages are parsed once up
+front, so only extraction is timed.
+
+Usage:
+    python benchmarks/bench_extraction.py --pages 200 --repeat 5
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler import parse_html
+from extractors import EXTRACTORS, get_extractor
+from utils import extract_text_from_html
+
+WORDS = ("crawler content page site link text document library component index search archive "
+         "request response parser sitemap domain output format graph").split()
+
+
+def make_page(rng, paragraphs=20, nav_links=60):
+    """Builds one synthetic page with boilerplate around an article."""
+    def sentence(words):
+        return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+    nav = ''.join(f'<li><a href="/section/{i}">{sentence(2)}</a></li>' for i in range(nav_links))
+    article = ''.join(f'<p>{sentence(rng.randint(20, 60))} {sentence(15)}, {sentence(10)}</p>'
+                      for _ in range(paragraphs))
+    return (f'<html><head><title>{sentence(4)}</title><meta name="description" content="{sentence(12)}">'
+            f'<script>window.analytics = {{}};</script></head><body>'
+            f'<header><nav><ul>{nav}</ul></nav></header>'
+            f'<div class="cookie-consent">{sentence(25)} <button>Accept</button></div>'
+            f'<div class="page"><aside class="sidebar"><ul>{nav[:len(nav) // 3]}</ul></aside>'
+            f'<div class="content"><h1>{sentence(5)}</h1>{article}</div></div>'
+            f'<footer>{sentence(30)}<a href="/privacy">Privacy</a></footer></body></html>')
+
+
+def bench(name, extract, soups, repeat):
+    """Times extract over every parsed page and prints throughput and output size."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        texts = [extract(soup) for soup in soups]
+        best = min(best, time.perf_counter() - start)
+    chars = sum(len(text) for text in texts) / len(texts)
+    print(f"{name:<24} {len(soups) / best:>10.1f} pages/s   {chars:>9.0f} chars/page")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark text extraction throughput.')
+    parser.add_argument('--pages', type=int, default=200,
+                      help='Number of synthetic pages (default: 200)')
+    parser.add_argument('--repeat', type=int, default=5,
+                      help='Timed runs per extractor; the fastest is reported (default: 5)')
+    parser.add_argument('--seed', type=int, default=0,
+                      help='Random seed for page generation (default: 0)')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    soups = [parse_html(make_page(rng)) for _ in range(args.pages)]
+
+    bench('extract_text_from_html', extract_text_from_html, soups, args.repeat)
+    for name in sorted(EXTRACTORS):
+        pipeline = get_extractor(name)
+        bench(f"pipeline '{name}'", lambda soup: pipeline.extract(soup)['text'], soups, args.repeat)
@@ -0,0 +1,72 @@
+"""Throughput benchmark for report.py.
+
+Writes synthetic text output for several sites into a temporary folder,
+then times build_report() over it with one process and with a worker per
+CPU. Every tenth page repeats an earlier page's text, so the duplicate
+clustering is exercised too.
+
+Usage:
+    python benchmarks/bench_report.py --sites 8 --mb-per-site 64
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler import format_txt_entry
+from report import build_report
+
+WORDS = ("crawler content page site link text document library component index search archive "
+         "request response parser sitemap domain output format graph").split()
+
+
+def write_site(folder, site, size, rng):
+    """Writes about size bytes of START/END entries for one site."""
+    os.makedirs(os.path.join(folder, site))
+    texts = []
+    written = 0
+    with open(os.path.join(folder, site, f"{site}-content_2025-01-01.txt"), 'w') as txt_file:
+        page = 0
+        while written < size:
+            if texts and page % 10 == 9:
+                text = rng.choice(texts)
+            else:
+                text = ' '.join(rng.choices(WORDS, k=rng.randint(50, 3000)))
+                texts.append(text)
+                texts = texts[-100:]
+            written += txt_file.write(format_txt_entry(f"https://{site}/page/{page}", text))
+            page += 1
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark report indexing throughput.')
+    parser.add_argument('--sites', type=int, default=8,
+                      help='Number of site folders (default: 8)')
+    parser.add_argument('--mb-per-site', type=float, default=16,
+                      help='Size of each site\'s content file in MB (default: 16)')
+    parser.add_argument('--seed', type=int, default=0,
+                      help='Random seed for page generation (default: 0)')
+    args = parser.parse_args()
+
+    folder = tempfile.mkdtemp()
+    try:
+        rng = random.Random(args.seed)
+        for index in range(args.sites):
+            write_site(folder, f"site{index}.test", int(args.mb_per_site * 1024 * 1024), rng)
+        total_mb = args.sites * args.mb_per_site
+        for processes in (1, None):
+            start = time.perf_counter()
+            report = build_report([folder], processes)
+            elapsed = time.perf_counter() - start
+            pages = sum(summary['pages'] for summary in report.values())
+            label = f'processes={processes or os.cpu_count()}'
+            print(f"{label:<16} {pages:>9} pages  {total_mb:>8.0f} MB  {elapsed:>7.2f} s  "
+                  f"{total_mb / elapsed:>8.1f} MB/s")
+    finally:
+        shutil.rmtree(folder)
@@ -0,0 +1,87 @@
+"""Startup time benchmark for the crawler command line.
+
+Runs ``python -X importtime -c "import crawler"`` in fresh interpreters and
+reports the cumulative import time of the crawler module and the modules
+that dominate it, then times ``crawler.py --help`` end to end. Optional
+feature modules should not show up in the import list unless their feature
+is selected.
+
+Usage:
+    python benchmarks/bench_startup.py --repeat 10 --top 10
+    python benchmarks/bench_startup.py --budget-ms 60   # exit 1 if over budget
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times(module):
+    """Imports a module in a fresh interpreter and parses the -X importtime report.
+
+    Returns:
+        dict: Cumulative import time in microseconds of the module itself and
+        of every top-level package first imported while importing it.
+        Interpreter startup imports such as site are excluded.
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    subtree = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Entries are printed after their dependencies; top-level imports are indented once
+        top_level = not name.startswith('  ')
+        name = name.strip()
+        if top_level and name == module:
+            subtree[module] = int(cumulative)
+            return subtree
+        if top_level:
+            subtree = {}
+        else:
+            package = name.split('.')[0]
+            subtree[package] = max(subtree.get(package, 0), int(cumulative))
+    raise RuntimeError(f"{module} not found in the import time report")
+
+
+def time_help(repeat):
+    """Returns wall-clock seconds of each ``crawler.py --help`` run."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, 'crawler.py', '--help'], cwd=ROOT, stdout=subprocess.DEVNULL, check=True)
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark crawler startup and import time.')
+    parser.add_argument('--repeat', type=int, default=10,
+                      help='Fresh interpreters started per measurement (default: 10)')
+    parser.add_argument('--top', type=int, default=10,
+                      help='Number of slowest imported packages to list (default: 10)')
+    parser.add_argument('--budget-ms', type=float, default=None,
+                      help='Exit with status 1 if the median crawler import time exceeds this')
+    args = parser.parse_args()
+
+    runs = [import_times('crawler') for _ in range(args.repeat)]
+    crawler_ms = statistics.median(run['crawler'] for run in runs) / 1000
+    print(f"{'import crawler (median)':<32} {crawler_ms:>8.1f} ms")
+    packages = {name for run in runs for name in run} - {'crawler'}
+    medians = {name: statistics.median(run.get(name, 0) for run in runs) / 1000 for name in packages}
+    for name in sorted(medians, key=medians.get, reverse=True)[:args.top]:
+        print(f"  {name:<30} {medians[name]:>8.1f} ms")
+
+    durations = time_help(args.repeat)
+    print(f"{'crawler.py --help (median)':<32} {statistics.median(durations) * 1000:>8.1f} ms")
+    print(f"{'crawler.py --help (min)':<32} {min(durations) * 1000:>8.1f} ms")
+
+    if args.budget_ms is not None and crawler_ms > args.budget_ms:
+        print(f"Import time {crawler_ms:.1f} ms exceeds the {args.budget_ms:.1f} ms budget")
+        sys.exit(1)
@@ -1,9 +1,24 @@
 """Configuration constants for web crawler behavior."""
 
+# Maximum time in seconds to wait for a connection to be established
+# Unreachable hosts fail fast instead of holding a fetch for the full timeout
+CONNECT_TIMEOUT = 5
+
 # Maximum time in seconds to wait for a page response
 # A lower value may miss slow pages but prevents crawler from hanging
-TIMEOUT = 10
+READ_TIMEOUT = 10
+
+# Timeout used where connect and read phases are not limited separately
+TIMEOUT = READ_TIMEOUT
 
 # Number of times to retry failed requests before giving up
 # Helps handle temporary network issues or server errors
 RETRIES = 3
+
+# Names of the predefined extraction pipelines in extractors.EXTRACTORS
+# Kept here so the command line can list them without importing bs4
+EXTRACTOR_NAMES = ('body', 'main')
+
+# Resource types the headless browser does not load while rendering
+# Pages render faster without them and their text is unaffected
+DEFAULT_BLOCKED_RESOURCES = ('image', 'font', 'media')
@@ -5,20 +5,25 @@ generate sitemaps, and save the results in various formats. It handles
 both internal and external links while respecting domain boundaries.
 """
 
-import requests
-from bs4 import BeautifulSoup
 import logging
 import time
 import signal
 import sys
-from utils import extract_text_from_html, classify_link, queue_internal_links, normalize_url, RobotsParser
+import threading
+from utils import extract_text_from_html, classify_link, queue_internal_links, normalize_url
+from utils import get_robots_directives, get_canonical_url
 import argparse
+import functools
+import itertools
+import json
 from urllib.parse import urljoin, urlparse
-from utils import extract_text_from_html, classify_link, queue_internal_links, normalize_url
+from collections import namedtuple
 import os
-from config import TIMEOUT, RETRIES
+from config import CONNECT_TIMEOUT, READ_TIMEOUT, RETRIES, EXTRACTOR_NAMES, DEFAULT_BLOCKED_RESOURCES
+from transport import FetchedPage
 from sitemap import SitemapManager
-import xlsxwriter
+from writer import BackgroundWriter
+import graph
 from datetime import datetime
 
 def get_site_name(url):
@@ -35,6 +40,7 @@ def create_output_file_name(url, output_format):
 
 def write_to_xlsx(output_file_path, page_contents):
     """Write the crawled content to an XLSX file."""
+    import xlsxwriter
     workbook = xlsxwriter.Workbook(output_file_path)
     worksheet = workbook.add_worksheet()
     
@@ -49,14 +55,32 @@ def write_to_xlsx(output_file_path, page_contents):
     
     workbook.close()
 
+def format_txt_entry(url, text):
+    """Format a page as a START/END delimited entry for text output."""
+    return f"\n####### START {url.upper()} #######\n\n{text}\n\n####### END {url.upper()} #######\n\n"
+
 def write_to_txt(output_file_path, url, text):
     """Write content to a text file."""
     with open(output_file_path, 'a') as output_file:
-        output_file.write(f"\n####### START {url.upper()} #######\n\n")
-        output_file.write(text)
-        output_file.write(f"\n\n####### END {url.upper()} #######\n\n")
+        output_file.write(format_txt_entry(url, text))
+
+def format_jsonl_entry(page):
+    """Format a page's extracted fields as one line of JSON."""
+    return json.dumps(page, ensure_ascii=False) + "\n"
 
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s', stream=sys.stdout)
+def write_to_jsonl(output_file_path, page):
+    """Append a page's extracted fields to a JSON Lines file."""
+    with open(output_file_path, 'a', encoding='utf-8') as output_file:
+        output_file.write(format_jsonl_entry(page))
+
+def export_page_store(store, output_file_path, output_format):
+    """Export every page in a PageStore to a txt or xlsx file."""
+    if output_format == 'xlsx':
+        write_to_xlsx(output_file_path, dict(store.items()))
+    else:
+        with open(output_file_path, 'w') as output_file:
+            for url, text in store.items():
+                output_file.write(format_txt_entry(url, text))
 
 # Spinner animation frames
 spinner_frames = ['|', '/', '-', '\\']
@@ -69,49 +93,783 @@ def animate_spinner(frame_index):
     sys.stdout.flush()
 
 
-def fetch_page(url):
+_default_backend = None
+_default_backend_users = 0  # Crawlers relying on the shared backend; it is closed when the last one closes
+_default_backend_lock = threading.Lock()
+
+
+def _acquire_default_backend():
+    global _default_backend_users
+    with _default_backend_lock:
+        _default_backend_users += 1
+
+
+def _release_default_backend():
+    global _default_backend, _default_backend_users
+    with _default_backend_lock:
+        _default_backend_users -= 1
+        if _default_backend_users or _default_backend is None:
+            return
+        backend, _default_backend = _default_backend, None
+    backend.close()
+
+
+def fetch_page(url, timeout=None, backend=None, budget=None):
     """Fetches an HTML page and handles potential errors.
     
     Args:
         url (str): The URL to fetch
+        timeout (float or tuple, optional): Timeout in seconds, or a (connect, read)
+            pair. Defaults to CONNECT_TIMEOUT and READ_TIMEOUT from config.py.
+        backend (RequestsBackend or HttpxBackend, optional): HTTP backend from
+            transport.py. Defaults to a shared RequestsBackend.
+        budget (CrawlBudget, optional): Charged with the bytes downloaded for
+            the response, even if it is an HTTP error
         
     Returns:
-        str: The HTML content of the page, or None if the fetch failed
+        FetchedPage: The HTML content of the page, or None if the fetch failed
         
     Note:
-        Uses global TIMEOUT and RETRIES settings from config.py
+        Uses global CONNECT_TIMEOUT, READ_TIMEOUT and RETRIES settings from config.py
     """
-    try:
-        response = requests.get(url, timeout=TIMEOUT)
-        response.raise_for_status()
-        return response.text
-    except requests.exceptions.RequestException as e:
+    global _default_backend
+    if backend is None:
+        with _default_backend_lock:
+            if _default_backend is None:
+                from transport import RequestsBackend
+                _default_backend = RequestsBackend()
+            backend = _default_backend
+    return backend.fetch(url, timeout, budget)
+
+
+def render_page(renderer, url):
+    """Renders a page in a headless browser.
+    
+    Args:
+        renderer (RenderPool): Pool of browser sessions
+        url (str): The URL to render
+        
+    Returns:
+        FetchedPage: The rendered DOM as HTML, or None if rendering failed or
+        the page returned an HTTP error status
+    """
+    result = renderer.render(url)
+    if result is None or result.status_code >= 400:
         return None
+    # The DOM is re-serialized as UTF-8 whatever the original encoding was
+    headers = {name: value for name, value in result.headers.items() if name.lower() != 'content-type'}
+    headers['Content-Type'] = 'text/html; charset=utf-8'
+    return FetchedPage(result.url, result.status_code, '', headers, result.html.encode('utf-8'), 'utf-8')
 
 
 def parse_html(html):
     """Parses HTML content using BeautifulSoup.
     
     Args:
-        html (str): Raw HTML content to parse
+        html (str or FetchedPage): Raw HTML content to parse. The body of a
+            FetchedPage is decoded by the parser, detecting the charset from
+            the document when the response did not declare one.
         
     Returns:
         BeautifulSoup: Parsed HTML document object
     """
+    from bs4 import BeautifulSoup
+    if isinstance(html, FetchedPage):
+        return BeautifulSoup(html.content, 'html.parser', from_encoding=html.encoding)
     return BeautifulSoup(html, 'html.parser')
 
 
-def crawl(url, sitemap, base_url, robots_parser=None, depth=None, current_depth=0, max_pages=10, output_format='txt'):
-    """Recursively crawls a website starting from the given URL.
+def extract_anchors(soup):
+    """Returns the href of every anchor in a parsed page and whether it may be followed.
+    
+    Returns:
+        tuple: (links, follow) where follow[i] is False if the anchor links[i]
+        is marked rel="nofollow"
+    """
+    links = []
+    follow = []
+    for link in soup.find_all('a'):
+        links.append(link.get('href'))
+        follow.append('nofollow' not in [rel.lower() for rel in link.get('rel') or ()])
+    return links, follow
+
+
+def add_page_links(sitemap, url, links, dns_cache=None, follow=None):
+    """Records the links found on a page as internal URLs or external edges.
+    
+    Args:
+        sitemap (SitemapManager): Manager for tracking crawl state
+        url (str): The page the links were found on
+        links (list): Raw href values, possibly relative or empty
+        dns_cache (DNSCache, optional): Cache that starts resolving, in the
+            background, the hostnames linked from the page that are not the
+            page's own host and are not cached yet
+        follow (list, optional): Whether each link may be queued for crawling.
+            Links that may not are still recorded as edges. Every link is
+            followed if omitted.
+    """
+    hosts = set()
+    for link, followed in zip(links, follow if follow is not None else itertools.repeat(True)):
+        if link:
+            normalized_link = normalize_url(urljoin(url, link))
+            if dns_cache is not None:
+                hosts.add(urlparse(normalized_link).hostname)
+            if sitemap.is_external(url, normalized_link):
+                sitemap.add_external_edge(url, normalized_link)
+            else:
+                sitemap.add_internal_edge(url, normalized_link)
+                if followed:
+                    sitemap.add_url(url, normalized_link)
+    if hosts:
+        # The page's own host was resolved to fetch it
+        hosts.discard(urlparse(url).hostname)
+        for host in hosts:
+            dns_cache.prefetch(host)  # returns at once for cached hosts
+
+
+class TxtSink:
+    """Appends pages to a text file as START/END delimited entries.
+    
+    Args:
+        path (str): File to append to
+        writer (BackgroundWriter, optional): Writer to hand the entries to.
+            Entries are written on the calling thread if omitted.
+    """
+    def __init__(self, path, writer=None):
+        self.path = path
+        self.writer = writer
+
+    def write(self, page):
+        if self.writer is not None:
+            self.writer.append(self.path, format_txt_entry(page.url, page.text))
+        else:
+            write_to_txt(self.path, page.url, page.text)
+
+    def close(self):
+        pass
+
+
+class JsonlSink(TxtSink):
+    """Appends each page's extracted fields to a JSON Lines file."""
+
+    def write(self, page):
+        if self.writer is not None:
+            self.writer.append(self.path, format_jsonl_entry(page.fields))
+        else:
+            write_to_jsonl(self.path, page.fields)
+
+
+class XlsxSink:
+    """Collects pages and writes them to an Excel spreadsheet when closed."""
+
+    def __init__(self, path):
+        self.path = path
+        self.pages = {}
+
+    def write(self, page):
+        self.pages[page.url] = page.text
+
+    def close(self):
+        if self.pages:
+            write_to_xlsx(self.path, self.pages)
+
+
+class StoreSink:
+    """Adds pages to a PageStore.
+    
+    Args:
+        page_store (PageStore): Store to add pages to
+        close_store (bool): Close the store when the sink is closed
+    """
+    def __init__(self, page_store, close_store=False):
+        self.page_store = page_store
+        self.close_store = close_store
+
+    def write(self, page):
+        self.page_store.put(page.url, page.text)
+
+    def close(self):
+        if self.close_store:
+            self.page_store.close()
+
+
+class SearchSink:
+    """Adds pages to a full-text SearchIndex.
+    
+    Args:
+        search_index (SearchIndex): Index to add pages to
+        close_index (bool): Close the index when the sink is closed
+    """
+    def __init__(self, search_index, close_index=False):
+        self.search_index = search_index
+        self.close_index = close_index
+
+    def write(self, page):
+        self.search_index.add(page.url, page.text, page.fields.get('title'))
+
+    def close(self):
+        if self.close_index:
+            self.search_index.close()
+        else:
+            self.search_index.flush()
+
+
+def create_sink(output_format, output_file_path, writer=None):
+    """Creates the sink that saves pages in one of the crawler's output formats.
+    
+    Args:
+        output_format (str): 'txt', 'jsonl', 'xlsx' or 'store'
+        output_file_path (str): File (or page store folder) to write to
+        writer (BackgroundWriter, optional): Writer used for txt and jsonl output
+    """
+    if output_format == 'store':
+        from pagestore import PageStore
+        return StoreSink(PageStore(output_file_path), close_store=True)
+    if output_format == 'xlsx':
+        return XlsxSink(output_file_path)
+    if output_format == 'jsonl':
+        return JsonlSink(output_file_path, writer)
+    return TxtSink(output_file_path, writer)
+
+
+def content_key(text):
+    """Returns a 16-byte digest of page text, used to detect duplicate pages.
+    
+    Keeping digests rather than the text itself keeps duplicate detection
+    small however many pages are crawled.
+    """
+    import hashlib
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+
+class CrawledPage(namedtuple('CrawledPage', ['url', 'status', 'text', 'links'])):
+    """A crawled page: its URL, HTTP status, extracted text and raw links.
+    
+    The full dict of fields produced by the extractor (title, headings and
+    so on) is available as the fields attribute.
+    """
+    def __new__(cls, url, status, text, links, fields=None):
+        page = super().__new__(cls, url, status, text, links)
+        page.fields = fields if fields is not None else {'url': url, 'text': text}
+        return page
+
+
+class FetchError(Exception):
+    """Raised for pages that could not be fetched or rendered."""
+
+    def __init__(self, url):
+        super().__init__(f"Failed to fetch: {url}")
+        self.url = url
+
+
+class Crawler:
+    """Crawls a website, producing pages one at a time as they complete.
+    
+    Pages are visited depth-first from the start URL, staying within
+    base_url. Every page whose content is kept is written to each sink,
+    passed to on_page and yielded by iter_pages(), so callers can consume
+    pages in-process as the crawl runs.
+    
+    With fetch_workers above 1, up to that many pages are fetched at once
+    while parsing stays on the calling thread, and a HostLimiter adapts how
+    many of those requests may go to the same host. Pages are then yielded
+    in completion order.
+    
+    Args:
+        base_url (str): The root URL to stay within while crawling
+        sitemap (SitemapManager, optional): Manager for tracking crawl state.
+            Defaults to one that neither writes sitemap files nor creates
+            an output folder.
+        robots_parser (RobotsParser, optional): Rules to obey. Looked up in
+            robots_cache by each URL's origin if omitted.
+        depth (int, optional): Maximum link depth from the start URL. None or
+            a negative value for unlimited
+        max_pages (int): Maximum number of pages to visit. -1 for unlimited
+        extractor (ExtractionPipeline, optional): Pipeline producing the page text
+            and structured fields. Defaults to the whole body text.
+        sinks (list): Objects with write(page) and close() methods that receive
+            every kept page, such as TxtSink or StoreSink
+        on_page (callable, optional): Called with each kept CrawledPage
+        on_error (callable, optional): Called with (url, exception) for pages
+            that fail to fetch or process. Processing errors are raised if omitted.
+        archive (WarcWriter, optional): Writer that receives every fetched response
+            so the crawl can be reprocessed offline with reprocess.py
+        dns_cache (DNSCache, optional): Cache used to prefetch hostnames of
+            discovered links
+        respect_robots_meta (bool): Honor <link rel="canonical">, meta robots and
+            X-Robots-Tag: pages whose canonical URL was already fetched are skipped,
+            noindex pages are not kept and nofollow links are not queued
+        renderer (RenderPool, optional): Browser pool that renders pages selected by
+            its policy, either instead of fetching them or when their text is too short
+        delay (float): Seconds to pause after each page when fetching sequentially
+        verbose (bool): Print progress to stdout
+        budget (CrawlBudget, optional): Time and byte limits. The crawl stops
+            queuing fetches once either is used up.
+        timeout (float or tuple, optional): Fetch timeout in seconds, or a
+            (connect, read) pair. Defaults to CONNECT_TIMEOUT and READ_TIMEOUT.
+        fetch_workers (int): Maximum pages fetched at once
+        backend (RequestsBackend or HttpxBackend, optional): HTTP backend from
+            transport.py used to fetch pages. Defaults to a RequestsBackend shared
+            by Crawlers, closed once every Crawler using it is closed.
+        host_limiter (HostLimiter, optional): Adaptive per-host request limits used
+            when fetch_workers is above 1. Defaults to a HostLimiter allowing
+            up to fetch_workers requests per host.
+        robots_cache (RobotsCache, optional): Shared robots.txt cache used when
+            robots_parser is omitted. Defaults to an in-memory cache, so robots.txt
+            is fetched when the first URL is checked.
+        memory_limit (MemoryLimit, optional): Memory cap checked before each
+            fetch. Crawl state is spilled to disk above its threshold and the
+            crawl stops above its limit.
+    """
+    def __init__(self, base_url, sitemap=None, robots_parser=None, depth=None, max_pages=-1, extractor=None,
+                 sinks=(), on_page=None, on_error=None, archive=None, dns_cache=None, respect_robots_meta=True,
+                 renderer=None, delay=0.2, verbose=False, budget=None, timeout=None, fetch_workers=1,
+                 host_limiter=None, backend=None, robots_cache=None, memory_limit=None):
+        self.base_url = base_url
+        self.sitemap = sitemap if sitemap is not None else SitemapManager(base_url, autosave=False)
+        self.robots_parser = robots_parser
+        self._owned = []  # resources created here rather than passed in, released by close()
+        if robots_parser is None and robots_cache is None:
+            from robots_cache import RobotsCache
+            robots_cache = RobotsCache()
+            self._owned.append(robots_cache.close)
+        self.robots_cache = robots_cache
+        self._robots_origins = set()  # origins whose robots.txt was already requested
+        self.depth = depth if depth is not None and depth >= 0 else None
+        self.max_pages = max_pages
+        self.extractor = extractor
+        self.sinks = list(sinks)
+        self.on_page = on_page
+        self.on_error = on_error
+        self.archive = archive
+        self.dns_cache = dns_cache
+        self.respect_robots_meta = respect_robots_meta
+        self.renderer = renderer
+        self.delay = delay
+        self.verbose = verbose
+        self.budget = budget
+        self.timeout = timeout
+        self.backend = backend
+        if backend is None:
+            _acquire_default_backend()
+            self._owned.append(_release_default_backend)
+        self.fetch_workers = max(1, fetch_workers)
+        if host_limiter is None and self.fetch_workers > 1:
+            from limits import HostLimiter
+            host_limiter = HostLimiter(initial=min(2, self.fetch_workers), maximum=self.fetch_workers)
+        self.host_limiter = host_limiter
+        self.depths = {}
+        self.memory_limit = memory_limit
+        self.stop_reason = None
+        self._seen_texts = set(map(content_key, self.sitemap.page_contents.values()))
+
+    def _log(self, message):
+        if self.verbose:
+            print(f"\r{message}")
+
+    def _limit_reached(self):
+        return self.max_pages != -1 and len(self.sitemap.visited_urls) >= self.max_pages
+
+    def _budget_exhausted(self):
+        if self.stop_reason is None:
+            if self.budget is not None:
+                self.stop_reason = self.budget.exhausted()
+            if self.stop_reason is None and self.memory_limit is not None:
+                self.stop_reason = self.memory_limit.check(self)
+            if self.stop_reason:
+                self._log(f"Stopping: {self.stop_reason}")
+        return self.stop_reason is not None
+
+    def spill_to_disk(self, folder):
+        """Moves the sitemap's crawl state, click depths and content digests into SQLite files.
+        
+        Used by MemoryLimit.
+        
+        Returns:
+            list: The SQLiteStores created, to be removed when the crawl ends
+        """
+        from memory import DiskDict, DiskSet
+        stores = self.sitemap.spill_to_disk(folder)
+        if isinstance(self.depths, dict):
+            self.depths = DiskDict(os.path.join(folder, 'depths.sqlite'), self.depths.items())
+            stores.append(self.depths)
+        if isinstance(self._seen_texts, set):
+            self._seen_texts = DiskSet(os.path.join(folder, 'seen_texts.sqlite'), self._seen_texts)
+            stores.append(self._seen_texts)
+        return stores
+
+    def memory_structures(self):
+        """Returns the crawl structures that grow with the crawl, by name.
+        
+        Used with memory.memory_report() to see where memory goes.
+        """
+        sitemap = self.sitemap
+        return {'page_contents': sitemap.page_contents, 'parent_urls': sitemap.parent_urls,
+                'visited_urls': sitemap.visited_urls, 'unvisited_urls': sitemap.unvisited_urls,
+                'queued_urls': sitemap.queued_urls,
+                'internal_edges': sitemap.internal_edges, 'external_edges': sitemap.external_edges,
+                'depths': self.depths, 'seen_texts': self._seen_texts}
+
+    def _progress(self, frame_index):
+        if self.sitemap.autosave:
+            self.sitemap.update_sitemap_file()
+        if self.verbose:
+            animate_spinner(frame_index)
+            print_cli_output(self.sitemap)
+
+    def iter_pages(self, start_url=None):
+        """Crawls from a URL, yielding each kept page as soon as it is processed.
+        
+        The start URL is always visited; further pages are taken from the
+        sitemap queue until it is empty, max_pages have been visited or the
+        budget is used up.
+        
+        Args:
+            start_url (str, optional): URL to start from. Defaults to base_url.
+            
+        Yields:
+            CrawledPage: Pages in the order they were crawled
+        """
+        start_url = start_url or self.base_url
+        self.depths.setdefault(start_url, 0)
+        if self.fetch_workers > 1:
+            yield from self._iter_concurrent(start_url)
+            return
+
+        yield from self._visit(start_url)
+        frame_index = 0
+        while self.sitemap.has_unvisited_urls() and not self._limit_reached() and not self._budget_exhausted():
+            next_url = self.sitemap.get_next_url()
+            if next_url:
+                yield from self._visit(next_url)
+            self._progress(frame_index)
+            frame_index += 1
+            if self.delay:
+                time.sleep(self.delay)
+
+    def _iter_concurrent(self, start_url):
+        """Fetches up to fetch_workers pages at once and processes them as they arrive."""
+        from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+        in_flight = {}
+        deferred = []  # prepared URLs whose host was at its limit
+
+        def submit(url):
+            token = self.host_limiter.try_acquire(url)
+            if token is None:
+                deferred.append(url)
+                return
+            in_flight[executor.submit(self._timed_fetch, url)] = (url, token)
+
+        with ThreadPoolExecutor(self.fetch_workers, thread_name_prefix='fetch') as executor:
+            if self._prepare(start_url):
+                submit(start_url)
+            frame_index = 0
+            while True:
+                # Retry URLs held back by their host's limit, then take new ones from the queue
+                for url in deferred[:]:
+                    if len(in_flight) >= self.fetch_workers:
+                        break
+                    deferred.remove(url)
+                    submit(url)
+                while len(in_flight) < self.fetch_workers and len(deferred) < self.fetch_workers and \
+                        self.sitemap.has_unvisited_urls() and not self._limit_reached() and \
+                        not self._budget_exhausted():
+                    next_url = self.sitemap.get_next_url()
+                    if next_url and self._prepare(next_url):
+                        submit(next_url)
+                if not in_flight:
+                    if deferred:
+                        continue  # nothing in flight, so every deferred host has a free slot now
+                    break
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url, token = in_flight.pop(future)
+                    try:
+                        html_content, soup, latency = future.result()
+                    except Exception as e:
+                        self.host_limiter.release(token, 0.0, False)
+                        self._report_error(url, e)
+                        continue
+                    self.host_limiter.release(token, latency, bool(html_content))
+                    try:
+                        page = self._process(url, html_content, soup)
+                    except Exception as e:
+                        self._report_error(url, e)
+                        continue
+                    yield from self._emit(page)
+                    self._progress(frame_index)
+                    frame_index += 1
+
+    def run(self, start_url=None):
+        """Crawls to completion, then closes the sinks.
+        
+        Returns:
+            SitemapManager: Updated sitemap with crawl results
+        """
+        try:
+            for _ in self.iter_pages(start_url):
+                pass
+        finally:
+            self.close()
+        return self.sitemap
+
+    def close(self):
+        """Closes every sink and releases the robots cache and backend the Crawler created itself."""
+        for sink in self.sinks:
+            sink.close()
+        owned, self._owned = self._owned, []
+        for release in owned:
+            release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _visit(self, url):
+        """Crawls one page, yielding it if it was kept."""
+        try:
+            if not self._prepare(url):
+                return
+            html_content, soup = self._fetch(url)
+            page = self._process(url, html_content, soup)
+        except Exception as e:
+            self._report_error(url, e)
+            return
+        yield from self._emit(page)
+
+    def _report_error(self, url, error):
+        """Passes an error to on_error, or raises it if there is no handler."""
+        if self.on_error is None:
+            raise error
+        self.on_error(url, error)
+
+    def _emit(self, page):
+        """Hands a kept page to the sinks and on_page, then yields it."""
+        if page is None:
+            return
+        for sink in self.sinks:
+            sink.write(page)
+        if self.on_page is not None:
+            self.on_page(page)
+        yield page
+
+    def _prepare(self, url):
+        """Checks whether a URL should be fetched and marks it visited.
+        
+        Returns:
+            bool: True if the URL should be fetched
+        """
+        if not url.startswith(self.base_url):
+            self._log(f"Skipping {url} - outside base URL {self.base_url}")
+            return False
+
+        robots_parser = self.robots_parser if self.robots_parser is not None else self.robots_cache.get(url)
+        if not robots_parser.is_allowed(url):
+            self._log(f"Skipping {url} - disallowed by robots.txt")
+            return False
+
+        if self.depth is not None and self.depths.get(url, 0) > self.depth:
+            return False
+
+        if self.sitemap.is_known(url):
+            return False
+
+        self.sitemap.mark_visited(url)
+        self._log(f"Crawling: {url}")
+        robots_parser.respect_crawl_delay()
+        return True
+
+    def _fetch(self, url):
+        """Fetches a page, or renders it if the render policy selects its URL.
+        
+        Fetched pages whose text is too thin for the render policy are
+        rendered too. This runs on the fetch workers, so with fetch_workers
+        above 1 pages render concurrently, up to the render pool's workers.
+        
+        Returns:
+            tuple: (html_content, soup) where html_content is None on failure
+            and soup is the parsed page, or None if it was not parsed yet
+        """
+        renderer = self.renderer
+        rendered = renderer is not None and renderer.policy.matches(url)
+        if rendered:
+            html_content = self._render(url)
+        else:
+            options = {}
+            if self.timeout is not None:
+                options['timeout'] = self.timeout
+            if self.backend is not None:
+                options['backend'] = self.backend
+            if self.budget is not None:
+                # The backend charges the bytes on the wire, for error responses too
+                options['budget'] = self.budget
+            html_content = fetch_page(url, **options)
+        if rendered and html_content and self.budget is not None:
+            self._charge_rendered(html_content)
+
+        soup = None
+        if html_content and not rendered and renderer is not None and renderer.policy.min_text_length > 0:
+            soup = parse_html(html_content)
+            if renderer.policy.is_thin(extract_text_from_html(soup)):
+                rendered_content = self._render(url)
+                if rendered_content:
+                    if self.budget is not None:
+                        self._charge_rendered(rendered_content)
+                    soup.decompose()
+                    html_content, soup = rendered_content, None
+        return html_content, soup
+
+    def _charge_rendered(self, html_content):
+        # The browser's own traffic is not visible, so a render is charged by its page size
+        self.budget.charge(len(html_content.content) if isinstance(html_content, FetchedPage)
+                           else len(html_content.encode('utf-8')))
+
+    def _render(self, url):
+        html_content = render_page(self.renderer, url)
+        if html_content:
+            self._log(f"Rendered: {url}")
+        return html_content
+
+    def _timed_fetch(self, url):
+        start = time.monotonic()
+        html_content, soup = self._fetch(url)
+        return html_content, soup, time.monotonic() - start
+
+    def _process(self, url, html_content, soup=None):
+        """Parses a fetched page and records it and its links.
+        
+        Args:
+            url (str): URL of the page
+            html_content (str or FetchedPage): The page, or None if fetching failed
+            soup (BeautifulSoup, optional): The page already parsed by _fetch
+        
+        Returns:
+            CrawledPage: The page, or None if it failed or was not kept
+        """
+        if not html_content:
+            self._log(f"Failed to fetch: {url}")
+            if self.on_error is not None:
+                self.on_error(url, FetchError(url))
+            return None
+
+        if soup is None:
+            soup = parse_html(html_content)
+        try:
+            return self._record(url, html_content, soup)
+        finally:
+            # Parsed trees are reference cycles that otherwise wait for the garbage
+            # collector; decomposing frees them before the next page is fetched
+            soup.decompose()
+
+    def _record(self, url, html_content, soup):
+        """Archives a parsed page, applies robots directives and records its text and links.
+        
+        Returns:
+            CrawledPage: The page, or None if it was not kept
+        """
+        sitemap = self.sitemap
+        base_url = self.base_url
+
+        if self.archive is not None and isinstance(html_content, FetchedPage):
+            self.archive.write_response(url, html_content.status_code, html_content.reason,
+                                        html_content.headers, html_content.content)
+
+        directives = set()
+        if self.respect_robots_meta:
+            directives = get_robots_directives(soup, getattr(html_content, 'headers', None))
+            canonical_url = get_canonical_url(soup, url)
+            if canonical_url and canonical_url != url and canonical_url.startswith(base_url):
+                if sitemap.is_known(canonical_url):
+                    self._log(f"Skipping {url} - canonical {canonical_url} already crawled")
+                    return None
+                sitemap.add_canonical_url(canonical_url)
+
+        links, follow = extract_anchors(soup)
+        if not self.respect_robots_meta:
+            follow = None
+        elif 'nofollow' in directives:
+            follow = [False] * len(links)
+
+        page = None
+        if 'noindex' in directives:
+            self._log(f"Not storing {url} - noindex")
+        else:
+            if self.extractor is not None:
+                fields = self.extractor.extract(soup, url)
+                text = fields['text']
+            else:
+                text = extract_text_from_html(soup)
+                fields = {'url': url, 'text': text}
+
+            text_key = content_key(text)
+            if text_key in self._seen_texts:
+                self._log(f"Skipping duplicate content: {url}")
+                return None
+
+            self._seen_texts.add(text_key)
+            sitemap.page_contents[url] = text
+            page = CrawledPage(url, getattr(html_content, 'status_code', 200), text, links, fields)
+
+        self._log(f"Found {len(links)} links on {url}")
+        current_depth = self.depths.get(url, 0)
+        queued = len(sitemap.unvisited_urls)
+        add_page_links(sitemap, url, links, self.dns_cache, follow)
+        new_links = sitemap.unvisited_urls[queued:]
+        for link in new_links:
+            self.depths.setdefault(link, current_depth + 1)
+        if self.robots_parser is None:
+            # Start loading robots.txt of newly seen origins while they wait in the queue
+            for origin in {self.robots_cache.origin(link) for link in new_links} - self._robots_origins:
+                self._robots_origins.add(origin)
+                self.robots_cache.prefetch(origin)
+        return page
+
+
+def crawl(url, sitemap, base_url, robots_parser=None, depth=None, current_depth=0, max_pages=10, output_format='txt',
+          page_store=None, archive=None, dns_cache=None, extractor=None, respect_robots_meta=True, renderer=None,
+          budget=None, timeout=None, fetch_workers=1, backend=None, robots_cache=None, memory_limit=None,
+          report_memory=False, search_index=None):
+    """Crawls a website starting from the given URL, saving pages to the output directory.
+    
+    A wrapper around Crawler that writes pages in the chosen output format
+    and prints progress.
     
     Args:
         url (str): The URL to start crawling from
         sitemap (SitemapManager): Manager for tracking crawl state
         base_url (str): The root URL to stay within while crawling
         depth (int, optional): Maximum depth to crawl. None for unlimited
-        current_depth (int): Current recursion depth. Used internally
+        current_depth (int): Link depth of url from the start of the crawl
         max_pages (int): Maximum number of pages to crawl. -1 for unlimited
-        output_format (str): Format to save content in ('txt' or 'xlsx')
+        output_format (str): Format to save content in ('txt', 'jsonl', 'xlsx' or 'store')
+        page_store (PageStore, optional): Store to write pages to when output_format
+            is 'store'. Opened in the output directory and closed on return if omitted.
+        archive (WarcWriter, optional): Writer that receives every fetched response
+            so the crawl can be reprocessed offline with reprocess.py
+        dns_cache (DNSCache, optional): Cache used to prefetch hostnames of
+            discovered links
+        extractor (ExtractionPipeline, optional): Pipeline producing the page text
+            and structured fields. Defaults to the whole body text.
+        respect_robots_meta (bool): Honor <link rel="canonical">, meta robots and
+            X-Robots-Tag: pages whose canonical URL was already fetched are skipped,
+            noindex pages are not stored and nofollow links are not queued
+        renderer (RenderPool, optional): Browser pool that renders pages selected by
+            its policy, either instead of fetching them or when their text is too short
+        budget (CrawlBudget, optional): Time and byte limits for the crawl
+        timeout (float or tuple, optional): Fetch timeout in seconds, or a (connect, read) pair
+        fetch_workers (int): Maximum pages fetched at once, with adaptive per-host limits
+        backend (RequestsBackend or HttpxBackend, optional): HTTP backend from transport.py
+        robots_cache (RobotsCache, optional): Shared robots.txt cache used when
+            robots_parser is omitted
+        memory_limit (MemoryLimit, optional): Memory cap that spills crawl state
+            to disk and stops the crawl when reached
+        report_memory (bool): Print the memory used by each crawl structure, and
+            by the top allocation sites if tracemalloc is tracing, when done
+        search_index (SearchIndex, optional): Full-text index that every kept
+            page is also added to
     
     Returns:
         SitemapManager: Updated sitemap with crawl results
@@ -123,71 +881,49 @@ def crawl(url, sitemap, base_url, robots_parser=None, depth=None, current_depth=
     # Ensure output directory exists
     os.makedirs(sitemap.output_folder, exist_ok=True)
     output_file_path = os.path.join(sitemap.output_folder, create_output_file_name(base_url, output_format))
-    
-    if robots_parser is None:
-        robots_parser = RobotsParser(base_url)
-
-    if not url.startswith(base_url):
-        print(f"\rSkipping {url} - outside base URL {base_url}")
-        return sitemap
-
-    if not robots_parser.is_allowed(url):
-        print(f"\rSkipping {url} - disallowed by robots.txt")
-        return sitemap
-
-    if depth is not None and depth >= 0 and current_depth > depth:
-        return sitemap
+    if output_format == 'store' and page_store is not None:
+        sink = StoreSink(page_store)
+    else:
+        sink = create_sink(output_format, output_file_path, sitemap.writer)
+    sinks = [sink]
+    if search_index is not None:
+        sinks.append(SearchSink(search_index))
 
-    if url in sitemap.visited_urls:
-        return sitemap
+    crawler = Crawler(base_url, sitemap, robots_parser, depth, max_pages, extractor, sinks, archive=archive,
+                      dns_cache=dns_cache, respect_robots_meta=respect_robots_meta, renderer=renderer, verbose=True,
+                      budget=budget, timeout=timeout, fetch_workers=fetch_workers, backend=backend,
+                      robots_cache=robots_cache, memory_limit=memory_limit)
+    crawler.depths[url] = current_depth
+    sitemap = crawler.run(url)
+    if report_memory:
+        from memory import memory_report
+        print_memory_report(memory_report(crawler.memory_structures()), memory_limit)
+    return sitemap
 
-    sitemap.mark_visited(url)
-    print(f"\rCrawling: {url}")
+def export_graph(sitemap, base_url, export_formats, analyze=False):
+    """Exports the link graph and optionally writes link analysis results.
     
-    robots_parser.respect_crawl_delay()
-    html_content = fetch_page(url)
-    if not html_content:
-        print(f"\rFailed to fetch: {url}")
-        return sitemap
-
-    soup = parse_html(html_content)
-    text = extract_text_from_html(soup)
-
-    if text in sitemap.page_contents.values():
-        print(f"\rSkipping duplicate content: {url}")
-        return sitemap
-
-    sitemap.page_contents[url] = text
-
-    if output_format == 'xlsx':
-        # For xlsx, we'll write everything at once at the end
-        if len(sitemap.visited_urls) >= max_pages and max_pages != -1:
-            write_to_xlsx(output_file_path, sitemap.page_contents)
-    else:
-        write_to_txt(output_file_path, url, text)
-
-    links = [link.get('href') for link in soup.find_all('a')]
-    print(f"\rFound {len(links)} links on {url}")
+    Args:
+        sitemap (SitemapManager): Manager holding the crawl state
+        base_url (str): The root URL of the crawl
+        export_formats (list): Formats from graph.EXPORTERS to export to
+        analyze (bool): Compute link metrics and write them to a CSV file
+    """
+    site_name = urlparse(base_url).netloc.lower()
+    current_date = datetime.now().strftime('%Y-%m-%d')
+    for export_format in export_formats:
+        extension, exporter = graph.EXPORTERS[export_format]
+        path = os.path.join(sitemap.output_folder, f"{site_name}-graph_{current_date}.{extension}")
+        exporter(graph.collect_edges(sitemap), path)
+        print(f"Link graph exported to {path}")
 
-    for link in links:
-        if link:
-            normalized_link = normalize_url(urljoin(url, link))
-            if sitemap.is_external(url, normalized_link):
-                sitemap.add_external_edge(url, normalized_link)
-            else:
-                sitemap.add_url(url, normalized_link)
+    if analyze:
+        analysis = graph.analyze_graph(sitemap.internal_edges, base_url, sitemap.visited_urls)
+        path = os.path.join(sitemap.output_folder, f"{site_name}-link-analysis_{current_date}.csv")
+        graph.write_analysis_csv(analysis, path)
+        graph.print_analysis_summary(analysis)
+        print(f"Link analysis written to {path}")
 
-    while sitemap.has_unvisited_urls() and (max_pages == -1 or len(sitemap.visited_urls) < max_pages):
-        next_url = sitemap.get_next_url()
-        if next_url:
-            crawl(next_url, sitemap, base_url, robots_parser, depth, current_depth + 1, max_pages)
-        sitemap.update_sitemap_file()
-        frame_index = 0
-        animate_spinner(frame_index)
-        frame_index += 1
-        print_cli_output(sitemap)
-        time.sleep(0.2)
-    return sitemap
 
 def print_cli_output(sitemap):
     """Prints the CLI output with the desired formatting."""
@@ -195,7 +931,35 @@ def print_cli_output(sitemap):
     sys.stdout.flush()
 
 
-if __name__ == '__main__':
+def print_memory_report(report, memory_limit=None):
+    """Prints a report from memory.memory_report()."""
+    megabyte = 1024 * 1024
+    print(f"\nMemory: RSS {report['rss'] / megabyte:.1f} MB", end="")
+    if memory_limit is not None:
+        print(f", peak {memory_limit.peak / megabyte:.1f} MB of {memory_limit.max_bytes / megabyte:g} MB"
+              f"{', state spilled to ' + memory_limit.spill_folder if memory_limit.spilled else ''}", end="")
+    print()
+    for name, size in report['structures'].items():
+        print(f"  {name:<16} {size / megabyte:>8.2f} MB")
+    if 'top_allocations' in report:
+        print(f"Traced: {report['traced_current'] / megabyte:.1f} MB, peak {report['traced_peak'] / megabyte:.1f} MB")
+        for location, size in report['top_allocations']:
+            print(f"  {size / megabyte:>8.2f} MB  {location}")
+        for name, sites in report['structure_allocations'].items():
+            print(f"Allocated for {name}:")
+            for location, size in sites:
+                print(f"  {size / megabyte:>8.2f} MB  {location}")
+
+
+def main(argv=None):
+    """Runs the crawler command line interface.
+    
+    Modules for optional features are only imported once the feature is
+    selected, so ``--help`` and plain crawls start quickly.
+    
+    Args:
+        argv (list, optional): Command line arguments. Defaults to sys.argv[1:].
+    """
     parser = argparse.ArgumentParser(description='Crawl a website and generate a content map.')
     
     # Required arguments
@@ -207,41 +971,235 @@ if __name__ == '__main__':
                       help='Maximum crawl depth. -1 for unlimited (default: -1)')
     parser.add_argument('--max-pages', type=int, default=-1,
                       help='Maximum pages to crawl. -1 for unlimited (default: -1)')
+    parser.add_argument('--verbose', action='store_true',
+                      help='Log debug messages, including every request and skipped link')
+
+    # Fetch budgets and concurrency
+    parser.add_argument('--connect-timeout', type=float, default=CONNECT_TIMEOUT,
+                      help=f'Seconds to wait for a connection (default: {CONNECT_TIMEOUT})')
+    parser.add_argument('--read-timeout', type=float, default=READ_TIMEOUT,
+                      help=f'Seconds to wait for a response (default: {READ_TIMEOUT})')
+    parser.add_argument('--time-budget', type=float, default=None,
+                      help='Stop starting new fetches after this many seconds (default: unlimited)')
+    parser.add_argument('--byte-budget', type=float, default=None,
+                      help='Stop starting new fetches after downloading this many MB (default: unlimited)')
+    parser.add_argument('--fetch-workers', type=int, default=1,
+                      help='Maximum pages fetched at once. Above 1, requests per host adapt to observed '
+                           'latency and errors (default: 1)')
+    parser.add_argument('--http-backend', type=str, choices=['requests', 'http2'], default='requests',
+                      help="'requests' reuses HTTP/1.1 connections; 'http2' negotiates HTTP/2 with httpx and "
+                           "multiplexes concurrent requests to a host over one connection (requires httpx[http2]). "
+                           "Both accept brotli and zstd responses when those packages are installed "
+                           "(default: requests)")
     
+    # Memory caps
+    parser.add_argument('--max-memory', type=float, default=None,
+                      help='Stop starting new fetches when the process uses this many MB. Page text and '
+                           'parent links are moved to SQLite files in <output>/state at 75%% of the limit, '
+                           'and memory per crawl structure is reported at the end (default: unlimited)')
+    parser.add_argument('--trace-memory', action='store_true',
+                      help='Trace allocations with tracemalloc and report the largest allocation sites '
+                           'at the end. Slows the crawl and uses extra memory')
+
     # Output format selection
-    parser.add_argument('--output-format', type=str, choices=['txt', 'xlsx'], default='txt',
-                      help='Save content as text files or Excel spreadsheet (default: txt)')
-    args = parser.parse_args()
+    parser.add_argument('--output-format', type=str, choices=['txt', 'jsonl', 'xlsx', 'store'], default='txt',
+                      help='Save content as text files, JSON Lines with structured fields, Excel spreadsheet '
+                           'or a compressed page store (default: txt)')
+    parser.add_argument('--search-index', action='store_true',
+                      help='Also index page text for full-text search in <output>/search.sqlite, '
+                           'queried with search.py')
+
+    # robots.txt and page-level robots directives
+    parser.add_argument('--robots-cache-ttl', type=float, default=24,
+                      help='Hours for which robots.txt rules fetched by earlier runs are reused, at most 24 '
+                           '(RFC 9309). 0 to fetch robots.txt again and not save it (default: 24)')
+    parser.add_argument('--ignore-robots-meta', action='store_true',
+                      help='Ignore canonical links, meta robots tags and X-Robots-Tag headers')
+
+    # Content extraction
+    parser.add_argument('--extractor', type=str, choices=EXTRACTOR_NAMES, default='body',
+                      help="Text extraction: 'body' keeps all body text, 'main' keeps only the main content "
+                           "without navigation, footers and banners (default: body)")
+
+    # JavaScript rendering
+    parser.add_argument('--render-pattern', type=str, action='append', default=[],
+                      help='Render URLs matching this regular expression in a headless browser instead of '
+                           'fetching them. May be given more than once (requires playwright)')
+    parser.add_argument('--render-min-text', type=int, default=0,
+                      help='Render fetched pages with fewer characters of text than this (default: 0, disabled)')
+    parser.add_argument('--render-workers', type=int, default=2,
+                      help='Maximum pages rendered at once, one browser each. Pages render on the fetch '
+                           'workers, so --fetch-workers is raised to at least this (default: 2)')
+    parser.add_argument('--render-block', type=str, default=','.join(DEFAULT_BLOCKED_RESOURCES),
+                      help='Comma-separated resource types not loaded while rendering (default: %(default)s)')
+
+    # Raw response archiving
+    parser.add_argument('--warc', action='store_true',
+                      help='Archive fetched responses to rotating WARC files in <output>/warc')
+    parser.add_argument('--warc-max-size', type=int, default=1024,
+                      help='Size in MB after which a new WARC file is started (default: 1024)')
+
+    # Output writing
+    parser.add_argument('--sync-writes', action='store_true',
+                      help='Write output files on the crawl thread instead of a background writer')
+    parser.add_argument('--fsync-interval', type=float, default=5.0,
+                      help='Seconds between fsyncs of output files by the background writer (default: 5)')
+
+    # Link graph export and analysis
+    parser.add_argument('--export-graph', type=str, choices=sorted(graph.EXPORTERS), action='append', default=[],
+                      help='Export the full link graph in this format. May be given more than once')
+    parser.add_argument('--analyze-graph', action='store_true',
+                      help='Compute PageRank, degrees, depth and orphan pages (requires numpy and scipy)')
+
+    # DNS resolution
+    parser.add_argument('--dns-cache', action='store_true',
+                      help='Cache DNS resolutions and prefetch hostnames of discovered links. Record TTLs '
+                           'are honored when dnspython is installed')
+
+    # External link checking
+    parser.add_argument('--check-links', action='store_true',
+                      help='Validate external links after crawling and write a broken-links report')
+    parser.add_argument('--link-check-workers', type=int, default=16,
+                      help='Maximum external links checked at once (default: 16)')
+    parser.add_argument('--link-check-per-host', type=int, default=2,
+                      help='Maximum concurrent link checks per host (default: 2)')
+    args = parser.parse_args(argv)
+    from robots_cache import MAX_TTL
+    if args.robots_cache_ttl * 60 * 60 > MAX_TTL:
+        parser.error(f"--robots-cache-ttl cannot exceed {MAX_TTL // 3600} hours, the longest RFC 9309 allows")
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s', stream=sys.stdout)
+
     start_url = args.url
     crawl_depth = args.depth
     max_pages = args.max_pages
     output_format = args.output_format
-    sitemap = SitemapManager(start_url)
-    robots_parser = RobotsParser(start_url)
+    writer = None if args.sync_writes else BackgroundWriter(fsync_interval=args.fsync_interval)
+    sitemap = SitemapManager(start_url, writer=writer)
+    from robots_cache import RobotsCache, DEFAULT_CACHE_FOLDER
+    if args.robots_cache_ttl > 0:
+        robots_cache = RobotsCache(DEFAULT_CACHE_FOLDER, args.robots_cache_ttl * 60 * 60)
+    else:
+        robots_cache = RobotsCache()
+    robots_cache.prefetch(start_url)  # loads while the rest of the crawl is set up
     sitemap.add_url(start_url, start_url)
+    dns_cache = None
+    if args.dns_cache:
+        from dns_cache import DNSCache
+        dns_cache = DNSCache()
+        dns_cache.install()
+    archive = None
+    if args.warc:
+        from warc import WarcWriter
+        archive = WarcWriter(os.path.join(sitemap.output_folder, 'warc'), urlparse(start_url).netloc,
+                             args.warc_max_size * 1024 * 1024)
+
+    budget = None
+    if args.time_budget is not None or args.byte_budget is not None:
+        from limits import CrawlBudget
+        budget = CrawlBudget(args.time_budget,
+                             int(args.byte_budget * 1024 * 1024) if args.byte_budget is not None else None)
 
-    handler = logging.StreamHandler(sys.stdout)
-    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-    handler.setFormatter(formatter)
+    memory_limit = None
+    if args.max_memory is not None:
+        from memory import MemoryLimit
+        memory_limit = MemoryLimit(int(args.max_memory * 1024 * 1024), os.path.join(sitemap.output_folder, 'state'))
+    if args.trace_memory:
+        import tracemalloc
+        tracemalloc.start()
+
+    search_index = None
+    if args.search_index:
+        from search import SearchIndex
+        search_index = SearchIndex(os.path.join(sitemap.output_folder, 'search.sqlite'))
+
+    from transport import get_backend
+    backend = get_backend(args.http_backend, (args.connect_timeout, args.read_timeout))
+
+    renderer = None
+    fetch_workers = args.fetch_workers
+    if args.render_pattern or args.render_min_text > 0:
+        from render import RenderPolicy, RenderPool, RenderCache, PlaywrightSession
+        render_policy = RenderPolicy(args.render_pattern, args.render_min_text)
+        blocked_resources = [resource.strip() for resource in args.render_block.split(',') if resource.strip()]
+        renderer = RenderPool(render_policy, args.render_workers,
+                              RenderCache(os.path.join(sitemap.output_folder, 'render-cache')),
+                              functools.partial(PlaywrightSession, blocked_resources))
+        # Renders run on the fetch workers, so there must be enough of them to keep every browser busy
+        fetch_workers = max(fetch_workers, args.render_workers)
 
     def signal_handler(sig, frame):
         print("\nCrawling interrupted. Saving progress...")
+        if renderer is not None:
+            renderer.close()
+        if archive is not None:
+            archive.close()
+        if writer is not None:
+            writer.close()
         print(f"Mapped pages: {sitemap.mapped_count}")
         print(f"Unmapped pages: {sitemap.unmapped_count}")
         sys.exit(0)
     signal.signal(signal.SIGINT, signal_handler)
 
+    from extractors import get_extractor
     try:
-        sitemap = crawl(start_url, sitemap, start_url, robots_parser, crawl_depth, 0, max_pages, output_format)
-        # Write xlsx file at the end if that's the chosen format
-        if output_format == 'xlsx':
-            output_file_path = os.path.join(sitemap.output_folder, create_output_file_name(start_url, output_format))
-            write_to_xlsx(output_file_path, sitemap.page_contents)
+        sitemap = crawl(start_url, sitemap, start_url, None, crawl_depth, 0, max_pages, output_format,
+                        archive=archive, dns_cache=dns_cache,
+                        # Titles and headings are only kept by JSON Lines output and the search index
+                        extractor=get_extractor(args.extractor, output_format == 'jsonl' or args.search_index),
+                        respect_robots_meta=not args.ignore_robots_meta, renderer=renderer, budget=budget,
+                        timeout=(args.connect_timeout, args.read_timeout), fetch_workers=fetch_workers,
+                        backend=backend, robots_cache=robots_cache, memory_limit=memory_limit,
+                        report_memory=memory_limit is not None or args.trace_memory,
+                        search_index=search_index)
         print("\nCrawling completed.")
         print(f"Mapped pages: {sitemap.mapped_count}")
         print(f"Unmapped pages: {sitemap.unmapped_count}")
+        export_graph(sitemap, start_url, args.export_graph, args.analyze_graph)
+        if args.check_links:
+            from linkcheck import LinkChecker, check_external_links, write_broken_links_report, DEFAULT_CACHE_PATH
+            checker = LinkChecker(args.link_check_workers, args.link_check_per_host, cache_path=DEFAULT_CACHE_PATH)
+            broken = check_external_links(sitemap, checker)
+            report_path = os.path.join(sitemap.output_folder, create_output_file_name(start_url, 'csv')
+                                       .replace('-content_', '-broken-links_'))
+            write_broken_links_report(broken, report_path)
+            print(f"Broken external links: {len(broken)} (report: {report_path})")
+        if dns_cache is not None:
+            stats = dns_cache.stats()
+            print(f"DNS lookups: {stats['lookups']} ({stats['hits']} cached, {stats['prefetches']} prefetched), "
+                  f"resolution time avg {stats['avg_resolve_ms']:.1f} ms, max {stats['max_resolve_ms']:.1f} ms")
+        for http_version, stats in backend.stats.summary().items():
+            print(f"{http_version}: {stats['requests']} requests ({stats['errors']} failed), "
+                  f"{stats['wire_bytes'] / 1024:.0f} KB transferred, {stats['compression_ratio']:.1f}x compression, "
+                  f"latency avg {stats['avg_latency_ms']:.0f} ms, max {stats['max_latency_ms']:.0f} ms, "
+                  f"{stats['bandwidth_kbps']:.0f} KB/s")
+        if search_index is not None:
+            print(f"Search index: {len(search_index)} pages ({search_index.path})")
+        if renderer is not None:
+            stats = renderer.stats()
+            print(f"Rendered pages: {stats['renders']} ({stats['cache_hits']} cached, {stats['failures']} failed), "
+                  f"render time avg {stats['avg_render_ms']:.0f} ms")
     except KeyboardInterrupt:
         print("\nCrawling interrupted. Saving progress...")
         print(f"Mapped pages: {sitemap.mapped_count}")
         print(f"Unmapped pages: {sitemap.unmapped_count}")
         sys.exit(0)
+    finally:
+        backend.close()
+        robots_cache.close()
+        if search_index is not None:
+            search_index.close()
+        if renderer is not None:
+            renderer.close()
+        if archive is not None:
+            archive.close()
+        if writer is not None:
+            writer.close()
+        if memory_limit is not None:
+            memory_limit.close()
+        if dns_cache is not None:
+            dns_cache.uninstall()
+
+
+if __name__ == '__main__':
+    main()
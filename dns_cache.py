@@ -0,0 +1,268 @@
+"""Caching DNS resolver with background prefetching.
+
+Once installed, the cache replaces ``socket.getaddrinfo`` for the process, so
+every connection made through ``requests`` reuses earlier resolutions until
+their TTL expires. Hostnames can be prefetched as soon as links to them are
+discovered, moving resolution latency off the fetch path.
+"""
+
+import importlib.util
+import ipaddress
+import logging
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+_system_getaddrinfo = socket.getaddrinfo
+
+
+def system_resolver(host):
+    """Resolves a hostname with the operating system resolver.
+
+    Args:
+        host (str): Hostname to resolve
+
+    Returns:
+        tuple: (addresses, ttl). The system resolver does not report TTLs, so
+        ttl is None and the cache default applies.
+    """
+    addresses = []
+    for family, _, _, _, sockaddr in _system_getaddrinfo(host, None, 0, socket.SOCK_STREAM):
+        if sockaddr[0] not in addresses:
+            addresses.append(sockaddr[0])
+    return addresses, None
+
+
+def dnspython_resolver(host):
+    """Resolves a hostname with dnspython, returning the record TTL.
+
+    Args:
+        host (str): Hostname to resolve
+
+    Returns:
+        tuple: (addresses, ttl) with the smallest TTL of the A/AAAA answers
+    """
+    try:
+        import dns.resolver
+    except ImportError:
+        raise ImportError("TTL-aware resolution requires the 'dnspython' package")
+    addresses = []
+    ttls = []
+    for record_type in ('A', 'AAAA'):
+        try:
+            answer = dns.resolver.resolve(host, record_type)
+        except (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN):
+            continue
+        addresses.extend(record.address for record in answer)
+        ttls.append(answer.rrset.ttl)
+    if not addresses:
+        raise socket.gaierror(socket.EAI_NONAME, f"No addresses found for {host}")
+    return addresses, min(ttls)
+
+
+def ttl_resolver(host):
+    """Resolves a hostname with dnspython, falling back to the system resolver.
+
+    Names that only the system knows, such as entries in /etc/hosts or
+    search-domain shorthands, are still resolved; their answers carry no TTL.
+
+    Returns:
+        tuple: (addresses, ttl)
+    """
+    try:
+        return dnspython_resolver(host)
+    except ImportError:
+        raise
+    except Exception:
+        return system_resolver(host)
+
+
+def default_resolver():
+    """Returns ttl_resolver if dnspython is installed, otherwise system_resolver."""
+    return ttl_resolver if importlib.util.find_spec('dns') else system_resolver
+
+
+def _is_ip_address(host):
+    try:
+        ipaddress.ip_address(host)
+        return True
+    except ValueError:
+        return False
+
+
+class DNSCache:
+    """Caches hostname resolutions, honoring TTLs, and prefetches new hostnames.
+
+    Args:
+        resolver (callable, optional): Function mapping a hostname to
+            (addresses, ttl). Defaults to default_resolver(), which honors
+            record TTLs when dnspython is installed.
+        default_ttl (float): Seconds to cache answers that carry no TTL
+        max_ttl (float): Upper bound on how long any answer is cached
+        negative_ttl (float): Seconds to cache failed resolutions
+        prefetch_workers (int): Threads used for background prefetching
+        clock (callable): Monotonic time source, replaceable in tests
+    """
+    def __init__(self, resolver=None, default_ttl=300, max_ttl=3600, negative_ttl=30, prefetch_workers=4,
+                 clock=time.monotonic):
+        self.resolver = resolver or default_resolver()
+        self.default_ttl = default_ttl
+        self.max_ttl = max_ttl
+        self.negative_ttl = negative_ttl
+        self.clock = clock
+        self.lookups = 0
+        self.hits = 0
+        self.misses = 0
+        self.prefetches = 0
+        self.failures = 0
+        self.resolve_count = 0
+        self.resolve_time = 0.0
+        self.max_resolve_time = 0.0
+        self._cache = {}  # host -> (addresses or exception, expiry)
+        self._in_flight = {}  # host -> threading.Event
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=prefetch_workers, thread_name_prefix='dns-prefetch')
+        self._installed = False
+
+    def _lookup(self, host):
+        """Returns the cached entry for host if it has not expired."""
+        entry = self._cache.get(host)
+        if entry is not None and entry[1] > self.clock():
+            return entry
+        return None
+
+    def _resolve_now(self, host):
+        """Runs the resolver for host and stores the result."""
+        start = time.perf_counter()
+        try:
+            addresses, ttl = self.resolver(host)
+            ttl = min(self.default_ttl if ttl is None else ttl, self.max_ttl)
+            result = addresses
+        except Exception as e:
+            ttl = self.negative_ttl
+            result = e if isinstance(e, OSError) else socket.gaierror(socket.EAI_FAIL, str(e))
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.resolve_count += 1
+            self.resolve_time += elapsed
+            self.max_resolve_time = max(self.max_resolve_time, elapsed)
+            if isinstance(result, Exception):
+                self.failures += 1
+            self._cache[host] = (result, self.clock() + ttl)
+        return result
+
+    def _resolve_once(self, host):
+        """Resolves host, letting concurrent callers wait for a single lookup."""
+        with self._lock:
+            entry = self._lookup(host)
+            if entry is not None:
+                return entry[0]
+            event = self._in_flight.get(host)
+            owner = event is None
+            if owner:
+                event = self._in_flight[host] = threading.Event()
+        if not owner:
+            event.wait()
+            with self._lock:
+                return self._cache[host][0]
+        try:
+            return self._resolve_now(host)
+        finally:
+            with self._lock:
+                del self._in_flight[host]
+            event.set()
+
+    def resolve(self, host):
+        """Returns the addresses for a hostname, resolving it if not cached.
+
+        Raises:
+            socket.gaierror: If the hostname could not be resolved
+        """
+        host = host.lower()
+        with self._lock:
+            self.lookups += 1
+            entry = self._lookup(host)
+            if entry is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        result = entry[0] if entry is not None else self._resolve_once(host)
+        if isinstance(result, Exception):
+            raise result
+        return list(result)
+
+    def prefetch(self, host):
+        """Starts resolving a hostname in the background if it is not cached."""
+        if not host or _is_ip_address(host):
+            return
+        host = host.lower()
+        with self._lock:
+            if host in self._in_flight or self._lookup(host) is not None:
+                return
+            self.prefetches += 1
+        self._executor.submit(self._resolve_once, host)
+
+    def getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0):
+        """Drop-in replacement for socket.getaddrinfo backed by the cache."""
+        if isinstance(host, bytes):
+            host = host.decode('idna')
+        if not host or flags or _is_ip_address(host):
+            return _system_getaddrinfo(host, port, family, type, proto, flags)
+
+        if port is None:
+            port = 0
+        elif isinstance(port, (str, bytes)):
+            port = port.decode() if isinstance(port, bytes) else port
+            port = int(port) if port.isdigit() else socket.getservbyname(port, 'tcp')
+
+        results = []
+        for address in self.resolve(host):
+            address_family = socket.AF_INET6 if ':' in address else socket.AF_INET
+            if family not in (0, socket.AF_UNSPEC) and family != address_family:
+                continue
+            sockaddr = (address, port, 0, 0) if address_family == socket.AF_INET6 else (address, port)
+            results.append((address_family, type or socket.SOCK_STREAM, proto, '', sockaddr))
+        if not results:
+            raise socket.gaierror(socket.EAI_NONAME, f"No suitable address found for {host}")
+        return results
+
+    def install(self):
+        """Routes socket.getaddrinfo through the cache for the whole process."""
+        if not self._installed:
+            socket.getaddrinfo = self.getaddrinfo
+            self._installed = True
+
+    def uninstall(self):
+        """Restores the original socket.getaddrinfo and stops prefetching."""
+        if self._installed:
+            socket.getaddrinfo = _system_getaddrinfo
+            self._installed = False
+        self._executor.shutdown(wait=False)
+
+    def stats(self):
+        """Returns resolution counters and timings.
+
+        Returns:
+            dict: lookups, hits, misses, prefetches, failures, resolutions and
+            the average and maximum resolution time in milliseconds
+        """
+        with self._lock:
+            return {
+                'lookups': self.lookups,
+                'hits': self.hits,
+                'misses': self.misses,
+                'prefetches': self.prefetches,
+                'failures': self.failures,
+                'resolutions': self.resolve_count,
+                'avg_resolve_ms': 1000 * self.resolve_time / self.resolve_count if self.resolve_count else 0.0,
+                'max_resolve_ms': 1000 * self.max_resolve_time,
+            }
+
+    def __enter__(self):
+        self.install()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.uninstall()
+        logging.debug(f"DNS cache stats: {self.stats()}")
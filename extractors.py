@@ -0,0 +1,249 @@
+"""Pluggable extraction of text and structured fields from parsed pages.
+
+An ExtractionPipeline runs a list of extractor stages over a page that has
+already been parsed by BeautifulSoup. Each stage reads the tree and adds
+fields to a shared page dict, so new stages can be plugged in without
+parsing the HTML again. The stages provided here extract metadata (title,
+description, canonical URL, headings) and page text, either from the whole
+body or from the main content block with boilerplate removed.
+"""
+
+import re
+
+from bs4.element import CData, NavigableString, Tag
+
+from utils import canonical_link_url, extract_text_from_html
+
+# Elements that never hold main content
+BOILERPLATE_TAGS = {'nav', 'footer', 'aside', 'form', 'script', 'style', 'noscript', 'template',
+                    'svg', 'button', 'select', 'iframe'}
+# A <header> inside one of these introduces that content, e.g. an article's title, rather than the page
+SECTIONING_TAGS = ('article', 'section', 'main')
+BOILERPLATE_ROLES = {'navigation', 'banner', 'contentinfo', 'complementary', 'search', 'dialog', 'alertdialog'}
+BOILERPLATE_HINTS = re.compile(r'cookie|consent|gdpr|banner|navbar|menu|breadcrumb|sidebar|footer|masthead|'
+                               r'share|social|subscribe|newsletter|popup|modal|advert|promo', re.IGNORECASE)
+
+# Elements whose own text is scored, and elements that can be chosen as the content root
+PARAGRAPH_TAGS = {'p', 'pre', 'li', 'td', 'blockquote', 'dd', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+CANDIDATE_TAGS = {'article', 'main', 'section', 'div', 'td', 'body'}
+
+# Paragraphs shorter than this many characters do not contribute to scores
+MIN_PARAGRAPH_LENGTH = 25
+
+TEXT_TYPES = (NavigableString, CData)
+
+
+def _is_text(node):
+    """True for visible text nodes; excludes comments, scripts and stylesheets."""
+    return type(node) in TEXT_TYPES
+
+
+def is_boilerplate(tag):
+    """Returns True if a tag looks like navigation, chrome or an overlay."""
+    if tag.name in BOILERPLATE_TAGS:
+        return True
+    if tag.name == 'header' and tag.find_parent(SECTIONING_TAGS) is None:
+        return True  # the page banner
+    attrs = tag.attrs
+    if attrs.get('role') in BOILERPLATE_ROLES or 'hidden' in attrs or attrs.get('aria-hidden') == 'true':
+        return True
+    hints = ' '.join(attrs.get('class') or ()) + ' ' + (attrs.get('id') or '')
+    return bool(hints.strip()) and BOILERPLATE_HINTS.search(hints) is not None
+
+
+def _measure(root):
+    """Computes visible and link text lengths for every tag under root.
+
+    Boilerplate subtrees are skipped and contribute nothing. The walk is
+    iterative so deeply nested documents do not hit the recursion limit, and
+    it also collects the elements find_main_content needs, so the tree is
+    only traversed once.
+
+    Returns:
+        tuple: (sizes, paragraphs, mains) where sizes maps id(tag) to
+        [text_length, link_text_length], paragraphs lists the tags in
+        PARAGRAPH_TAGS and mains the ``<main>``/``role="main"`` elements
+    """
+    sizes = {}
+    paragraphs = []
+    mains = []
+    stack = [(root, False)]
+    while stack:
+        tag, children_done = stack.pop()
+        if not children_done:
+            stack.append((tag, True))
+            for child in tag.children:
+                if isinstance(child, Tag) and not is_boilerplate(child):
+                    stack.append((child, False))
+            continue
+
+        text_length = link_length = 0
+        for child in tag.children:
+            if _is_text(child):
+                text_length += len(child.strip())
+            elif isinstance(child, Tag):
+                child_size = sizes.get(id(child))
+                if child_size is not None:
+                    text_length += child_size[0]
+                    link_length += child_size[1]
+        if tag.name == 'a':
+            link_length = text_length
+        elif tag.name in PARAGRAPH_TAGS:
+            paragraphs.append(tag)
+        elif tag.name == 'main' or tag.get('role') == 'main':
+            mains.append(tag)
+        sizes[id(tag)] = [text_length, link_length]
+    return sizes, paragraphs, mains
+
+
+def iter_visible_strings(root):
+    """Yields the stripped visible strings under root, skipping boilerplate subtrees."""
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, Tag):
+            if node is root or not is_boilerplate(node):
+                stack.extend(reversed(node.contents))
+        elif _is_text(node):
+            text = node.strip()
+            if text:
+                yield text
+
+
+def find_main_content(soup):
+    """Finds the element holding a page's main content.
+
+    An explicit ``<main>`` or ``role="main"`` element is used when the page
+    has exactly one. Otherwise paragraph-like elements are scored by length
+    and comma count, scores are credited to their parent and (at half
+    weight) grandparent, and each candidate's score is scaled down by its
+    link density. The best candidate wins.
+
+    Returns:
+        Tag: The main content element, or the body (or whole document) if no
+        candidate stands out
+    """
+    body = soup.find('body') or soup
+    sizes, paragraphs, mains = _measure(body)
+    if len(mains) == 1:
+        return mains[0]
+
+    scores = {}
+    candidates = {}
+    for paragraph in paragraphs:
+        size = sizes[id(paragraph)]
+        own_text = size[0] - size[1]
+        if own_text < MIN_PARAGRAPH_LENGTH:
+            continue
+        score = 1 + paragraph.get_text().count(',') + min(own_text / 100, 3)
+        for ancestor, weight in ((paragraph.parent, 1.0), (paragraph.parent and paragraph.parent.parent, 0.5)):
+            if ancestor is not None and ancestor.name in CANDIDATE_TAGS and id(ancestor) in sizes:
+                scores[id(ancestor)] = scores.get(id(ancestor), 0) + score * weight
+                candidates[id(ancestor)] = ancestor
+
+    best, best_score = body, 0
+    for key, score in scores.items():
+        text_length, link_length = sizes[key]
+        score *= 1 - (link_length / text_length if text_length else 0)
+        if score > best_score:
+            best, best_score = candidates[key], score
+    return best
+
+
+class BodyTextExtractor:
+    """Sets 'text' to the text of the whole page body, as crawl() always has."""
+
+    def __call__(self, soup, page):
+        page['text'] = extract_text_from_html(soup)
+
+
+class MainContentExtractor:
+    """Sets 'text' to the main content only, with boilerplate removed.
+
+    Navigation, page headers, footers, sidebars, forms and elements whose
+    class or id mark them as menus, cookie banners or sharing widgets are
+    dropped, and the densest block of paragraph text is kept. A <header>
+    inside an article, section or main element is kept with its content.
+    """
+
+    def __call__(self, soup, page):
+        page['text'] = ' '.join(iter_visible_strings(find_main_content(soup)))
+
+
+class MetadataExtractor:
+    """Adds 'title', 'description', 'canonical', 'lang' and 'headings' fields.
+
+    Args:
+        heading_levels (int): Deepest heading level to collect (1 collects only h1)
+    """
+    def __init__(self, heading_levels=3):
+        self.heading_tags = {f"h{level}" for level in range(1, heading_levels + 1)}
+
+    def __call__(self, soup, page):
+        page.update(title=None, description=None, canonical=None, lang=None, headings=[])
+        # One pass over the tree instead of a find() per field
+        for tag in soup.descendants:
+            if not isinstance(tag, Tag):
+                continue
+            name = tag.name
+            if name in self.heading_tags:
+                page['headings'].append({'level': int(name[1]), 'text': tag.get_text(' ', strip=True)})
+            elif name == 'title' and page['title'] is None:
+                page['title'] = tag.get_text(strip=True)
+            elif name == 'meta' and page['description'] is None and tag.get('name', '').lower() == 'description':
+                page['description'] = tag.get('content', '').strip()
+            elif name == 'link' and page['canonical'] is None:
+                page['canonical'] = canonical_link_url(tag, page.get('url'))
+            elif name == 'html' and page['lang'] is None:
+                page['lang'] = tag.get('lang')
+
+
+class ExtractionPipeline:
+    """Runs extractor stages over an already-parsed page.
+
+    Each stage is a callable taking (soup, page) that reads the tree and adds
+    or replaces fields in the page dict. Stages run in order, so later stages
+    can use fields set by earlier ones.
+
+    Args:
+        stages (list): Extractor callables to run
+    """
+    def __init__(self, stages):
+        self.stages = list(stages)
+
+    def extract(self, soup, url=None):
+        """Extracts fields from a parsed page.
+
+        Args:
+            soup (BeautifulSoup): The parsed page
+            url (str, optional): URL of the page, used to resolve relative links
+
+        Returns:
+            dict: The extracted fields. Always contains 'url' and 'text'.
+        """
+        page = {'url': url, 'text': ''}
+        for stage in self.stages:
+            stage(soup, page)
+        return page
+
+
+# Text stage of each predefined pipeline, one per name in config.EXTRACTOR_NAMES
+EXTRACTORS = {
+    'body': BodyTextExtractor,
+    'main': MainContentExtractor,
+}
+
+
+def get_extractor(name, metadata=True):
+    """Creates one of the predefined pipelines in EXTRACTORS by name.
+
+    Args:
+        name (str): Key in EXTRACTORS
+        metadata (bool): Also run MetadataExtractor. It walks the whole tree,
+            so leave it out when only the text is kept.
+    """
+    try:
+        text_stage = EXTRACTORS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown extractor: {name}")
+    return ExtractionPipeline([MetadataExtractor(), text_stage] if metadata else [text_stage])
@@ -0,0 +1,215 @@
+"""Export and analysis of the crawl link graph.
+
+The edges recorded by SitemapManager can be exported as an edge-list CSV,
+Parquet file or GraphML document, and analyzed with sparse-matrix methods
+(PageRank, in/out degree, click depth and orphan pages). The analysis needs
+NumPy and SciPy; Parquet export needs PyArrow. Both are optional and only
+imported when used.
+"""
+
+import csv
+import itertools
+import logging
+from collections import defaultdict
+from operator import itemgetter
+
+
+def collect_edges(sitemap):
+    """Yields every distinct edge recorded during a crawl.
+
+    Args:
+        sitemap (SitemapManager): Manager holding the crawl state
+
+    Yields:
+        tuple: (source, target, kind) where kind is 'internal' or 'external'
+    """
+    for source, target in sitemap.internal_edges:
+        yield source, target, 'internal'
+    for source, target in sitemap.external_edges:
+        yield source, target, 'external'
+
+
+def export_edge_list_csv(edges, path):
+    """Writes edges to a CSV file with source, target and kind columns."""
+    with open(path, 'w', newline='') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(['source', 'target', 'kind'])
+        writer.writerows(edges)
+
+
+def export_edge_list_parquet(edges, path):
+    """Writes edges to a Parquet file with source, target and kind columns."""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Parquet export requires the 'pyarrow' package")
+    sources, targets, kinds = [], [], []
+    for source, target, kind in edges:
+        sources.append(source)
+        targets.append(target)
+        kinds.append(kind)
+    table = pyarrow.table({'source': sources, 'target': targets,
+                           'kind': pyarrow.array(kinds).dictionary_encode()})
+    pyarrow.parquet.write_table(table, path)
+
+
+def export_graphml(edges, path):
+    """Writes edges to a GraphML document, marking each node as internal or external."""
+    from xml.sax.saxutils import quoteattr  # pulls in urllib.request, so only loaded when exporting
+    edges = list(edges)
+    nodes = {}
+    for source, target, kind in edges:
+        nodes.setdefault(source, 'internal')
+        if kind == 'internal' or target not in nodes:
+            nodes[target] = kind
+
+    with open(path, 'w', encoding='utf-8') as graphml_file:
+        graphml_file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        graphml_file.write('<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n')
+        graphml_file.write('  <key id="kind" for="all" attr.name="kind" attr.type="string"/>\n')
+        graphml_file.write('  <graph id="SiteMap" edgedefault="directed">\n')
+        for node, kind in nodes.items():
+            graphml_file.write(f'    <node id={quoteattr(node)}><data key="kind">{kind}</data></node>\n')
+        for source, target, kind in edges:
+            graphml_file.write(f'    <edge source={quoteattr(source)} target={quoteattr(target)}>'
+                               f'<data key="kind">{kind}</data></edge>\n')
+        graphml_file.write('  </graph>\n')
+        graphml_file.write('</graphml>\n')
+
+
+EXPORTERS = {
+    'csv': ('edges.csv', export_edge_list_csv),
+    'parquet': ('edges.parquet', export_edge_list_parquet),
+    'graphml': ('graphml', export_graphml),
+}
+
+
+def analyze_graph(edges, root, pages=None, damping=0.85, max_iterations=100, tolerance=1e-10):
+    """Computes link metrics for the internal link graph.
+
+    Args:
+        edges (iterable): (source, target) pairs of internal links
+        root (str): URL the crawl started from, used for click depth
+        pages (iterable, optional): Crawled URLs. Pages without incoming links
+            are included even if they appear in no edge.
+        damping (float): PageRank damping factor
+        max_iterations (int): Maximum number of PageRank power iterations
+        tolerance (float): L1 change between iterations at which PageRank stops
+
+    Returns:
+        dict: 'urls' (list), per-node NumPy arrays 'pagerank', 'in_degree',
+        'out_degree' and 'depth' (-1 when unreachable from root), plus
+        'depth_distribution' (pages per depth) and 'orphans' (URLs other than
+        root that no page links to)
+    """
+    try:
+        import numpy as np
+        from scipy import sparse
+        from scipy.sparse import csgraph
+    except ImportError:
+        raise ImportError("Graph analysis requires the 'numpy' and 'scipy' packages")
+
+    # Number URLs in first-seen order; map() keeps the per-edge work in C
+    edges = edges if isinstance(edges, list) else list(edges)
+    index = defaultdict(itertools.count().__next__)
+    index[root]
+    sources = np.fromiter(map(index.__getitem__, map(itemgetter(0), edges)), dtype=np.int64, count=len(edges))
+    targets = np.fromiter(map(index.__getitem__, map(itemgetter(1), edges)), dtype=np.int64, count=len(edges))
+    for url in pages or ():
+        index[url]
+    node_count = len(index)
+
+    not_self_link = sources != targets
+    sources, targets = sources[not_self_link], targets[not_self_link]
+    adjacency = sparse.csr_matrix((np.ones(len(sources)), (sources, targets)), shape=(node_count, node_count))
+    adjacency.sum_duplicates()
+    adjacency.data[:] = 1.0  # repeated links count once
+
+    out_degree = np.asarray(adjacency.sum(axis=1)).ravel()
+    in_degree = np.asarray(adjacency.sum(axis=0)).ravel()
+
+    # Row-normalize into a transition matrix; dangling pages spread their rank evenly
+    inverse_out = np.divide(1.0, out_degree, out=np.zeros(node_count), where=out_degree > 0)
+    transition_t = (sparse.diags(inverse_out) @ adjacency).T.tocsr()
+    dangling = out_degree == 0
+    rank = np.full(node_count, 1.0 / node_count)
+    for _ in range(max_iterations):
+        previous = rank
+        rank = damping * (transition_t @ rank + rank[dangling].sum() / node_count) + (1.0 - damping) / node_count
+        if np.abs(rank - previous).sum() < tolerance:
+            break
+    else:
+        logging.warning(f"PageRank did not converge in {max_iterations} iterations")
+
+    distances = csgraph.shortest_path(adjacency, directed=True, unweighted=True, indices=0)
+    depth = np.where(np.isinf(distances), -1, distances).astype(np.int64)
+
+    urls = list(index)
+    orphan_mask = in_degree == 0
+    orphan_mask[0] = False
+    return {
+        'urls': urls,
+        'pagerank': rank,
+        'in_degree': in_degree.astype(np.int64),
+        'out_degree': out_degree.astype(np.int64),
+        'depth': depth,
+        'depth_distribution': np.bincount(depth[depth >= 0]),
+        'orphans': [urls[i] for i in np.flatnonzero(orphan_mask)],
+    }
+
+
+def write_analysis_csv(analysis, path):
+    """Writes per-page metrics from analyze_graph to a CSV file, highest PageRank first."""
+    import numpy as np
+
+    orphans = set(analysis['orphans'])
+    with open(path, 'w', newline='') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(['url', 'pagerank', 'in_degree', 'out_degree', 'depth', 'orphan'])
+        for i in np.argsort(-analysis['pagerank'], kind='stable'):
+            url = analysis['urls'][i]
+            writer.writerow([url, f"{analysis['pagerank'][i]:.8f}", analysis['in_degree'][i],
+                             analysis['out_degree'][i], analysis['depth'][i], url in orphans])
+
+
+def print_analysis_summary(analysis, top=10):
+    """Prints page counts, depth distribution, top pages and orphans."""
+    print(f"Pages: {len(analysis['urls'])}")
+    print("Depth distribution:")
+    for depth, count in enumerate(analysis['depth_distribution']):
+        print(f"  {depth}: {count}")
+    unreachable = int((analysis['depth'] < 0).sum())
+    if unreachable:
+        print(f"  unreachable: {unreachable}")
+    print(f"Top {top} pages by PageRank:")
+    for i in analysis['pagerank'].argsort()[::-1][:top]:
+        print(f"  {analysis['pagerank'][i]:.6f}  {analysis['urls'][i]}")
+    print(f"Orphan pages: {len(analysis['orphans'])}")
+
+
+def read_edge_list_csv(path):
+    """Yields (source, target, kind) rows from an edge-list CSV written by export_edge_list_csv."""
+    with open(path, newline='') as csv_file:
+        for row in csv.DictReader(csv_file):
+            yield row['source'], row['target'], row['kind']
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Analyze a crawl link graph exported as an edge-list CSV.')
+    parser.add_argument('edges', metavar='EDGES', type=str,
+                      help='Edge-list CSV written with --export-graph csv')
+    parser.add_argument('--root', type=str, required=True,
+                      help='URL the crawl started from')
+    parser.add_argument('--output', type=str, default=None,
+                      help='Write per-page metrics to this CSV file')
+    args = parser.parse_args()
+
+    internal_edges = ((source, target) for source, target, kind in read_edge_list_csv(args.edges)
+                      if kind == 'internal')
+    analysis = analyze_graph(internal_edges, args.root)
+    print_analysis_summary(analysis)
+    if args.output:
+        write_analysis_csv(analysis, args.output)
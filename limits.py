@@ -0,0 +1,149 @@
+"""Crawl budgets and adaptive per-host concurrency.
+
+A CrawlBudget bounds a crawl by wall-clock time and bytes downloaded, so
+it finishes within its window whatever the size of the site. A HostLimiter
+caps concurrent requests to each host and adapts the cap with AIMD
+(additive increase, multiplicative decrease): the limit grows by about one
+request per round of fast, successful responses and is cut when a response
+fails or is slower than the target latency, backing off from origins that
+struggle under load.
+"""
+
+import threading
+import time
+from urllib.parse import urlparse
+
+
+class CrawlBudget:
+    """Tracks elapsed time and downloaded bytes against optional limits.
+
+    Args:
+        max_seconds (float, optional): Wall-clock seconds the crawl may run
+        max_bytes (int, optional): Response bytes the crawl may download
+        clock (callable): Returns the current time in seconds
+    """
+    def __init__(self, max_seconds=None, max_bytes=None, clock=time.monotonic):
+        self.max_seconds = max_seconds
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.started = clock()
+        self.bytes_downloaded = 0
+        self._lock = threading.Lock()
+
+    def charge(self, size):
+        """Records a downloaded response of size bytes."""
+        with self._lock:
+            self.bytes_downloaded += size
+
+    def elapsed(self):
+        """Returns seconds since the budget was created."""
+        return self.clock() - self.started
+
+    def exhausted(self):
+        """Returns the reason the budget is used up, or None if it is not."""
+        if self.max_seconds is not None and self.elapsed() >= self.max_seconds:
+            return f"time budget of {self.max_seconds:g}s reached"
+        if self.max_bytes is not None and self.bytes_downloaded >= self.max_bytes:
+            return f"byte budget of {self.max_bytes} bytes reached"
+        return None
+
+
+class _HostState:
+    __slots__ = ('limit', 'in_flight', 'last_decrease')
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.in_flight = 0
+        self.last_decrease = float('-inf')
+
+
+class HostLimiter:
+    """Limits concurrent requests per host, adapting each limit with AIMD.
+
+    Call acquire(url) before a request and release(token, latency, ok) after
+    it. Only responses to requests started after the last decrease can cut
+    the limit again, so one burst of failures halves it once rather than
+    once per request in flight.
+
+    Args:
+        initial (int): Starting limit for a host
+        minimum (int): Lowest limit a host can be cut to
+        maximum (int): Highest limit a host can grow to
+        target_latency (float): Responses slower than this many seconds count
+            as a sign of overload
+        decrease (float): Factor the limit is multiplied by on overload
+        clock (callable): Returns the current time in seconds
+    """
+    def __init__(self, initial=2, minimum=1, maximum=8, target_latency=2.0, decrease=0.5, clock=time.monotonic):
+        self.initial = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_latency = target_latency
+        self.decrease = decrease
+        self.clock = clock
+        self._hosts = {}
+        self._condition = threading.Condition()
+
+    def _state(self, host):
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState(float(self.initial))
+        return state
+
+    def limit(self, url):
+        """Returns the current whole-number limit for the URL's host."""
+        with self._condition:
+            return int(self._state(urlparse(url).netloc.lower()).limit)
+
+    def try_acquire(self, url):
+        """Takes a request slot for the URL's host without waiting.
+
+        Returns:
+            tuple: Token to pass to release(), or None if the host is at its limit
+        """
+        host = urlparse(url).netloc.lower()
+        with self._condition:
+            state = self._state(host)
+            if state.in_flight >= int(state.limit):
+                return None
+            state.in_flight += 1
+            return host, self.clock()
+
+    def acquire(self, url):
+        """Waits for a request slot for the URL's host.
+
+        Returns:
+            tuple: Token to pass to release()
+        """
+        with self._condition:
+            while True:
+                token = self.try_acquire(url)
+                if token is not None:
+                    return token
+                self._condition.wait()
+
+    def release(self, token, latency, ok):
+        """Returns a request slot and adapts the host's limit.
+
+        Args:
+            token (tuple): Value returned by acquire()
+            latency (float): Seconds the request took
+            ok (bool): Whether the request succeeded
+        """
+        host, started = token
+        with self._condition:
+            state = self._hosts[host]
+            state.in_flight -= 1
+            if not ok or latency > self.target_latency:
+                if started > state.last_decrease:
+                    state.limit = max(float(self.minimum), state.limit * self.decrease)
+                    state.last_decrease = self.clock()
+            else:
+                # About +1 per round of `limit` successful requests
+                state.limit = min(float(self.maximum), state.limit + 1 / state.limit)
+            self._condition.notify_all()
+
+    def stats(self):
+        """Returns the current limit of every host seen."""
+        with self._condition:
+            return {host: int(state.limit) for host, state in self._hosts.items()}
@@ -0,0 +1,218 @@
+"""Concurrent validation of external links found during a crawl.
+
+Each distinct external target is checked once with a HEAD request, falling
+back to GET for servers that reject, reset or time out on HEAD. Requests run
+on a thread pool with a cap on concurrent requests per host, and results are
+kept in a bounded JSON cache so repeated runs only recheck stale links.
+"""
+
+import csv
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+
+from config import CONNECT_TIMEOUT, READ_TIMEOUT
+
+DEFAULT_CACHE_PATH = "output/link-check-cache.json"
+DEFAULT_MAX_CACHE_ENTRIES = 100000
+
+
+class LinkChecker:
+    """Checks URLs concurrently and caches the results across runs.
+
+    Args:
+        max_workers (int): Maximum number of links checked at once
+        per_host_limit (int): Maximum concurrent requests to a single host
+        timeout (float or tuple): Request timeout in seconds, or a (connect, read) pair
+        cache_path (str, optional): JSON file holding results of earlier runs.
+            Caching is disabled if omitted.
+        cache_ttl (float): Seconds for which a cached result is reused
+        max_cache_entries (int): Most results kept in the cache. Expired
+            results and then the oldest ones are dropped when it is saved.
+    """
+    def __init__(self, max_workers=16, per_host_limit=2, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), cache_path=None,
+                 cache_ttl=24 * 60 * 60, max_cache_entries=DEFAULT_MAX_CACHE_ENTRIES):
+        self.max_workers = max_workers
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self.cache_path = cache_path
+        self.cache_ttl = cache_ttl
+        self.max_cache_entries = max_cache_entries
+        self.cache = self._load_cache()
+        self._host_limits = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._sessions = []
+
+    def _load_cache(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path) as cache_file:
+                return json.load(cache_file)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable link check cache {self.cache_path}: {e}")
+            return {}
+
+    def prune_cache(self):
+        """Drops expired results, then the oldest ones beyond max_cache_entries."""
+        now = time.time()
+        fresh = [(url, result) for url, result in self.cache.items() if now - result['checked_at'] < self.cache_ttl]
+        if len(fresh) > self.max_cache_entries:
+            fresh.sort(key=lambda item: item[1]['checked_at'])
+            fresh = fresh[len(fresh) - self.max_cache_entries:]
+        self.cache = dict(fresh)
+
+    def save_cache(self):
+        """Prunes the result cache and writes it to disk."""
+        self.prune_cache()
+        if not self.cache_path:
+            return
+        directory = os.path.dirname(self.cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.cache_path}.tmp"
+        with open(temp_path, 'w') as cache_file:
+            json.dump(self.cache, cache_file)
+        os.replace(temp_path, self.cache_path)
+
+    def _host_limit(self, url):
+        """Returns the semaphore limiting concurrent requests to the URL's host."""
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            limit = self._host_limits.get(host)
+            if limit is None:
+                limit = self._host_limits[host] = threading.Semaphore(self.per_host_limit)
+        return limit
+
+    def _session(self):
+        """Returns a requests session private to the current thread."""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            with self._lock:
+                self._sessions.append(session)
+        return session
+
+    def close(self):
+        """Closes the sessions of every thread that checked a link."""
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            session.close()
+        self._local = threading.local()
+
+    def check_url(self, url):
+        """Checks a single URL, ignoring the cache.
+
+        Returns:
+            dict: 'status' (int or None), 'ok' (bool), 'error' (str or None),
+            'method' used for the final request and 'checked_at' timestamp
+        """
+        session = self._session()
+        result = {'status': None, 'ok': False, 'error': None, 'method': 'HEAD', 'checked_at': time.time()}
+        with self._host_limit(url):
+            try:
+                response = session.head(url, timeout=self.timeout, allow_redirects=True)
+                result['status'] = response.status_code
+            except requests.exceptions.RequestException as e:
+                result['error'] = f"{type(e).__name__}: {e}"
+            if result['status'] is None or result['status'] >= 400:
+                # Many servers reject, reset or stall on HEAD, so confirm with GET
+                result['method'] = 'GET'
+                try:
+                    with session.get(url, timeout=self.timeout, allow_redirects=True, stream=True) as response:
+                        result['status'] = response.status_code
+                        result['error'] = None
+                except requests.exceptions.RequestException as e:
+                    result['status'] = None
+                    result['error'] = f"{type(e).__name__}: {e}"
+        result['ok'] = result['status'] is not None and result['status'] < 400
+        return result
+
+    def check(self, urls):
+        """Checks URLs concurrently, reusing fresh cached results.
+
+        Args:
+            urls (iterable): URLs to check. Duplicates are checked once.
+
+        Returns:
+            dict: Result of check_url for every URL
+        """
+        now = time.time()
+        results = {}
+        pending = []
+        for url in dict.fromkeys(urls):
+            cached = self.cache.get(url)
+            if cached is not None and now - cached['checked_at'] < self.cache_ttl:
+                results[url] = cached
+            else:
+                pending.append(url)
+
+        if pending:
+            # Interleave hosts so workers are not all parked on one host's limit
+            by_host = {}
+            for url in pending:
+                by_host.setdefault(urlparse(url).netloc.lower(), []).append(url)
+            pending = [url for round_urls in itertools.zip_longest(*by_host.values()) for url in round_urls if url]
+            try:
+                with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='link-check') as executor:
+                    for url, result in zip(pending, executor.map(self.check_url, pending)):
+                        results[url] = self.cache[url] = result
+            finally:
+                self.close()  # the sessions belong to the pool's threads, which have exited
+            self.save_cache()
+        return results
+
+
+def group_external_links(external_edges):
+    """Maps each distinct external target to the pages that link to it.
+
+    Args:
+        external_edges (iterable): (source, target) pairs
+
+    Returns:
+        dict: target URL -> list of source pages in discovery order
+    """
+    sources = {}
+    for source, target in external_edges:
+        sources.setdefault(target, {})[source] = None
+    return {target: list(target_sources) for target, target_sources in sources.items()}
+
+
+def check_external_links(sitemap, checker):
+    """Checks every distinct external link of a crawl.
+
+    Args:
+        sitemap (SitemapManager): Manager holding the crawl state
+        checker (LinkChecker): Checker to validate the links with
+
+    Returns:
+        list: (target, status, error, sources) for every broken link
+    """
+    sources = group_external_links((source, target) for source, target in sitemap.external_edges
+                                   if urlparse(target).scheme in ('http', 'https'))
+    results = checker.check(sources)
+    broken = []
+    for target, target_sources in sources.items():
+        result = results[target]
+        if not result['ok']:
+            broken.append((target, result['status'], result['error'], target_sources))
+    return broken
+
+
+def write_broken_links_report(broken, path):
+    """Writes broken links to a CSV file with one row per linking page."""
+    with open(path, 'w', newline='') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(['target', 'status', 'error', 'source'])
+        for target, status, error, sources in broken:
+            for source in sources:
+                writer.writerow([target, status if status is not None else '', error or '', source])
@@ -0,0 +1,408 @@
+"""Memory caps for long crawls: spilling crawl state to disk and reporting usage.
+
+A MemoryLimit watches the resident set size of the process. Above its spill
+threshold the crawl state that grows with every page (page text, parent
+links, the visited and queued URLs, the link graph, click depths and
+duplicate-content digests) moves from memory into SQLite files, and above
+the hard limit the crawl stops like it does when a CrawlBudget runs out.
+memory_report() breaks memory down by crawl structure and, when tracemalloc
+is tracing, by the source lines that allocated each structure's objects.
+"""
+
+import gc
+import json
+import os
+import sqlite3
+import sys
+import threading
+from collections.abc import MutableMapping, MutableSet, Sequence
+
+from sitemap import EdgeIndex
+
+
+class SQLiteStore:
+    """A crawl structure kept in its own SQLite file.
+
+    Reads and writes may come from several threads, e.g. the background
+    writer rendering the sitemap while the crawl adds pages. The file is
+    scratch space for one crawl, so it skips journaling and syncing.
+
+    Args:
+        path (str): SQLite file to create, replacing any existing one
+        schema (tuple): Statements creating the tables
+    """
+    def __init__(self, path, schema):
+        if os.path.exists(path):
+            os.remove(path)
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=OFF")
+        self._connection.execute("PRAGMA synchronous=OFF")
+        for statement in schema:
+            self._connection.execute(statement)
+
+    def _query(self, sql, parameters=()):
+        with self._lock:
+            return self._connection.execute(sql, parameters).fetchall()
+
+    def _query_one(self, sql, parameters=()):
+        with self._lock:
+            return self._connection.execute(sql, parameters).fetchone()
+
+    def close(self):
+        """Closes the SQLite file."""
+        with self._lock:
+            self._connection.close()
+
+    def remove(self):
+        """Closes and deletes the SQLite file."""
+        self.close()
+        os.remove(self.path)
+
+
+class DiskDict(SQLiteStore, MutableMapping):
+    """Dict of str keys to JSON-serializable values stored in a SQLite file.
+
+    Only the keys being read or written are held in memory.
+
+    Args:
+        path (str): SQLite file to create, replacing any existing one
+        items (iterable, optional): (key, value) pairs to start with
+    """
+    # Updates keep the key's rowid, and so its position in iteration order
+    _UPSERT = "INSERT INTO items VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value"
+
+    def __init__(self, path, items=()):
+        super().__init__(path, ("CREATE TABLE items (key TEXT PRIMARY KEY, value TEXT)",))
+        with self._connection:
+            self._connection.executemany(self._UPSERT, ((key, json.dumps(value)) for key, value in items))
+
+    def __getitem__(self, key):
+        row = self._query_one("SELECT value FROM items WHERE key = ?", (key,))
+        if row is None:
+            raise KeyError(key)
+        return json.loads(row[0])
+
+    def __setitem__(self, key, value):
+        with self._lock, self._connection:
+            self._connection.execute(self._UPSERT, (key, json.dumps(value)))
+
+    def __delitem__(self, key):
+        with self._lock, self._connection:
+            if not self._connection.execute("DELETE FROM items WHERE key = ?", (key,)).rowcount:
+                raise KeyError(key)
+
+    def __contains__(self, key):
+        return self._query_one("SELECT 1 FROM items WHERE key = ?", (key,)) is not None
+
+    def __iter__(self):
+        return iter([row[0] for row in self._query("SELECT key FROM items ORDER BY rowid")])
+
+    def items(self):
+        """Yields (key, value) pairs in insertion order without loading them all."""
+        rows = self._query("SELECT key, value FROM items ORDER BY rowid")
+        return ((key, json.loads(value)) for key, value in rows)
+
+    def __len__(self):
+        return self._query_one("SELECT COUNT(*) FROM items")[0]
+
+
+class DiskSet(SQLiteStore, MutableSet):
+    """Set of str or bytes values stored in a SQLite file.
+
+    Args:
+        path (str): SQLite file to create, replacing any existing one
+        values (iterable, optional): Values to start with
+    """
+    def __init__(self, path, values=()):
+        super().__init__(path, ("CREATE TABLE items (value PRIMARY KEY)",))
+        with self._connection:
+            self._connection.executemany("INSERT OR IGNORE INTO items VALUES (?)", ((value,) for value in values))
+        self._length = self._query_one("SELECT COUNT(*) FROM items")[0]
+
+    def add(self, value):
+        with self._lock, self._connection:
+            self._length += self._connection.execute("INSERT OR IGNORE INTO items VALUES (?)", (value,)).rowcount
+
+    def discard(self, value):
+        with self._lock, self._connection:
+            self._length -= self._connection.execute("DELETE FROM items WHERE value = ?", (value,)).rowcount
+
+    def __contains__(self, value):
+        return self._query_one("SELECT 1 FROM items WHERE value = ?", (value,)) is not None
+
+    def __iter__(self):
+        return iter([row[0] for row in self._query("SELECT value FROM items ORDER BY rowid")])
+
+    def __len__(self):
+        return self._length
+
+
+class DiskList(SQLiteStore, Sequence):
+    """List of strs stored in a SQLite file, appended to and popped from the end.
+
+    This is what the crawl frontier needs: a stack that can be sliced from a
+    position and searched by value without loading it.
+
+    Args:
+        path (str): SQLite file to create, replacing any existing one
+        values (iterable, optional): Values to start with
+    """
+    def __init__(self, path, values=()):
+        super().__init__(path, ("CREATE TABLE items (position INTEGER PRIMARY KEY, value TEXT)",
+                                "CREATE INDEX items_value ON items (value)"))
+        values = list(values)
+        with self._connection:
+            self._connection.executemany("INSERT INTO items VALUES (?, ?)", enumerate(values))
+        self._length = len(values)
+
+    def append(self, value):
+        with self._lock, self._connection:
+            self._connection.execute("INSERT INTO items VALUES (?, ?)", (self._length, value))
+            self._length += 1
+
+    def pop(self):
+        """Removes and returns the last value."""
+        with self._lock, self._connection:
+            if not self._length:
+                raise IndexError("pop from empty list")
+            self._length -= 1
+            row = self._connection.execute("SELECT value FROM items WHERE position = ?", (self._length,)).fetchone()
+            self._connection.execute("DELETE FROM items WHERE position = ?", (self._length,))
+        return row[0]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._length)
+            rows = self._query("SELECT value FROM items WHERE position >= ? AND position < ? ORDER BY position",
+                               (start, stop))
+            return [row[0] for row in rows][::step]
+        if index < 0:
+            index += self._length
+        row = self._query_one("SELECT value FROM items WHERE position = ?", (index,))
+        if row is None:
+            raise IndexError("list index out of range")
+        return row[0]
+
+    def __contains__(self, value):
+        return self._query_one("SELECT 1 FROM items WHERE value = ?", (value,)) is not None
+
+    def __iter__(self):
+        return iter([row[0] for row in self._query("SELECT value FROM items ORDER BY position")])
+
+    def __len__(self):
+        return self._length
+
+
+class DiskEdgeIndex(SQLiteStore, EdgeIndex):
+    """EdgeIndex stored in a SQLite file, keeping the ids and order of the original.
+
+    Args:
+        path (str): SQLite file to create, replacing any existing one
+        edges (EdgeIndex, optional): Links to start with
+    """
+    def __init__(self, path, edges=None):
+        super().__init__(path, ("CREATE TABLE urls (id INTEGER PRIMARY KEY, url TEXT UNIQUE)",
+                                "CREATE TABLE edges (source INTEGER, target INTEGER, count INTEGER, "
+                                "PRIMARY KEY (source, target))"))
+        if edges is not None:
+            with self._connection:
+                self._connection.executemany("INSERT INTO urls VALUES (?, ?)", enumerate(edges.urls))
+                self._connection.executemany("INSERT INTO edges VALUES (?, ?, ?)",
+                                             ((source, target, edges.counts[source, target])
+                                              for source, target in edges.id_pairs()))
+
+    def _url_id(self, url):
+        row = self._connection.execute("SELECT id FROM urls WHERE url = ?", (url,)).fetchone()
+        if row is not None:
+            return row[0]
+        # Ids continue from the copied ones, as the next id is always one past the largest
+        return self._connection.execute("INSERT INTO urls (url) VALUES (?)", (url,)).lastrowid
+
+    def url_id(self, url):
+        with self._lock, self._connection:
+            return self._url_id(url)
+
+    def add(self, source, target):
+        with self._lock, self._connection:
+            edge = (self._url_id(source), self._url_id(target))
+            updated = self._connection.execute("UPDATE edges SET count = count + 1 WHERE source = ? AND target = ?",
+                                               edge).rowcount
+            if not updated:
+                self._connection.execute("INSERT INTO edges VALUES (?, ?, 1)", edge)
+        return not updated
+
+    def count(self, source, target):
+        row = self._query_one("SELECT count FROM edges JOIN urls AS s ON s.id = source JOIN urls AS t "
+                              "ON t.id = target WHERE s.url = ? AND t.url = ?", (source, target))
+        return row[0] if row else 0
+
+    def targets(self, source):
+        return [row[0] for row in self._query("SELECT t.url FROM edges JOIN urls AS s ON s.id = source "
+                                              "JOIN urls AS t ON t.id = target WHERE s.url = ? "
+                                              "ORDER BY edges.rowid", (source,))]
+
+    def id_pairs(self):
+        return [tuple(row) for row in self._query("SELECT source, target FROM edges ORDER BY rowid")]
+
+    def items(self):
+        rows = self._query("SELECT s.url, t.url, count FROM edges JOIN urls AS s ON s.id = source "
+                           "JOIN urls AS t ON t.id = target ORDER BY edges.rowid")
+        return iter(rows)
+
+    def __iter__(self):
+        return ((source, target) for source, target, _ in self.items())
+
+    def __len__(self):
+        return self._query_one("SELECT COUNT(*) FROM edges")[0]
+
+    def __contains__(self, edge):
+        return self.count(*edge) > 0
+
+
+def current_rss():
+    """Returns the resident set size of this process in bytes.
+
+    Read from /proc on Linux. Elsewhere the peak RSS from getrusage() is used,
+    which never goes down, so a limit stays exceeded once it is reached.
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class MemoryLimit:
+    """Caps the memory of a crawl.
+
+    Args:
+        max_bytes (int): Resident set size at which the crawl stops
+        spill_folder (str): Directory for the SQLite files state is spilled to
+        spill_ratio (float): Fraction of max_bytes above which state is spilled
+        rss (callable): Returns the current resident set size in bytes
+    """
+    def __init__(self, max_bytes, spill_folder, spill_ratio=0.75, rss=current_rss):
+        self.max_bytes = max_bytes
+        self.spill_folder = spill_folder
+        self.spill_ratio = spill_ratio
+        self.rss = rss
+        self.spilled = False
+        self.peak = 0
+        self._stores = []
+
+    def check(self, state):
+        """Spills crawl state to disk once memory passes the threshold.
+
+        Args:
+            state: Object whose spill_to_disk(folder) moves its structures to
+                disk and returns the SQLiteStores it created, such as a
+                Crawler or a SitemapManager
+
+        Returns:
+            str: The reason the crawl must stop, or None if it can go on
+        """
+        usage = self.rss()
+        self.peak = max(self.peak, usage)
+        if not self.spilled and usage >= self.max_bytes * self.spill_ratio:
+            self._stores.extend(state.spill_to_disk(self.spill_folder))
+            self.spilled = True
+            gc.collect()
+            usage = self.rss()
+        if usage >= self.max_bytes:
+            gc.collect()
+            if self.rss() >= self.max_bytes:
+                return f"memory limit of {self.max_bytes / 1024 / 1024:g} MB reached"
+        return None
+
+    def close(self):
+        """Deletes the spilled state, once nothing will read the crawl state again."""
+        stores, self._stores = self._stores, []
+        for store in stores:
+            store.remove()
+        if stores:
+            try:
+                os.rmdir(self.spill_folder)
+            except OSError:
+                pass  # not empty
+
+
+def deep_sizeof(obj):
+    """Returns the size in bytes of an object and everything it contains.
+
+    Follows dicts, lists, tuples, sets and objects with a __dict__ or
+    __slots__, counting shared objects once. A SQLiteStore counts as its
+    in-memory handle only.
+    """
+    return sum(sys.getsizeof(item) for item in _walk(obj))
+
+
+def _walk(obj):
+    # Yields obj and everything it contains once each, as deep_sizeof() counts them
+    seen = set()
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        yield obj
+        if isinstance(obj, (str, bytes, int, float, bool, type(None), SQLiteStore)):
+            continue
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        else:
+            if hasattr(obj, '__dict__'):
+                stack.append(obj.__dict__)
+            for name in getattr(type(obj), '__slots__', ()):
+                if hasattr(obj, name):
+                    stack.append(getattr(obj, name))
+
+
+def _allocation_sites(obj, top):
+    # Sums the objects in obj by the line tracemalloc recorded allocating them
+    import tracemalloc
+    sites = {}
+    for item in _walk(obj):
+        traceback = tracemalloc.get_object_traceback(item)
+        location = f"{traceback[0].filename}:{traceback[0].lineno}" if traceback else 'untraced'
+        sites[location] = sites.get(location, 0) + sys.getsizeof(item)
+    return sorted(sites.items(), key=lambda item: -item[1])[:top]
+
+
+def memory_report(structures, top=10):
+    """Measures named crawl structures and where their memory was allocated.
+
+    Structure sizes come from deep_sizeof(). When tracemalloc is tracing,
+    each object in a structure is also looked up in the trace, so the
+    allocation sites are attributed to the structure holding the objects.
+    Objects allocated before tracing started are counted as 'untraced'.
+
+    Args:
+        structures (dict): Name -> object to measure with deep_sizeof()
+        top (int): Number of allocation sites to list, overall and per structure
+
+    Returns:
+        dict: 'rss' (bytes), 'structures' (name -> bytes, largest first) and,
+        when tracemalloc is tracing, 'traced_current' and 'traced_peak'
+        (bytes), 'top_allocations' ((file:line, bytes) pairs for the whole
+        process) and 'structure_allocations' (name -> (file:line, bytes)
+        pairs, in the order of 'structures')
+    """
+    import tracemalloc
+    sizes = {name: deep_sizeof(obj) for name, obj in structures.items()}
+    report = {'rss': current_rss(), 'structures': dict(sorted(sizes.items(), key=lambda item: -item[1]))}
+    if tracemalloc.is_tracing():
+        report['traced_current'], report['traced_peak'] = tracemalloc.get_traced_memory()
+        statistics = tracemalloc.take_snapshot().statistics('lineno')[:top]
+        report['top_allocations'] = [(f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}", stat.size)
+                                     for stat in statistics]
+        report['structure_allocations'] = {name: _allocation_sites(structures[name], top)
+                                           for name in report['structures']}
+    return report
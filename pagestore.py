@@ -0,0 +1,277 @@
+"""Compressed, content-addressed storage for crawled page text.
+
+Pages are appended to segment files as independently compressed records and
+located through an index keyed by URL and content hash, so a single page can
+be read back without scanning or decompressing the rest of the crawl.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import mmap
+import os
+
+from warc import format_warc_record, parse_warc_record
+
+# Segment files are rotated once they grow past this many bytes
+DEFAULT_SEGMENT_SIZE = 64 * 1024 * 1024
+
+INDEX_FILE_NAME = "index.jsonl"
+MANIFEST_FILE_NAME = "store.json"
+
+
+def _get_codec(compression):
+    """Returns (compress, decompress, extension) callables for a compression name."""
+    if compression == 'gzip':
+        return gzip.compress, gzip.decompress, 'gz'
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("zstd compression requires the 'zstandard' package")
+        return zstandard.ZstdCompressor().compress, zstandard.ZstdDecompressor().decompress, 'zst'
+    raise ValueError(f"Unsupported compression: {compression}")
+
+
+class PageStore:
+    """Stores page text in compressed segment files with a random-access index.
+
+    Every page is compressed on its own and appended to the current segment,
+    and a line is added to ``index.jsonl`` recording where it landed. Pages
+    with identical text share one record, so the index maps URLs to content
+    hashes and content hashes to (segment, offset, length) locations. Reads
+    go through read-only memory maps of the segment files.
+
+    The compression and WARC mode are recorded in ``store.json`` when the
+    store is created, so it can be reopened without repeating them. Lines
+    superseded by storing a URL again are dropped from the index on close.
+
+    Args:
+        folder (str): Directory holding the segments and index. Created if missing.
+        compression (str, optional): 'gzip' or 'zstd' (needs ``zstandard``).
+            Defaults to the store's recorded compression, or gzip for a new store.
+        segment_size (int): Size in bytes after which a new segment is started
+        warc (bool, optional): Wrap each record in a WARC 'resource' record. With
+            gzip compression the segments are then valid ``.warc.gz`` files.
+            Defaults to the store's recorded mode, or False for a new store.
+
+    Raises:
+        ValueError: If compression or warc differ from the store's recorded
+            settings, or the folder holds an index without a manifest
+    """
+    def __init__(self, folder, compression=None, segment_size=DEFAULT_SEGMENT_SIZE, warc=None):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+        self.compression, self.warc = self._load_manifest(compression, warc)
+        self.segment_size = segment_size
+        self._compress, self._decompress, extension = _get_codec(self.compression)
+        self._extension = f"warc.{extension}" if self.warc else extension
+        self.url_index = {}  # url -> sha256
+        self.hash_index = {}  # sha256 -> (segment, offset, length)
+        self._maps = {}
+        self._segment_id = 0
+        self._segment_file = None
+        self._index_lines = 0
+        self._load_index()
+        self._index_file = open(os.path.join(folder, INDEX_FILE_NAME), 'a', encoding='utf-8')
+
+    def _load_manifest(self, compression, warc):
+        """Reads the store's settings, or records them for a new store.
+
+        Returns:
+            tuple: (compression, warc)
+        """
+        manifest_path = os.path.join(self.folder, MANIFEST_FILE_NAME)
+        try:
+            with open(manifest_path, encoding='utf-8') as manifest_file:
+                manifest = json.load(manifest_file)
+        except FileNotFoundError:
+            if os.path.exists(os.path.join(self.folder, INDEX_FILE_NAME)):
+                raise ValueError(f"{self.folder} has an index but no {MANIFEST_FILE_NAME}")
+            manifest = {'compression': compression or 'gzip', 'warc': bool(warc)}
+            _get_codec(manifest['compression'])  # rejects unknown names before anything is written
+            with open(manifest_path, 'w', encoding='utf-8') as manifest_file:
+                json.dump(manifest, manifest_file)
+            return manifest['compression'], manifest['warc']
+
+        if compression is not None and compression != manifest['compression']:
+            raise ValueError(f"{self.folder} was written with {manifest['compression']} compression, "
+                             f"not {compression}")
+        if warc is not None and bool(warc) != manifest['warc']:
+            raise ValueError(f"{self.folder} was written {'with' if manifest['warc'] else 'without'} "
+                             f"WARC records")
+        return manifest['compression'], manifest['warc']
+
+    def _load_index(self):
+        """Loads an existing index so the store can be reopened and appended to."""
+        index_path = os.path.join(self.folder, INDEX_FILE_NAME)
+        if not os.path.exists(index_path):
+            return
+        with open(index_path, encoding='utf-8') as index_file:
+            for line in index_file:
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    logging.warning(f"Skipping corrupt index entry in {index_path}")
+                    continue
+                self._index_lines += 1
+                self.url_index[entry['url']] = entry['sha256']
+                self.hash_index[entry['sha256']] = (entry['segment'], entry['offset'], entry['length'])
+                self._segment_id = max(self._segment_id, entry['segment'])
+
+    def _segment_path(self, segment_id):
+        return os.path.join(self.folder, f"segment-{segment_id:05d}.{self._extension}")
+
+    def _open_segment(self):
+        """Returns the segment file to append to, rotating it when full."""
+        if self._segment_file is None:
+            self._segment_file = open(self._segment_path(self._segment_id), 'ab')
+        if self._segment_file.tell() >= self.segment_size:
+            self._segment_file.close()
+            self._segment_id += 1
+            self._segment_file = open(self._segment_path(self._segment_id), 'ab')
+        return self._segment_file
+
+    def put(self, url, text):
+        """Stores the text of a page.
+
+        Args:
+            url (str): URL of the page
+            text (str): Extracted page text
+
+        Returns:
+            str: The SHA-256 hex digest identifying the content
+        """
+        data = text.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+
+        if digest not in self.hash_index:
+            if self.warc:
+                data = format_warc_record('resource', url, data, 'text/plain; charset=utf-8',
+                                          {'WARC-Block-Digest': f"sha256:{digest}"})
+            record = self._compress(data)
+            segment_file = self._open_segment()
+            offset = segment_file.tell()
+            segment_file.write(record)
+            self.hash_index[digest] = (self._segment_id, offset, len(record))
+
+        if self.url_index.get(url) == digest:
+            return digest  # already stored with this text
+        self.url_index[url] = digest
+        self._index_file.write(self._index_entry(url, digest))
+        self._index_lines += 1
+        return digest
+
+    def _index_entry(self, url, digest):
+        segment_id, offset, length = self.hash_index[digest]
+        return json.dumps({'url': url, 'sha256': digest, 'segment': segment_id,
+                           'offset': offset, 'length': length}) + "\n"
+
+    def compact(self):
+        """Rewrites the index with one line per URL, dropping superseded lines."""
+        self._index_file.close()
+        index_path = os.path.join(self.folder, INDEX_FILE_NAME)
+        with open(f"{index_path}.tmp", 'w', encoding='utf-8') as index_file:
+            for url, digest in self.url_index.items():
+                index_file.write(self._index_entry(url, digest))
+        os.replace(f"{index_path}.tmp", index_path)
+        self._index_lines = len(self.url_index)
+        self._index_file = open(index_path, 'a', encoding='utf-8')
+
+    def _read_record(self, location):
+        """Reads and decompresses the record at a (segment, offset, length) location."""
+        segment_id, offset, length = location
+        if self._segment_file is not None and segment_id == self._segment_id:
+            self._segment_file.flush()
+
+        mapped = self._maps.get(segment_id)
+        if mapped is None or offset + length > len(mapped):
+            if mapped is not None:
+                mapped.close()
+            with open(self._segment_path(segment_id), 'rb') as segment_file:
+                mapped = mmap.mmap(segment_file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[segment_id] = mapped
+
+        data = self._decompress(mapped[offset:offset + length])
+        if self.warc:
+            _, data = parse_warc_record(data)
+        return data.decode('utf-8')
+
+    def get(self, url):
+        """Returns the stored text for a URL, or None if it is not in the store."""
+        digest = self.url_index.get(url)
+        if digest is None:
+            return None
+        return self._read_record(self.hash_index[digest])
+
+    def get_by_hash(self, digest):
+        """Returns the stored text for a SHA-256 content digest, or None."""
+        location = self.hash_index.get(digest)
+        if location is None:
+            return None
+        return self._read_record(location)
+
+    def items(self):
+        """Yields (url, text) pairs for every stored page in insertion order."""
+        for url in list(self.url_index):
+            yield url, self.get(url)
+
+    def __contains__(self, url):
+        return url in self.url_index
+
+    def __len__(self):
+        return len(self.url_index)
+
+    def flush(self):
+        """Flushes pending segment and index writes to disk."""
+        if self._segment_file is not None:
+            self._segment_file.flush()
+        self._index_file.flush()
+
+    def close(self):
+        """Compacts the index if URLs were stored again, then closes all open files and memory maps."""
+        if not self._index_file.closed and self._index_lines > len(self.url_index):
+            self.compact()
+        for mapped in self._maps.values():
+            mapped.close()
+        self._maps.clear()
+        if self._segment_file is not None:
+            self._segment_file.close()
+            self._segment_file = None
+        if not self._index_file.closed:
+            self._index_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Query or export a crawler page store.')
+    parser.add_argument('store', metavar='STORE', type=str,
+                      help='Page store directory written with --output-format store')
+    parser.add_argument('--get', type=str, metavar='URL',
+                      help='Print the stored text for URL')
+    parser.add_argument('--export', type=str, metavar='PATH',
+                      help='Export every stored page to PATH')
+    parser.add_argument('--format', type=str, choices=['txt', 'xlsx'], default='txt',
+                      help='Format used by --export (default: txt)')
+    args = parser.parse_args()
+
+    with PageStore(args.store) as store:
+        if args.get:
+            text = store.get(args.get)
+            if text is None:
+                parser.exit(1, f"{args.get} is not in the store\n")
+            print(text)
+        if args.export:
+            from crawler import export_page_store
+            export_page_store(store, args.export, args.format)
+            print(f"Exported {len(store)} pages to {args.export}")
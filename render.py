@@ -0,0 +1,298 @@
+"""Rendering of JavaScript-built pages in a pool of headless browsers.
+
+Pages whose content only appears after scripts run come back near-empty from
+a plain HTTP fetch. A RenderPool routes such pages, chosen by URL pattern or
+because the fetched text is too short, to worker threads that each own a
+long-lived headless browser context. Contexts are reused between pages and
+recycled periodically, images, fonts and media are blocked to keep render
+cost down, and rendered HTML is cached in memory and on disk.
+
+Rendering uses Playwright, which is only imported when a browser is launched.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future
+
+from config import DEFAULT_BLOCKED_RESOURCES, TIMEOUT
+
+# Final URL, HTTP status and headers of the navigation, and the rendered DOM
+RenderResult = namedtuple('RenderResult', ['url', 'status_code', 'headers', 'html'])
+
+
+class RenderPolicy:
+    """Decides which pages are rendered in a browser.
+
+    Args:
+        patterns (iterable): Regular expressions; URLs matching any of them are
+            always rendered instead of fetched
+        min_text_length (int): Fetched pages with less visible text than this
+            many characters are rendered again. 0 disables the check.
+    """
+    def __init__(self, patterns=(), min_text_length=0):
+        self.patterns = [re.compile(pattern) for pattern in patterns]
+        self.min_text_length = min_text_length
+
+    @property
+    def enabled(self):
+        """True if the policy can route any page to the browser."""
+        return bool(self.patterns) or self.min_text_length > 0
+
+    def matches(self, url):
+        """Returns True if the URL should be rendered without fetching it first."""
+        return any(pattern.search(url) for pattern in self.patterns)
+
+    def is_thin(self, text):
+        """Returns True if a fetched page's text is too short to be the real content."""
+        return len(text.strip()) < self.min_text_length
+
+
+class RenderCache:
+    """Caches rendered pages in memory and, optionally, on disk.
+
+    Args:
+        folder (str, optional): Directory holding one JSON file per rendered
+            URL. Only the in-memory cache is used if omitted.
+        ttl (float): Seconds for which a rendered page is reused
+    """
+    def __init__(self, folder=None, ttl=24 * 60 * 60):
+        self.folder = folder
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+    def _path(self, url):
+        return os.path.join(self.folder, hashlib.sha256(url.encode('utf-8')).hexdigest() + '.json')
+
+    def get(self, url):
+        """Returns the cached RenderResult for a URL, or None if absent or stale."""
+        with self._lock:
+            entry = self._entries.get(url)
+        if entry is None and self.folder:
+            try:
+                with open(self._path(url), encoding='utf-8') as cache_file:
+                    data = json.load(cache_file)
+                entry = (data['rendered_at'], RenderResult(**data['result']))
+            except (OSError, ValueError, KeyError, TypeError):
+                return None
+            with self._lock:
+                self._entries[url] = entry
+        if entry is None or time.time() - entry[0] >= self.ttl:
+            return None
+        return entry[1]
+
+    def put(self, url, result):
+        """Stores a rendered page."""
+        entry = (time.time(), result)
+        with self._lock:
+            self._entries[url] = entry
+        if self.folder:
+            path = self._path(url)
+            with open(f"{path}.tmp", 'w', encoding='utf-8') as cache_file:
+                json.dump({'rendered_at': entry[0], 'result': result._asdict()}, cache_file)
+            os.replace(f"{path}.tmp", path)
+
+
+class PlaywrightSession:
+    """A headless Chromium browser with one reusable context and tab.
+
+    Playwright's synchronous API must be used from the thread that started
+    it, so every RenderPool worker owns its own session.
+
+    Args:
+        blocked_resources (iterable): Playwright resource types that are not
+            downloaded, e.g. 'image', 'font', 'media', 'stylesheet'
+        timeout (float): Navigation timeout in seconds
+        wait_until (str): Load state to wait for before reading the DOM
+    """
+    def __init__(self, blocked_resources=DEFAULT_BLOCKED_RESOURCES, timeout=TIMEOUT * 3, wait_until='networkidle'):
+        try:
+            from playwright.sync_api import sync_playwright
+        except ImportError:
+            raise ImportError("JavaScript rendering requires the 'playwright' package "
+                              "(pip install playwright && playwright install chromium)")
+        self.blocked_resources = frozenset(blocked_resources)
+        self.timeout = timeout
+        self.wait_until = wait_until
+        self._playwright = sync_playwright().start()
+        try:
+            self._browser = self._playwright.chromium.launch()
+            self._context = self._browser.new_context()
+            if self.blocked_resources:
+                self._context.route('**/*', self._route)
+            self._page = self._context.new_page()
+        except Exception:
+            self._playwright.stop()
+            raise
+
+    def _route(self, route):
+        if route.request.resource_type in self.blocked_resources:
+            route.abort()
+        else:
+            route.continue_()
+
+    def render(self, url):
+        """Loads a URL and returns the DOM once the page has settled.
+
+        Returns:
+            RenderResult: The rendered page
+        """
+        response = self._page.goto(url, wait_until=self.wait_until, timeout=self.timeout * 1000)
+        html = self._page.content()
+        if response is None:
+            return RenderResult(self._page.url, 200, {}, html)
+        return RenderResult(self._page.url, response.status, dict(response.headers), html)
+
+    def close(self):
+        """Closes the browser and stops Playwright."""
+        try:
+            self._context.close()
+            self._browser.close()
+        finally:
+            self._playwright.stop()
+
+
+class RenderPool:
+    """Renders pages on a fixed pool of worker threads, each owning a browser session.
+
+    The number of workers caps how many pages render at once; render()
+    blocks its caller, so pages render concurrently when several threads
+    (such as the Crawler's fetch workers) call it. Sessions are started on
+    first use, so no browser is launched unless a page is actually routed to
+    the pool, and a session whose render fails is closed and replaced.
+
+    Args:
+        policy (RenderPolicy): Decides which pages are rendered
+        workers (int): Number of browser sessions rendering concurrently
+        cache (RenderCache, optional): Cache of rendered pages. Defaults to an
+            in-memory cache.
+        session_factory (callable, optional): Creates a session with render(url)
+            and close() methods. Defaults to a PlaywrightSession blocking
+            DEFAULT_BLOCKED_RESOURCES.
+        max_renders_per_session (int): Renders after which a session is closed
+            and replaced, bounding browser memory growth
+    """
+    def __init__(self, policy, workers=2, cache=None, session_factory=None, max_renders_per_session=200):
+        self.policy = policy
+        self.workers = workers
+        self.cache = cache if cache is not None else RenderCache()
+        self.session_factory = session_factory or PlaywrightSession
+        self.max_renders_per_session = max_renders_per_session
+        self._jobs = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._stats = {'renders': 0, 'cache_hits': 0, 'failures': 0, 'render_time': 0.0}
+
+    def _start(self):
+        with self._lock:
+            if self._threads:
+                return
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"render-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self):
+        session = None
+        renders = 0
+        try:
+            while True:
+                job = self._jobs.get()
+                if job is None:
+                    break
+                url, future = job
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    if session is None or renders >= self.max_renders_per_session:
+                        if session is not None:
+                            session.close()
+                            session = None
+                        session = self.session_factory()
+                        renders = 0
+                    renders += 1
+                    start = time.perf_counter()
+                    result = session.render(url)
+                    elapsed = time.perf_counter() - start
+                    with self._lock:
+                        self._stats['renders'] += 1
+                        self._stats['render_time'] += elapsed
+                    if result.status_code < 400:
+                        self.cache.put(url, result)  # error pages are rendered again next time
+                    future.set_result(result)
+                except Exception as e:
+                    # A failed render may have left the browser crashed or stuck, so start afresh
+                    if session is not None:
+                        try:
+                            session.close()
+                        except Exception:
+                            pass
+                        session = None
+                    future.set_exception(e)
+        finally:
+            if session is not None:
+                session.close()
+
+    def submit(self, url):
+        """Queues a URL for rendering.
+
+        Returns:
+            Future: Resolves to the RenderResult
+        """
+        cached = self.cache.get(url)
+        future = Future()
+        if cached is not None:
+            with self._lock:
+                self._stats['cache_hits'] += 1
+            future.set_result(cached)
+            return future
+        self._start()
+        self._jobs.put((url, future))
+        return future
+
+    def render(self, url):
+        """Renders a URL, waiting for the result.
+
+        Returns:
+            RenderResult: The rendered page, or None if rendering failed
+        """
+        try:
+            return self.submit(url).result()
+        except ImportError:
+            raise
+        except Exception as e:
+            logging.error(f"Error rendering {url}: {e}")
+            with self._lock:
+                self._stats['failures'] += 1
+            return None
+
+    def stats(self):
+        """Returns counts of renders, cache hits and failures and the average render time."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['avg_render_ms'] = stats['render_time'] / stats['renders'] * 1000 if stats['renders'] else 0.0
+        return stats
+
+    def close(self):
+        """Stops the workers and closes their browser sessions."""
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._jobs.put(None)
+        for thread in threads:
+            thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,311 @@
+"""Reports over the crawl output directories.
+
+Indexes the content files in ``output/<site>/`` in one streaming pass and
+summarizes each site: page counts, the distribution of text sizes, clusters
+of duplicate pages and the external domains linked to most. Text and JSON
+Lines files are read through memory maps, so only one page is decoded at a
+time whatever the file size, and every file is indexed in its own worker
+process. Page text is reduced to its size and a digest; nothing else is
+kept.
+
+Usage:
+    python report.py output/
+    python report.py output/example.com --json
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import multiprocessing
+import os
+import re
+import sys
+from collections import Counter
+from urllib.parse import urlparse
+
+WHITESPACE = b' \t\n\r\x0b\x0c'
+TXT_START = re.compile(rb'####### START (.+?) #######\n\n')
+SITEMAP_EXTERNAL_EDGE = re.compile(r'^\s*"[^"]*" -> "([^"]*)" \[.*style=dotted, color=blue(?:, label="(\d+)")?\];$')
+
+# Upper bounds in bytes of the text size histogram buckets
+SIZE_BUCKETS = [(1024, '< 1 KB'), (4 * 1024, '1-4 KB'), (16 * 1024, '4-16 KB'), (64 * 1024, '16-64 KB'),
+                (float('inf'), '>= 64 KB')]
+
+
+def find_output_files(paths):
+    """Finds the content and sitemap files of each site under the given paths.
+
+    Args:
+        paths (list): Site folders, or folders containing them such as output/
+
+    Returns:
+        dict: site folder -> {'content': [paths], 'sitemap': newest sitemap path or None}
+    """
+    sites = {}
+    for path in paths:
+        for folder, folder_names, file_names in os.walk(path):
+            site = sites.setdefault(folder, {'content': [], 'sitemap': None})
+            for name in sorted(folder_names):
+                if os.path.exists(os.path.join(folder, name, 'index.jsonl')):
+                    site['content'].append(os.path.join(folder, name))  # page store
+            # Page stores, WARC archives and render caches hold no site folders
+            folder_names[:] = [name for name in folder_names if '-content_' not in name and
+                               name not in ('warc', 'render-cache', 'state', 'robots-cache')]
+            sitemaps = []
+            for name in sorted(file_names):
+                file_path = os.path.join(folder, name)
+                if '-content_' in name and name.endswith(('.txt', '.jsonl')):
+                    site['content'].append(file_path)
+                elif name.endswith('.dot'):
+                    sitemaps.append(file_path)
+            if sitemaps:
+                site['sitemap'] = max(sitemaps, key=os.path.getmtime)
+    return {folder: site for folder, site in sites.items() if site['content'] or site['sitemap']}
+
+
+def content_digest(text):
+    """Returns a digest of page text that ignores case and whitespace.
+
+    Whitespace is dropped rather than collapsed, which does the same job for
+    telling duplicate pages apart at a fraction of the cost.
+
+    Args:
+        text (bytes): UTF-8 page text
+    """
+    return hashlib.blake2b(text.lower().translate(None, WHITESPACE), digest_size=16).digest()
+
+
+def _map_file(path):
+    with open(path, 'rb') as content_file:
+        if os.fstat(content_file.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(content_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def index_txt(path):
+    """Indexes a START/END delimited text file.
+
+    URLs are written upper-cased in these files, so they are lower-cased here.
+
+    Returns:
+        list: (url, text size in bytes, digest) for every complete entry
+    """
+    entries = []
+    mapped = _map_file(path)
+    if mapped is None:
+        return entries
+    with mapped:
+        position = 0
+        while True:
+            match = TXT_START.search(mapped, position)
+            if match is None:
+                break
+            end_marker = b'\n\n####### END ' + match.group(1) + b' #######\n'
+            end = mapped.find(end_marker, match.end())
+            if end < 0:
+                break  # truncated by an interrupted crawl
+            text = mapped[match.end():end]
+            entries.append((match.group(1).decode('utf-8', 'replace').lower(), len(text), content_digest(text)))
+            position = end + len(end_marker)
+    return entries
+
+
+def index_jsonl(path):
+    """Indexes a JSON Lines content file.
+
+    Returns:
+        list: (url, text size in bytes, digest) for every valid line
+    """
+    entries = []
+    mapped = _map_file(path)
+    if mapped is None:
+        return entries
+    with mapped:
+        for line in iter(mapped.readline, b''):
+            try:
+                page = json.loads(line)
+            except ValueError:
+                continue
+            text = (page.get('text') or '').encode('utf-8')
+            entries.append((page.get('url', ''), len(text), content_digest(text)))
+    return entries
+
+
+def index_store(path):
+    """Indexes a PageStore folder.
+
+    Returns:
+        list: (url, text size in bytes, digest) for every stored page
+    """
+    from pagestore import PageStore
+    with PageStore(path) as store:
+        entries = []
+        for url, text in store.items():
+            text = text.encode('utf-8')
+            entries.append((url, len(text), content_digest(text)))
+        return entries
+
+
+def count_external_domains(path):
+    """Counts external links per domain in a sitemap DOT file.
+
+    Returns:
+        Counter: domain -> number of links to it, including repeats
+    """
+    domains = Counter()
+    with open(path, encoding='utf-8', errors='replace') as sitemap_file:
+        for line in sitemap_file:
+            match = SITEMAP_EXTERNAL_EDGE.match(line)
+            if match:
+                domains[urlparse(match.group(1)).netloc.lower()] += int(match.group(2) or 1)
+    return domains
+
+
+def index_file(path):
+    """Indexes one output file; runs in a worker process.
+
+    Returns:
+        tuple: (path, result) where result is a list of page entries for
+        content files and a Counter of external domains for sitemaps
+    """
+    if path.endswith('.dot'):
+        return path, count_external_domains(path)
+    if os.path.isdir(path):
+        return path, index_store(path)
+    if path.endswith('.jsonl'):
+        return path, index_jsonl(path)
+    return path, index_txt(path)
+
+
+def _percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def summarize_site(entries, domains, top=10):
+    """Builds the statistics of one site.
+
+    Args:
+        entries (list): (url, size, digest) of every page in the site's content
+            files. A URL found more than once counts once, with its last entry.
+            URLs are matched ignoring case, as text files do not keep it.
+        domains (Counter): External links per domain
+        top (int): Number of duplicate clusters and domains to list
+
+    Returns:
+        dict: 'pages', 'total_bytes', 'sizes' (min, median, p90, p99, max and
+        mean), 'histogram' (bucket label -> pages), 'duplicate_clusters'
+        (number of clusters), 'duplicate_pages' (pages in them), 'top_clusters'
+        (lists of URLs, largest first) and 'top_domains' ((domain, links) pairs)
+    """
+    pages = {url.lower(): (url, size, digest) for url, size, digest in entries}
+    sizes = sorted(size for _, size, _ in pages.values())
+    histogram = {label: 0 for _, label in SIZE_BUCKETS}
+    for size in sizes:
+        histogram[next(label for bound, label in SIZE_BUCKETS if size < bound)] += 1
+
+    clusters = {}
+    for url, size, digest in pages.values():
+        if size:
+            clusters.setdefault(digest, []).append(url)
+    clusters = sorted((urls for urls in clusters.values() if len(urls) > 1), key=len, reverse=True)
+
+    summary = {
+        'pages': len(pages),
+        'total_bytes': sum(sizes),
+        'sizes': {'min': 0, 'median': 0, 'p90': 0, 'p99': 0, 'max': 0, 'mean': 0.0},
+        'histogram': histogram,
+        'duplicate_clusters': len(clusters),
+        'duplicate_pages': sum(map(len, clusters)),
+        'top_clusters': clusters[:top],
+        'top_domains': domains.most_common(top),
+    }
+    if sizes:
+        summary['sizes'] = {'min': sizes[0], 'median': _percentile(sizes, 0.5), 'p90': _percentile(sizes, 0.9),
+                            'p99': _percentile(sizes, 0.99), 'max': sizes[-1],
+                            'mean': summary['total_bytes'] / len(sizes)}
+    return summary
+
+
+def build_report(paths, processes=None, top=10):
+    """Indexes the output under the given paths and summarizes every site.
+
+    Args:
+        paths (list): Site folders, or folders containing them such as output/
+        processes (int, optional): Worker processes. Defaults to the CPU count;
+            1 indexes in the calling process.
+        top (int): Number of duplicate clusters and domains to list per site
+
+    Returns:
+        dict: site folder -> summary from summarize_site()
+    """
+    sites = find_output_files(paths)
+    files = [path for site in sites.values() for path in site['content'] + [site['sitemap']] if path]
+    # Largest files first, so one big file does not start last and hold up the pool
+    files.sort(key=lambda path: os.path.getsize(path) if os.path.isfile(path) else 0, reverse=True)
+    if processes == 1 or len(files) <= 1:
+        results = dict(map(index_file, files))
+    else:
+        with multiprocessing.Pool(min(processes or os.cpu_count() or 1, len(files))) as pool:
+            results = dict(pool.imap_unordered(index_file, files))
+
+    report = {}
+    for folder, site in sorted(sites.items()):
+        entries = [entry for path in site['content'] for entry in results[path]]
+        domains = results[site['sitemap']] if site['sitemap'] else Counter()
+        report[folder] = summarize_site(entries, domains, top)
+    return report
+
+
+def format_report(report):
+    """Formats a report from build_report() as text."""
+    lines = []
+    for folder, summary in report.items():
+        sizes = summary['sizes']
+        lines.append(f"{folder}")
+        lines.append(f"  Pages: {summary['pages']}  Text: {summary['total_bytes'] / 1024 / 1024:.1f} MB")
+        lines.append(f"  Text size: min {sizes['min']}  median {sizes['median']}  p90 {sizes['p90']}  "
+                     f"p99 {sizes['p99']}  max {sizes['max']}  mean {sizes['mean']:.0f} bytes")
+        lines.append("  " + "  ".join(f"{label}: {count}" for label, count in summary['histogram'].items()))
+        lines.append(f"  Duplicate clusters: {summary['duplicate_clusters']} "
+                     f"({summary['duplicate_pages']} pages)")
+        for urls in summary['top_clusters']:
+            lines.append(f"    {len(urls)} pages: {', '.join(urls[:3])}{', ...' if len(urls) > 3 else ''}")
+        if summary['top_domains']:
+            lines.append("  Top external domains:")
+            for domain, links in summary['top_domains']:
+                lines.append(f"    {links:>6}  {domain}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """Runs the report command line interface.
+
+    Args:
+        argv (list, optional): Command line arguments. Defaults to sys.argv[1:].
+    """
+    parser = argparse.ArgumentParser(description='Summarize crawl output: page counts, text sizes, duplicate '
+                                                 'pages and external domains per site.')
+    parser.add_argument('paths', metavar='PATH', nargs='*', default=['output'],
+                      help='Site output folders, or folders containing them (default: output)')
+    parser.add_argument('--processes', type=int, default=None,
+                      help='Number of worker processes (default: CPU count)')
+    parser.add_argument('--top', type=int, default=10,
+                      help='Duplicate clusters and external domains listed per site (default: 10)')
+    parser.add_argument('--json', action='store_true',
+                      help='Print the report as JSON')
+    args = parser.parse_args(argv)
+
+    report = build_report(args.paths, args.processes, args.top)
+    if not report:
+        parser.exit(1, "No crawl output found\n")
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        print(format_report(report), end="")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,231 @@
+"""Offline reprocessing of crawls archived with ``crawler.py --warc``.
+
+Runs the same parse, extract, link and sitemap pipeline as a live crawl over
+the responses stored in WARC files, without touching the network. Archives
+are indexed by record offset and split into ranges of a few hundred records,
+so even a single large archive is parsed by every worker process. Results
+come back one range at a time and are merged, in archive order, into a
+single sitemap and content output in the parent process.
+"""
+
+import argparse
+import functools
+import logging
+import multiprocessing
+import os
+import sys
+from urllib.parse import urlparse
+
+from crawler import (parse_html, extract_anchors, add_page_links, create_output_file_name, format_txt_entry,
+                     format_jsonl_entry, write_to_xlsx)
+from extractors import EXTRACTORS, get_extractor
+from pagestore import PageStore
+from sitemap import SitemapManager
+from utils import get_robots_directives, get_canonical_url
+from warc import index_warc_records, iter_warc_records, parse_http_response
+
+# Records parsed by a worker per task; each task's results are sent back as one chunk
+DEFAULT_RECORDS_PER_TASK = 200
+
+
+def _decode_body(headers, body):
+    """Decodes a response body using the charset from its Content-Type, if any."""
+    content_type = headers.get('content-type', '')
+    for param in content_type.split(';')[1:]:
+        name, _, value = param.partition('=')
+        if name.strip().lower() == 'charset':
+            try:
+                return body.decode(value.strip().strip('"'), errors='replace')
+            except LookupError:
+                break
+    return body  # let BeautifulSoup detect the encoding
+
+
+def process_archive(path, extractor_name='body', offset=0, count=None, metadata=True):
+    """Parses the HTML responses in a WARC file, or in a range of its records.
+
+    Args:
+        path (str): Path to a ``.warc`` or ``.warc.gz`` file
+        extractor_name (str): Name of the pipeline in extractors.EXTRACTORS to use
+        offset (int): Byte offset of the first record, from warc.index_warc_records()
+        count (int, optional): Number of records to read. All remaining records
+            if omitted.
+        metadata (bool): Also extract the title, description and headings
+
+    Returns:
+        list: (url, status_code, page, links) tuples in archive order, where page
+        is the dict of fields produced by the extractor plus 'robots' (the robots
+        directives), 'canonical_url' and 'follow' (whether each link may be followed)
+    """
+    extractor = get_extractor(extractor_name, metadata)
+    pages = []
+    try:
+        for warc_headers, block in iter_warc_records(path, offset, count):
+            if warc_headers.get('WARC-Type') != 'response':
+                continue
+            status_code, headers, body = parse_http_response(block)
+            if 'html' not in headers.get('content-type', 'text/html'):
+                continue
+            url = warc_headers['WARC-Target-URI']
+            soup = parse_html(_decode_body(headers, body))
+            page = extractor.extract(soup, url)
+            links, follow = extract_anchors(soup)
+            page.update(robots=get_robots_directives(soup, headers), canonical_url=get_canonical_url(soup, url),
+                        follow=follow)
+            pages.append((url, status_code, page, links))
+    except (OSError, EOFError, ValueError) as e:
+        logging.error(f"Error reading archive {path} at offset {offset}: {e}")
+    return pages
+
+
+def _process_task(task, extractor_name, metadata):
+    path, offset, count = task
+    return process_archive(path, extractor_name, offset, count, metadata)
+
+
+def split_archives(archive_paths, records_per_task=DEFAULT_RECORDS_PER_TASK):
+    """Splits archives into ranges of records that can be parsed independently.
+
+    Yields:
+        tuple: (path, offset, count) for each range, in archive order
+    """
+    for path in archive_paths:
+        try:
+            offsets = index_warc_records(path)
+        except (OSError, ValueError) as e:
+            logging.error(f"Error reading archive {path}: {e}")
+            continue
+        for start in range(0, len(offsets), records_per_task):
+            yield path, offsets[start], len(offsets[start:start + records_per_task])
+
+
+def find_archives(paths):
+    """Expands directories into the WARC files they contain, in name order."""
+    archives = []
+    for path in paths:
+        if os.path.isdir(path):
+            archives.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                            if name.endswith(('.warc', '.warc.gz')))
+        else:
+            archives.append(path)
+    return archives
+
+
+def reprocess(archive_paths, base_url=None, output_format='txt', processes=None, extractor_name='body',
+              respect_robots_meta=True, records_per_task=DEFAULT_RECORDS_PER_TASK):
+    """Rebuilds crawl output from archived responses.
+
+    Args:
+        archive_paths (list): WARC files to process, in crawl order
+        base_url (str, optional): Root URL of the crawl. Defaults to the scheme and
+            host of the first archived response.
+        output_format (str): Format to save content in ('txt', 'jsonl', 'xlsx' or 'store')
+        processes (int, optional): Number of worker processes. Defaults to the CPU count.
+        extractor_name (str): Name of the pipeline in extractors.EXTRACTORS to use
+        respect_robots_meta (bool): Honor canonical links, meta robots and X-Robots-Tag
+            as a live crawl does
+        records_per_task (int): WARC records parsed by a worker per task
+
+    Returns:
+        SitemapManager: Sitemap rebuilt from the archives, or None if they were empty
+    """
+    sitemap = None
+    page_store = None
+    output_file = None
+    seen_texts = set()
+
+    with multiprocessing.Pool(processes) as pool:
+        tasks = split_archives(archive_paths, records_per_task)
+        process_task = functools.partial(_process_task, extractor_name=extractor_name,
+                                         metadata=output_format == 'jsonl')
+        for pages in pool.imap(process_task, tasks):
+            for url, status_code, page, links in pages:
+                text = page['text']
+                directives = page.pop('robots')
+                canonical_url = page.pop('canonical_url')
+                follow = page.pop('follow')
+                if sitemap is None:
+                    if base_url is None:
+                        parsed = urlparse(url)
+                        base_url = f"{parsed.scheme}://{parsed.netloc}/"
+                    sitemap = SitemapManager(base_url, autosave=False)
+                    os.makedirs(sitemap.output_folder, exist_ok=True)
+                    output_file_path = os.path.join(sitemap.output_folder,
+                                                    create_output_file_name(base_url, output_format))
+                    if output_format == 'store':
+                        page_store = PageStore(output_file_path)
+                    elif output_format in ('txt', 'jsonl'):
+                        output_file = open(output_file_path, 'w', encoding='utf-8')
+
+                if not url.startswith(base_url) or sitemap.is_known(url):
+                    continue
+                sitemap.mark_visited(url)
+                if not respect_robots_meta:
+                    directives, follow = set(), None
+                elif canonical_url and canonical_url != url and canonical_url.startswith(base_url):
+                    if sitemap.is_known(canonical_url):
+                        continue
+                    sitemap.add_canonical_url(canonical_url)
+                if 'nofollow' in directives:
+                    follow = [False] * len(links)
+                if 'noindex' in directives:
+                    add_page_links(sitemap, url, links, follow=follow)
+                    continue
+                if text in seen_texts:
+                    continue
+                seen_texts.add(text)
+                sitemap.page_contents[url] = text
+
+                if page_store is not None:
+                    page_store.put(url, text)
+                elif output_format == 'jsonl':
+                    output_file.write(format_jsonl_entry(page))
+                elif output_file is not None:
+                    output_file.write(format_txt_entry(url, text))
+                add_page_links(sitemap, url, links, follow=follow)
+
+    if sitemap is None:
+        return None
+
+    if output_format == 'xlsx':
+        write_to_xlsx(output_file_path, sitemap.page_contents)
+    if page_store is not None:
+        page_store.close()
+    if output_file is not None:
+        output_file.close()
+
+    sitemap.unvisited_urls = [url for url in sitemap.unvisited_urls if url not in sitemap.visited_urls]
+    sitemap.queued_urls = set(sitemap.unvisited_urls)
+    sitemap.unmapped_count = len(sitemap.unvisited_urls)
+    sitemap.update_sitemap_file()
+    return sitemap
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Rebuild crawl output from WARC archives without fetching.')
+    parser.add_argument('archives', metavar='ARCHIVE', nargs='+',
+                      help='WARC files, or directories containing them')
+    parser.add_argument('--base-url', type=str, default=None,
+                      help='Root URL of the crawl (default: host of the first archived page)')
+    parser.add_argument('--output-format', type=str, choices=['txt', 'jsonl', 'xlsx', 'store'], default='txt',
+                      help='Save content as text files, JSON Lines with structured fields, Excel spreadsheet '
+                           'or a compressed page store (default: txt)')
+    parser.add_argument('--extractor', type=str, choices=sorted(EXTRACTORS), default='body',
+                      help='Text extraction pipeline to apply (default: body)')
+    parser.add_argument('--processes', type=int, default=None,
+                      help='Number of worker processes (default: CPU count)')
+    parser.add_argument('--ignore-robots-meta', action='store_true',
+                      help='Ignore canonical links, meta robots tags and X-Robots-Tag headers')
+    args = parser.parse_args()
+
+    archive_paths = find_archives(args.archives)
+    if not archive_paths:
+        parser.exit(1, "No WARC files found\n")
+
+    sitemap = reprocess(archive_paths, args.base_url, args.output_format, args.processes, args.extractor,
+                        not args.ignore_robots_meta)
+    if sitemap is None:
+        print("No HTML responses found in the archives.")
+        sys.exit(1)
+    print(f"Mapped pages: {sitemap.mapped_count}")
+    print(f"Unmapped pages: {sitemap.unmapped_count}")
@@ -0,0 +1,148 @@
+"""Shared robots.txt cache, in memory and on disk.
+
+Parsed robots.txt rules are kept per origin (scheme and host) and reused
+for 24 hours, the longest RFC 9309 lets a crawler cache them. They are
+also written to disk, so repeated crawls of a site start without fetching
+robots.txt again. Files are fetched the first time a host is needed, and
+prefetch() starts the fetch in the background so that several hosts load
+at once; the Crawler prefetches each origin when its first link is queued.
+Concurrent requests for the same host wait for a single fetch.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from utils import RobotsParser
+
+DEFAULT_CACHE_FOLDER = "output/robots-cache"
+
+# RFC 9309 section 2.4: crawlers should not use a cached robots.txt for more than 24 hours
+MAX_TTL = 24 * 60 * 60
+
+
+class RobotsCache:
+    """Caches robots.txt rules per origin across hosts and runs.
+
+    Server and network errors are only cached in memory for the current run,
+    so the next run tries the host again.
+
+    Args:
+        folder (str, optional): Directory holding one JSON file per origin.
+            Only the in-memory cache is used if omitted.
+        ttl (float): Seconds for which fetched rules are reused, at most MAX_TTL
+        max_workers (int): Maximum robots.txt files fetched at once
+        clock (callable): Returns the current time in seconds
+    """
+    def __init__(self, folder=None, ttl=MAX_TTL, max_workers=4, clock=time.time):
+        self.folder = folder
+        self.ttl = min(ttl, MAX_TTL)
+        self.clock = clock
+        self.fetches = 0
+        self._entries = {}  # origin -> (fetched_at, RobotsParser)
+        self._pending = {}  # origin -> Future of a fetch in progress
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='robots')
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+    @staticmethod
+    def origin(url):
+        """Returns the scheme://host part of a URL that robots.txt applies to."""
+        parsed = urlparse(url)
+        return f"{parsed.scheme}://{parsed.netloc.lower()}"
+
+    def _path(self, origin):
+        return os.path.join(self.folder, hashlib.sha256(origin.encode('utf-8')).hexdigest() + '.json')
+
+    def _fresh(self, entry):
+        return entry is not None and self.clock() - entry[0] < self.ttl
+
+    def _load(self, origin):
+        try:
+            with open(self._path(origin), encoding='utf-8') as cache_file:
+                data = json.load(cache_file)
+            return data['fetched_at'], RobotsParser.from_dict(data['parser'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _save(self, origin, entry):
+        path = self._path(origin)
+        try:
+            with open(f"{path}.tmp", 'w', encoding='utf-8') as cache_file:
+                json.dump({'fetched_at': entry[0], 'parser': entry[1].to_dict()}, cache_file)
+            os.replace(f"{path}.tmp", path)
+        except OSError as e:
+            logging.warning(f"Could not cache robots.txt for {origin}: {e}")
+
+    def _fetch(self, origin):
+        parser = RobotsParser(origin, fetch=False)
+        definitive = parser.fetch_and_parse()
+        entry = (self.clock(), parser)
+        if definitive and self.folder:
+            self._save(origin, entry)
+        return entry
+
+    def _run_fetch(self, origin, future):
+        try:
+            entry = self._fetch(origin)
+        except BaseException as e:
+            with self._lock:
+                del self._pending[origin]
+            future.set_exception(e)
+            return
+        with self._lock:
+            self._entries[origin] = entry
+            del self._pending[origin]
+        future.set_result(entry[1])
+
+    def _lookup(self, url, background):
+        """Returns the cached parser or the Future of its fetch, starting one if needed."""
+        origin = self.origin(url)
+        with self._lock:
+            entry = self._entries.get(origin)
+            if self._fresh(entry):
+                return entry[1]
+            future = self._pending.get(origin)
+            if future is not None:
+                return future
+        entry = self._load(origin) if self.folder else None
+        with self._lock:
+            if self._fresh(entry):
+                self._entries[origin] = entry
+                return entry[1]
+            future = self._pending.get(origin)
+            if future is not None:
+                return future
+            future = self._pending[origin] = Future()
+            self.fetches += 1
+        if background:
+            self._executor.submit(self._run_fetch, origin, future)
+        else:
+            self._run_fetch(origin, future)
+        return future
+
+    def prefetch(self, url):
+        """Starts fetching robots.txt for a URL's origin in the background."""
+        self._lookup(url, background=True)
+
+    def get(self, url):
+        """Returns the RobotsParser for a URL's origin, fetching it if needed.
+
+        Waits if the origin is being fetched by another caller.
+        """
+        result = self._lookup(url, background=False)
+        return result.result() if isinstance(result, Future) else result
+
+    def is_allowed(self, url):
+        """Checks a URL against the rules of its own origin."""
+        return self.get(url).is_allowed(url)
+
+    def close(self):
+        """Stops the background fetch threads."""
+        self._executor.shutdown(wait=True)
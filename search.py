@@ -0,0 +1,180 @@
+"""Full-text search over crawled pages with SQLite FTS5.
+
+A SearchIndex is filled page by page while the crawl runs, through the
+SearchSink in crawler.py, so the site can be queried as soon as the crawl
+ends. Writes are grouped into transactions of batch_size pages, which is
+what makes indexing fast: committing every page would sync the database
+file once per page. Pages are keyed by URL, so crawling a site again
+replaces its pages instead of duplicating them. Queries from the command
+line open the index read-only.
+
+Usage:
+    python search.py output/example.com/search.sqlite "pricing plans"
+    python search.py output/example.com/search.sqlite 'crawl* NOT robots' --raw
+"""
+
+import os
+import sqlite3
+from urllib.parse import quote
+
+DEFAULT_BATCH_SIZE = 500
+
+# Pages of index b-tree rewritten by the incremental merge run when a writer closes
+MERGE_PAGES = 500
+
+
+class SearchIndex:
+    """An FTS5 index of page titles and text.
+
+    Args:
+        path (str): SQLite database file. Created if missing and reopened
+            for appending otherwise.
+        batch_size (int): Pages written per transaction
+        read_only (bool): Open an existing index for searching only, leaving
+            the file and its journal mode untouched
+    """
+    def __init__(self, path, batch_size=DEFAULT_BATCH_SIZE, read_only=False):
+        self.path = path
+        self.batch_size = batch_size
+        self.read_only = read_only
+        self._pending = 0
+        self._modified = False
+        if read_only:
+            self._connection = sqlite3.connect(f"file:{quote(os.path.abspath(path))}?mode=ro", uri=True)
+            return
+        self._connection = sqlite3.connect(path)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        try:
+            with self._connection:
+                self._connection.execute("CREATE TABLE IF NOT EXISTS documents "
+                                         "(id INTEGER PRIMARY KEY, url TEXT UNIQUE NOT NULL)")
+                self._connection.execute("CREATE VIRTUAL TABLE IF NOT EXISTS pages USING fts5"
+                                         "(title, text, tokenize='porter unicode61 remove_diacritics 2')")
+        except sqlite3.OperationalError as e:
+            self._connection.close()
+            if 'fts5' in str(e):
+                raise RuntimeError("Full-text search requires SQLite built with the FTS5 extension")
+            raise
+
+    def add(self, url, text, title=None):
+        """Indexes a page, replacing any earlier version of the same URL.
+
+        The page becomes searchable once its batch is committed, at the latest
+        when flush() or close() is called.
+        """
+        connection = self._connection
+        row = connection.execute("SELECT id FROM documents WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            document_id = connection.execute("INSERT INTO documents (url) VALUES (?)", (url,)).lastrowid
+        else:
+            document_id = row[0]
+            connection.execute("DELETE FROM pages WHERE rowid = ?", (document_id,))
+        connection.execute("INSERT INTO pages (rowid, title, text) VALUES (?, ?, ?)",
+                           (document_id, title or '', text))
+        self._pending += 1
+        self._modified = True
+        if self._pending >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Commits the pages added since the last commit."""
+        self._connection.commit()
+        self._pending = 0
+
+    def search(self, query, limit=10, raw=False):
+        """Finds the pages matching a query, best match first.
+
+        Args:
+            query (str): Words that must all appear in the page. With raw, an
+                FTS5 query that may use OR, NOT, NEAR, "phrases" and prefix*
+            limit (int): Maximum number of results
+            raw (bool): Pass the query to FTS5 unchanged
+
+        Returns:
+            list: (url, title, snippet, score) tuples, where a lower score is a
+            better match and matched words in the snippet are wrapped in [ ]
+        """
+        if not raw:
+            query = ' '.join('"' + term.replace('"', '""') + '"' for term in query.split())
+        if not query:
+            return []
+        return self._connection.execute(
+            "SELECT documents.url, pages.title, snippet(pages, 1, '[', ']', '...', 16), bm25(pages, 5.0, 1.0) "
+            "FROM pages JOIN documents ON documents.id = pages.rowid "
+            "WHERE pages MATCH ? ORDER BY bm25(pages, 5.0, 1.0) LIMIT ?", (query, limit)).fetchall()
+
+    def __len__(self):
+        return self._connection.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def optimize(self):
+        """Merges the whole index into a single b-tree for the fastest queries.
+
+        This rewrites the entire index, so it is left to be run on demand,
+        e.g. with search.py --optimize, rather than after every crawl.
+        """
+        self.flush()
+        with self._connection:
+            self._connection.execute("INSERT INTO pages (pages) VALUES ('optimize')")
+        self._modified = False
+
+    def close(self):
+        """Commits pending pages, merges some index segments and closes the database."""
+        if not self.read_only:
+            self.flush()
+        if self._modified:
+            with self._connection:
+                # A bounded merge of the b-trees written by each batch keeps queries fast without
+                # rewriting the whole index
+                self._connection.execute("INSERT INTO pages (pages, rank) VALUES ('merge', ?)", (MERGE_PAGES,))
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def main(argv=None):
+    """Runs the search command line interface.
+
+    Args:
+        argv (list, optional): Command line arguments. Defaults to sys.argv[1:].
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Search pages indexed with crawler.py --search-index.')
+    parser.add_argument('index', metavar='INDEX', type=str,
+                      help='Search index file, e.g. output/example.com/search.sqlite')
+    parser.add_argument('query', metavar='QUERY', type=str,
+                      help='Words that must all appear in a page')
+    parser.add_argument('--limit', type=int, default=10,
+                      help='Maximum number of results (default: 10)')
+    parser.add_argument('--raw', action='store_true',
+                      help='Treat QUERY as FTS5 query syntax (OR, NOT, NEAR, "phrases", prefix*)')
+    parser.add_argument('--optimize', action='store_true',
+                      help='Merge the index into one b-tree before searching. Rewrites the whole index')
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.index):
+        parser.exit(1, f"{args.index} does not exist\n")
+    if args.optimize:
+        with SearchIndex(args.index) as index:
+            index.optimize()
+    with SearchIndex(args.index, read_only=True) as index:
+        try:
+            results = index.search(args.query, args.limit, args.raw)
+        except sqlite3.OperationalError as e:
+            parser.exit(1, f"Invalid query: {e}\n")
+    if not results:
+        print("No matching pages.")
+    for url, title, snippet, _ in results:
+        print(url)
+        if title:
+            print(f"  {title}")
+        print(f"  {snippet}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,85 @@
 """Manages website crawl state and generates visual sitemaps."""
 
+import io
 import logging
 import os
 from urllib.parse import urlparse, urljoin
 
+
+class EdgeIndex:
+    """Deduplicated directed links between URLs, with a count per link.
+    
+    URLs are numbered in first-seen order and each distinct (source, target)
+    pair is stored once, so memory and the cost of rendering or exporting
+    the graph grow with unique links rather than link occurrences. A link
+    repeated within one page, such as a logo and a menu item both pointing
+    home, is one edge whose count is the number of times it was seen. The
+    same link on different pages, such as a footer link, is one edge per
+    page that contains it.
+    
+    Iterating yields (source, target) URL pairs in first-seen order. Edges
+    and URLs are only ever appended, so another thread may iterate while
+    links are being added.
+    """
+    def __init__(self):
+        self.url_ids = {}
+        self.urls = []
+        self.counts = {}  # (source_id, target_id) -> occurrences
+        self.adjacency = {}  # source_id -> [target_id, ...]
+        self._edges = []  # (source_id, target_id) in first-seen order
+
+    def url_id(self, url):
+        """Returns the integer id of a URL, numbering it if it is new."""
+        url_id = self.url_ids.get(url)
+        if url_id is None:
+            url_id = self.url_ids[url] = len(self.urls)
+            self.urls.append(url)
+        return url_id
+
+    def add(self, source, target):
+        """Records one occurrence of a link.
+        
+        Returns:
+            bool: True if the link had not been seen before
+        """
+        edge = (self.url_id(source), self.url_id(target))
+        count = self.counts.get(edge)
+        self.counts[edge] = 1 if count is None else count + 1
+        if count is None:
+            self.adjacency.setdefault(edge[0], []).append(edge[1])
+            self._edges.append(edge)
+        return count is None
+
+    def count(self, source, target):
+        """Returns how many times a link was seen."""
+        return self.counts.get((self.url_ids.get(source), self.url_ids.get(target)), 0)
+
+    def targets(self, source):
+        """Returns the distinct URLs a page links to, in first-seen order."""
+        urls = self.urls
+        return [urls[target] for target in self.adjacency.get(self.url_ids.get(source), ())]
+
+    def id_pairs(self):
+        """Returns the distinct links as (source_id, target_id) pairs."""
+        return self._edges[:]
+
+    def items(self):
+        """Yields (source, target, count) for every distinct link."""
+        urls, counts = self.urls, self.counts
+        for edge in self._edges[:]:
+            yield urls[edge[0]], urls[edge[1]], counts[edge]
+
+    def __iter__(self):
+        urls = self.urls
+        return ((urls[source], urls[target]) for source, target in self._edges[:])
+
+    def __len__(self):
+        return len(self._edges)
+
+    def __contains__(self, edge):
+        return (self.url_ids.get(edge[0]), self.url_ids.get(edge[1])) in self.counts
+
+
 class SitemapManager:
     """Manages the state of a website crawl and generates visual sitemaps.
     
@@ -13,16 +89,27 @@ class SitemapManager:
     Args:
         base_url (str, optional): The starting URL for the crawl. Used to create
             the output directory structure.
+        autosave (bool): Rewrite the sitemap file whenever a page is visited.
+            Batch jobs disable this and call update_sitemap_file once at the end.
+            The output folder is created up front only with autosave, and
+            otherwise when the sitemap file is first written.
+        writer (BackgroundWriter, optional): Writer that performs sitemap rewrites
+            off the crawl thread. Rewrites are synchronous if omitted.
     """
-    def __init__(self, base_url=None):
+    def __init__(self, base_url=None, autosave=True, writer=None):
         self.visited_urls = set()
         self.unvisited_urls = []
+        self.queued_urls = set()  # the URLs in unvisited_urls, for constant-time membership checks
         self.external_links = set()
         self.mapped_count = 0
         self.unmapped_count = 0
         self.page_contents = {}
         self.parent_urls = {}
-        self.external_edges = []  # store (source, external_target)
+        self.external_edges = EdgeIndex()  # (source, external_target) links
+        self.internal_edges = EdgeIndex()  # (source, internal_target) links
+        self.canonical_urls = set()  # canonical URLs already fetched under another URL
+        self.autosave = autosave
+        self.writer = writer
         if base_url:
             parsed = urlparse(base_url)
             domain = parsed.netloc
@@ -32,7 +119,8 @@ class SitemapManager:
             self.output_folder = f"output/{domain}-{path}" if path else f"output/{domain}"
         else:
             self.output_folder = "output"
-        os.makedirs(self.output_folder, exist_ok=True)
+        if autosave:
+            os.makedirs(self.output_folder, exist_ok=True)
 
         
     def add_url(self, base_url, link_url):
@@ -44,8 +132,10 @@ class SitemapManager:
         """
         absolute_url = urljoin(base_url, link_url)
         is_external = self.is_external(base_url, absolute_url)
-        if absolute_url != base_url and absolute_url not in self.visited_urls and absolute_url not in self.unvisited_urls:
+        if absolute_url != base_url and absolute_url not in self.visited_urls and absolute_url not in self.canonical_urls \
+                and absolute_url not in self.queued_urls:
             self.unvisited_urls.append(absolute_url)
+            self.queued_urls.add(absolute_url)
             self.unmapped_count += 1
             self.parent_urls[absolute_url] = {'parent': base_url, 'is_external': is_external}
 
@@ -58,7 +148,59 @@ class SitemapManager:
         """
         self.visited_urls.add(url)
         self.mapped_count += 1
-        self.update_sitemap_file()
+        if self.autosave:
+            self.update_sitemap_file()
+
+    def add_canonical_url(self, canonical_url):
+        """Records a canonical URL whose content was fetched under another URL.
+        
+        The canonical URL is then treated as already seen, so it is neither
+        queued nor fetched again.
+        
+        Args:
+            canonical_url (str): The URL from the page's <link rel="canonical">
+        """
+        self.canonical_urls.add(canonical_url)
+
+    def is_known(self, url):
+        """Checks whether a URL was visited or fetched under another URL.
+        
+        Args:
+            url (str): The URL to check
+            
+        Returns:
+            bool: True if the URL's content has already been fetched
+        """
+        return url in self.visited_urls or url in self.canonical_urls
+
+    def spill_to_disk(self, folder):
+        """Moves the crawl state from memory into SQLite files.
+        
+        Page text, parent links, the visited, queued and canonical URLs and
+        both edge indexes become disk-backed structures in folder, so they
+        stop growing in memory as the crawl goes on. Used by MemoryLimit.
+        
+        Args:
+            folder (str): Directory for the SQLite files
+            
+        Returns:
+            list: The SQLiteStores created, to be removed when the crawl ends
+        """
+        from memory import DiskDict, DiskEdgeIndex, DiskList, DiskSet, SQLiteStore
+        os.makedirs(folder, exist_ok=True)
+        stores = []
+        for name, store_class in (('page_contents', DiskDict), ('parent_urls', DiskDict),
+                                  ('visited_urls', DiskSet), ('canonical_urls', DiskSet),
+                                  ('unvisited_urls', DiskList), ('queued_urls', DiskSet),
+                                  ('internal_edges', DiskEdgeIndex),
+                                  ('external_edges', DiskEdgeIndex)):
+            value = getattr(self, name)
+            if not isinstance(value, SQLiteStore):
+                store = store_class(os.path.join(folder, f'{name}.sqlite'),
+                                    value.items() if isinstance(value, dict) else value)
+                setattr(self, name, store)
+                stores.append(store)
+        return stores
 
     def log_external_link(self, url):
         pass
@@ -88,7 +230,9 @@ class SitemapManager:
             str: The next URL to crawl, or None if queue is empty
         """
         if self.unvisited_urls:
-            return self.unvisited_urls.pop()
+            url = self.unvisited_urls.pop()
+            self.queued_urls.discard(url)
+            return url
         return None
 
         
@@ -123,65 +267,100 @@ class SitemapManager:
             filename = f"{domain}-sitemap_{current_date}.dot"
             
         filepath = os.path.join(self.output_folder, filename)
+        os.makedirs(self.output_folder, exist_ok=True)
+        if self.writer is not None:
+            self.writer.replace(filepath, self.render_sitemap)
+            return
         try:
             with open(filepath, "w") as f:
-                # Write header and graph attributes
-                f.write("/* Generated Site Map */\n")
-                f.write("digraph SiteMap {\n")
-                f.write("    /* General Graph Attributes */\n")
-                f.write("    graph [layout=neato, overlap=false, splines=true];\n")
-                f.write('    node [shape=circle, fontname="Arial", fontsize=12, style=filled, fillcolor=lightgray];\n')
-                f.write("    edge [fontname=\"Arial\", fontsize=10, fillcolor=orange];\n\n")
-
-                # Declare all nodes with clickable URLs
-                f.write("    /* Declare unique nodes with clickable links */\n")
-                f.write("    {\n")
-                for url in self.visited_urls:
-                    f.write(f'        "{url}" [URL="{url}"];\n')
-                f.write("    }\n\n")
-
-                # Write hierarchical structure
-                f.write("    /* Hierarchical Structure */\n")
-                for url in self.visited_urls:
-                    if url in self.parent_urls:
-                        parent_url = self.parent_urls[url]['parent']
-                        is_external = self.parent_urls[url]['is_external']
-                        if is_external:
-                            f.write(f'    "{parent_url}" -> "{url}" [color=blue];\n')
-                            f.write(f'    "{url}" [shape=box, fillcolor=gold];\n')
-                        else:
-                            f.write(f'    "{parent_url}" -> "{url}";\n')
-                    else:
-                        f.write(f'    "{url}" [fillcolor=lightblue];\n')
-
-                # Write cross-links
-                f.write("\n    /* Cross-Links to Show Page Interconnections */\n")
-                f.write("    edge [color=red, style=dashed];\n")
-                processed_urls = set()
-                for url in self.visited_urls:
-                    for other_url in self.visited_urls:
-                        if url != other_url and (url, other_url) not in processed_urls and (other_url, url) not in processed_urls:
-                            if url not in self.parent_urls and other_url not in self.parent_urls:
-                                f.write(f'    "{url}" -> "{other_url}";\n')
-                                processed_urls.add((url, other_url))
-
-                # Write external edges
-                f.write("\n    /* External Links */\n")
-                f.write("    node [fillcolor=gold];\n")
-                for (source, target) in self.external_edges:
-                    f.write(f'    "{source}" -> "{target}" [URL="{target}", style=dotted, color=blue];\n')
-
-                f.write("}\n")
+                f.write(self.render_sitemap())
         except Exception as e:
             logging.error(f"Error updating sitemap file: {e}")
 
         
+    def render_sitemap(self):
+        """Renders the current state of the crawl as a GraphViz DOT document.
+        
+        Works on snapshots of the crawl state, so it can safely run on the
+        background writer thread while the crawl keeps adding pages.
+        
+        Returns:
+            str: The DOT source of the sitemap
+        """
+        visited_urls = list(self.visited_urls)
+        parent_urls = dict(self.parent_urls.items())
+        external_edges = list(self.external_edges.items())
+
+        f = io.StringIO()
+        # Write header and graph attributes
+        f.write("/* Generated Site Map */\n")
+        f.write("digraph SiteMap {\n")
+        f.write("    /* General Graph Attributes */\n")
+        f.write("    graph [layout=neato, overlap=false, splines=true];\n")
+        f.write('    node [shape=circle, fontname="Arial", fontsize=12, style=filled, fillcolor=lightgray];\n')
+        f.write("    edge [fontname=\"Arial\", fontsize=10, fillcolor=orange];\n\n")
+
+        # Declare all nodes with clickable URLs
+        f.write("    /* Declare unique nodes with clickable links */\n")
+        f.write("    {\n")
+        for url in visited_urls:
+            f.write(f'        "{url}" [URL="{url}"];\n')
+        f.write("    }\n\n")
+
+        # Write hierarchical structure
+        f.write("    /* Hierarchical Structure */\n")
+        for url in visited_urls:
+            if url in parent_urls:
+                parent_url = parent_urls[url]['parent']
+                is_external = parent_urls[url]['is_external']
+                if is_external:
+                    f.write(f'    "{parent_url}" -> "{url}" [color=blue];\n')
+                    f.write(f'    "{url}" [shape=box, fillcolor=gold];\n')
+                else:
+                    f.write(f'    "{parent_url}" -> "{url}";\n')
+            else:
+                f.write(f'    "{url}" [fillcolor=lightblue];\n')
+
+        # Write cross-links, joining each page without a parent to the first such page
+        f.write("\n    /* Cross-Links to Show Page Interconnections */\n")
+        f.write("    edge [color=red, style=dashed];\n")
+        root_urls = [url for url in visited_urls if url not in parent_urls]
+        for url in root_urls[1:]:
+            f.write(f'    "{root_urls[0]}" -> "{url}";\n')
+
+        # Write external edges
+        f.write("\n    /* External Links */\n")
+        f.write("    node [fillcolor=gold];\n")
+        for (source, target, count) in external_edges:
+            label = f', label="{count}"' if count > 1 else ''
+            f.write(f'    "{source}" -> "{target}" [URL="{target}", style=dotted, color=blue{label}];\n')
+
+        f.write("}\n")
+        return f.getvalue()
+
+        
+    def add_internal_edge(self, parent_url, internal_url):
+        """Records an internal link found during crawling.
+        
+        Unlike parent_urls, which keeps only the page a URL was first found on,
+        every distinct internal link is recorded so the full link graph can be
+        exported. Repeated links only increase the edge's count.
+        
+        Args:
+            parent_url (str): The page where the link was found
+            internal_url (str): The internal URL that was linked to
+        """
+        self.internal_edges.add(parent_url, internal_url)
+
+        
     def add_external_edge(self, parent_url, external_url):
         """Records an external link found during crawling.
         
+        Repeated links only increase the edge's count. The sitemap file is not
+        rewritten here; it picks the edge up on the next page visit.
+        
         Args:
             parent_url (str): The internal page where the external link was found
             external_url (str): The external URL that was linked to
         """
-        self.external_edges.append((parent_url, external_url))
-        self.update_sitemap_file()
+        self.external_edges.add(parent_url, external_url)
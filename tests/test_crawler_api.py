@@ -0,0 +1,139 @@
+"""Test cases for the Crawler library API."""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+from crawler import Crawler, FetchError, JsonlSink
+from limits import CrawlBudget
+
+PAGES = {
+    "https://example.com": "<html><body><h1>Home</h1><a href='/a'>A</a><a href='/b'>B</a></body></html>",
+    "https://example.com/a": "<html><body><h1>Page A</h1><a href='/a/deep'>Deep</a></body></html>",
+    "https://example.com/a/deep": "<html><body><h1>Deep page</h1></body></html>",
+    "https://example.com/b": "<html><body><h1>Page B</h1></body></html>",
+}
+
+
+class TestCrawlerApi(unittest.TestCase):
+    """Test suite for iterating over pages and hooks."""
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.robots_parser = Mock()
+        self.robots_parser.is_allowed.return_value = True
+        patcher = patch('crawler.fetch_page', side_effect=lambda url: PAGES.get(url))
+        self.fetch = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def make_crawler(self, **kwargs):
+        kwargs.setdefault('delay', 0)
+        return Crawler("https://example.com", robots_parser=self.robots_parser, **kwargs)
+
+    def test_iter_pages(self):
+        """Pages are yielded with their status, text and links."""
+        pages = list(self.make_crawler().iter_pages())
+        self.assertEqual([page.url for page in pages],
+                         ["https://example.com", "https://example.com/b", "https://example.com/a",
+                          "https://example.com/a/deep"])
+        url, status, text, links = pages[0]
+        self.assertEqual((status, text, links), (200, "Home A B", ['/a', '/b']))
+
+    def test_iter_pages_is_lazy(self):
+        """Nothing beyond the consumed pages is fetched."""
+        iterator = self.make_crawler().iter_pages()
+        next(iterator)
+        self.assertEqual(self.fetch.call_count, 1)
+        iterator.close()
+
+    def test_depth_is_tracked_per_link(self):
+        """Depth counts links from the start URL, not pages crawled."""
+        crawler = self.make_crawler(depth=1)
+        urls = [page.url for page in crawler.iter_pages()]
+        self.assertNotIn("https://example.com/a/deep", urls)
+        self.assertIn("https://example.com/b", urls)
+        self.assertEqual(crawler.depths["https://example.com/a/deep"], 2)
+
+    def test_hooks_and_sinks(self):
+        """Kept pages reach on_page and every sink; failures reach on_error."""
+        pages = dict(PAGES)
+        pages["https://example.com/b"] = None
+        self.fetch.side_effect = lambda url: pages.get(url)
+        seen, errors = [], []
+        path = os.path.join(self.folder, "pages.jsonl")
+        with self.make_crawler(sinks=[JsonlSink(path)], on_page=seen.append,
+                               on_error=lambda url, error: errors.append((url, error))) as crawler:
+            sitemap = crawler.run()
+
+        self.assertEqual(len(seen), 3)
+        self.assertEqual([url for url, _ in errors], ["https://example.com/b"])
+        self.assertIsInstance(errors[0][1], FetchError)
+        with open(path) as jsonl_file:
+            self.assertEqual([json.loads(line)['url'] for line in jsonl_file], [page.url for page in seen])
+        self.assertEqual(len(sitemap.visited_urls), 4)
+
+    def test_processing_errors(self):
+        """Processing errors are reported to on_error and the crawl continues."""
+        extractor = Mock()
+        extractor.extract.side_effect = lambda soup, url: {'url': url, 'text': url} if url != \
+            "https://example.com/a" else 1 / 0
+        errors = []
+        pages = list(self.make_crawler(extractor=extractor, on_error=lambda url, error: errors.append(error))
+                     .iter_pages())
+        self.assertEqual(len(pages), 2)
+        self.assertIsInstance(errors[0], ZeroDivisionError)
+
+    def test_concurrent_fetching(self):
+        """With several fetch workers every page is still crawled once."""
+        crawler = self.make_crawler(fetch_workers=4)
+        urls = [page.url for page in crawler.iter_pages()]
+        self.assertEqual(sorted(urls), sorted(PAGES))
+        self.assertEqual(self.fetch.call_count, len(PAGES))
+        self.assertEqual(crawler.depths["https://example.com/a/deep"], 2)
+
+    def test_byte_budget_stops_crawl(self):
+        """No new fetches start once the byte budget is used up."""
+        def fetch(url, budget):
+            budget.charge(len(PAGES[url]))
+            return PAGES[url]
+        self.fetch.side_effect = fetch
+        crawler = self.make_crawler(budget=CrawlBudget(max_bytes=50))
+        pages = list(crawler.iter_pages())
+        self.assertEqual(len(pages), 1)
+        self.assertIn("byte budget", crawler.stop_reason)
+
+    def test_timeout_passed_to_fetch(self):
+        """A configured timeout is passed to fetch_page."""
+        self.fetch.side_effect = lambda url, timeout: PAGES.get(url)
+        list(self.make_crawler(timeout=(1, 5), max_pages=1).iter_pages())
+        self.fetch.assert_called_once_with("https://example.com", timeout=(1, 5))
+
+    def test_no_output_folder_without_writers(self):
+        """A Crawler without sinks or sitemap writing creates no output folder."""
+        cwd = os.getcwd()
+        os.chdir(self.folder)
+        self.addCleanup(os.chdir, cwd)
+        list(self.make_crawler(max_pages=1).iter_pages())
+        self.assertFalse(os.path.exists(os.path.join(self.folder, 'output')))
+
+    def test_close_releases_owned_resources(self):
+        """close() shuts down the robots cache and default backend the Crawler created."""
+        import crawler as crawler_module
+        backend = Mock()
+        with patch.object(crawler_module, '_default_backend', backend), \
+                patch.object(crawler_module, '_default_backend_users', 0):
+            crawler = Crawler("https://example.com", delay=0)
+            crawler.close()
+            crawler.close()
+            self.assertTrue(crawler.robots_cache._executor._shutdown)
+            backend.close.assert_called_once_with()
+            self.assertIsNone(crawler_module._default_backend)
+
+if __name__ == '__main__':
+    unittest.main()
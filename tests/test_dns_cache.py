@@ -0,0 +1,114 @@
+"""Test cases for the caching DNS resolver."""
+
+import socket
+import threading
+import unittest
+from unittest.mock import Mock, patch
+
+import dns_cache
+from crawler import add_page_links
+from dns_cache import DNSCache
+from sitemap import SitemapManager
+
+class StubResolver:
+    """Resolver that answers from a fixed table and counts lookups."""
+
+    def __init__(self, answers, ttl=None, delay=None):
+        self.answers = answers
+        self.ttl = ttl
+        self.delay = delay
+        self.calls = []
+
+    def __call__(self, host):
+        self.calls.append(host)
+        if self.delay is not None:
+            self.delay.wait()
+        if host not in self.answers:
+            raise socket.gaierror(socket.EAI_NONAME, host)
+        return self.answers[host], self.ttl
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestDNSCache(unittest.TestCase):
+    """Test suite for caching, TTL expiry, prefetching and getaddrinfo."""
+
+    def setUp(self):
+        self.resolver = StubResolver({'example.test': ['192.0.2.1'], 'v6.test': ['2001:db8::1']}, ttl=60)
+        self.clock = FakeClock()
+        self.cache = DNSCache(self.resolver, clock=self.clock)
+
+    def tearDown(self):
+        self.cache.uninstall()
+
+    def test_answers_are_cached_until_ttl_expires(self):
+        self.assertEqual(self.cache.resolve('example.test'), ['192.0.2.1'])
+        self.assertEqual(self.cache.resolve('EXAMPLE.test'), ['192.0.2.1'])
+        self.assertEqual(len(self.resolver.calls), 1)
+
+        self.clock.now = 61
+        self.cache.resolve('example.test')
+        self.assertEqual(len(self.resolver.calls), 2)
+
+        stats = self.cache.stats()
+        self.assertEqual((stats['lookups'], stats['hits'], stats['misses']), (3, 1, 2))
+
+    def test_failures_are_cached_briefly(self):
+        with self.assertRaises(socket.gaierror):
+            self.cache.resolve('missing.test')
+        with self.assertRaises(socket.gaierror):
+            self.cache.resolve('missing.test')
+        self.assertEqual(len(self.resolver.calls), 1)
+        self.clock.now = self.cache.negative_ttl + 1
+        with self.assertRaises(socket.gaierror):
+            self.cache.resolve('missing.test')
+        self.assertEqual(len(self.resolver.calls), 2)
+
+    def test_prefetch_shares_lookup_with_resolve(self):
+        """A resolve during a prefetch waits for it instead of resolving again."""
+        release = threading.Event()
+        self.resolver.delay = release
+        self.cache.prefetch('example.test')
+        self.cache.prefetch('example.test')
+        threading.Timer(0.05, release.set).start()
+        self.assertEqual(self.cache.resolve('example.test'), ['192.0.2.1'])
+        self.assertEqual(self.resolver.calls, ['example.test'])
+        self.assertEqual(self.cache.stats()['prefetches'], 1)
+
+    def test_installed_getaddrinfo(self):
+        self.cache.install()
+        infos = socket.getaddrinfo('example.test', 443, 0, socket.SOCK_STREAM)
+        self.assertEqual(infos, [(socket.AF_INET, socket.SOCK_STREAM, 0, '', ('192.0.2.1', 443))])
+        infos = socket.getaddrinfo('v6.test', 'http')
+        self.assertEqual(infos[0][4], ('2001:db8::1', 80, 0, 0))
+        with self.assertRaises(socket.gaierror):
+            socket.getaddrinfo('v6.test', 80, socket.AF_INET)
+        self.cache.uninstall()
+        self.assertNotEqual(socket.getaddrinfo, self.cache.getaddrinfo)
+
+    def test_default_resolver(self):
+        """TTLs come from dnspython when it is installed; other names fall back to the system."""
+        with patch('importlib.util.find_spec', return_value=None):
+            self.assertIs(dns_cache.default_resolver(), dns_cache.system_resolver)
+        with patch('importlib.util.find_spec', return_value=object()):
+            self.assertIs(dns_cache.default_resolver(), dns_cache.ttl_resolver)
+        with patch('dns_cache.dnspython_resolver', return_value=(['192.0.2.1'], 30)):
+            self.assertEqual(dns_cache.ttl_resolver('example.test'), (['192.0.2.1'], 30))
+        with patch('dns_cache.dnspython_resolver', side_effect=socket.gaierror), \
+                patch('dns_cache.system_resolver', return_value=(['127.0.0.1'], None)):
+            self.assertEqual(dns_cache.ttl_resolver('localhost'), (['127.0.0.1'], None))
+
+    def test_links_prefetch_other_hosts_once(self):
+        """A page's links prefetch each other host once and never the page's own host."""
+        cache = Mock()
+        sitemap = SitemapManager("https://example.com", autosave=False)
+        add_page_links(sitemap, "https://example.com/", ["/a", "/b", "https://cdn.test/x", "https://cdn.test/y"],
+                       cache)
+        cache.prefetch.assert_called_once_with("cdn.test")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+"""Test cases for the extraction pipeline."""
+
+import unittest
+
+from config import EXTRACTOR_NAMES
+from crawler import parse_html
+from extractors import (EXTRACTORS, ExtractionPipeline, MainContentExtractor, MetadataExtractor,
+                        find_main_content, get_extractor)
+from utils import extract_text_from_html, get_canonical_url
+
+ARTICLE = "React is a declarative, efficient, and flexible JavaScript library for building user interfaces."
+
+PAGE = f"""
+<html lang="en">
+<head>
+    <title>Components - React</title>
+    <meta name="description" content="Learn about components.">
+    <link rel="canonical" href="/docs/components">
+    <script>var tracking = true;</script>
+</head>
+<body>
+    <header><a href="/">Home</a><a href="/docs">Docs</a></header>
+    <div class="cookie-banner">We use cookies to improve your experience, please accept them.</div>
+    <div id="layout">
+        <div class="sidebar"><ul><li><a href="/a">A link</a></li><li><a href="/b">B link</a></li></ul></div>
+        <div class="content">
+            <h1>Components</h1>
+            <p>{ARTICLE}</p>
+            <p>Components let you split the UI into independent, reusable pieces, and think about each piece.</p>
+            <h2>Props</h2>
+        </div>
+    </div>
+    <footer>Copyright, all rights reserved by the React team and contributors.</footer>
+</body>
+</html>
+"""
+
+class TestExtractors(unittest.TestCase):
+    """Test suite for metadata, main content and pipeline behavior."""
+
+    def setUp(self):
+        self.soup = parse_html(PAGE)
+
+    def test_metadata_fields(self):
+        page = ExtractionPipeline([MetadataExtractor()]).extract(self.soup, "https://react.dev/docs/components?x=1")
+        self.assertEqual(page['title'], "Components - React")
+        self.assertEqual(page['description'], "Learn about components.")
+        self.assertEqual(page['canonical'], "https://react.dev/docs/components")
+        self.assertEqual(page['lang'], "en")
+        self.assertEqual(page['headings'], [{'level': 1, 'text': "Components"}, {'level': 2, 'text': "Props"}])
+
+    def test_main_content_drops_boilerplate(self):
+        page = ExtractionPipeline([MainContentExtractor()]).extract(self.soup)
+        self.assertIn(ARTICLE, page['text'])
+        self.assertTrue(page['text'].startswith("Components"))
+        for boilerplate in ("cookies", "Copyright", "A link", "Home", "tracking"):
+            self.assertNotIn(boilerplate, page['text'])
+
+    def test_explicit_main_element_is_preferred(self):
+        soup = parse_html("<body><nav>Menu</nav><main><p>Short</p></main><div><p>" + ARTICLE + "</p></div></body>")
+        self.assertEqual(find_main_content(soup).name, 'main')
+
+    def test_body_pipeline_matches_extract_text_from_html(self):
+        page = get_extractor('body').extract(self.soup)
+        self.assertEqual(page['text'], extract_text_from_html(self.soup))
+
+    def test_extraction_does_not_modify_tree(self):
+        before = str(self.soup)
+        get_extractor('main').extract(self.soup)
+        self.assertEqual(str(self.soup), before)
+
+    def test_metadata_is_optional(self):
+        """Pipelines without metadata only set the URL and text."""
+        page = get_extractor('body', metadata=False).extract(self.soup, "https://react.dev/")
+        self.assertEqual(sorted(page), ['text', 'url'])
+        self.assertIn("title", get_extractor('body').extract(self.soup))
+
+    def test_canonical_is_normalized(self):
+        """The canonical field is normalized the same way as crawl-time canonical links."""
+        soup = parse_html('<head><link rel="canonical" href="/docs?utm_source=x#top"></head>')
+        page = get_extractor('body').extract(soup, "https://react.dev/")
+        self.assertEqual(page['canonical'], get_canonical_url(soup, "https://react.dev/"))
+        self.assertEqual(page['canonical'], "https://react.dev/docs")
+
+    def test_article_header_is_content(self):
+        """An article's own <header> is kept while the page header is dropped."""
+        soup = parse_html("<body><header><a href='/'>Site menu</a></header><article><header><h1>Launch notes"
+                          f"</h1></header><p>{ARTICLE}</p><p>{ARTICLE}</p></article></body>")
+        text = get_extractor('main').extract(soup)['text']
+        self.assertTrue(text.startswith("Launch notes"))
+        self.assertNotIn("Site menu", text)
+
+    def test_short_page_falls_back_to_body(self):
+        soup = parse_html("<html><body><h1>Test</h1></body></html>")
+        self.assertEqual(get_extractor('main').extract(soup)['text'], "Test")
+
+    def test_names_match_config(self):
+        """The command line offers exactly the predefined pipelines."""
+        self.assertEqual(sorted(EXTRACTORS), sorted(EXTRACTOR_NAMES))
+
+if __name__ == '__main__':
+    unittest.main()
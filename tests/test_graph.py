@@ -0,0 +1,86 @@
+"""Test cases for link graph export and analysis."""
+
+import csv
+import os
+import shutil
+import tempfile
+import unittest
+import xml.etree.ElementTree as ElementTree
+
+from graph import analyze_graph, export_edge_list_csv, export_graphml
+
+try:
+    import numpy
+    import scipy
+    HAS_SCIPY = True
+except ImportError:
+    HAS_SCIPY = False
+
+ROOT = "http://example.com/"
+EDGES = [
+    (ROOT, "http://example.com/a", 'internal'),
+    (ROOT, "http://example.com/b", 'internal'),
+    ("http://example.com/a", "http://example.com/b", 'internal'),
+    ("http://example.com/a", "http://example.com/b", 'internal'),
+    ("http://example.com/b", ROOT, 'internal'),
+    ("http://example.com/b", "http://external.com/", 'external'),
+]
+
+class TestGraphExport(unittest.TestCase):
+    """Test suite for edge-list and GraphML export."""
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_export_csv(self):
+        """Every edge is written as a source, target, kind row."""
+        path = os.path.join(self.folder, "edges.csv")
+        export_edge_list_csv(EDGES, path)
+        with open(path, newline='') as csv_file:
+            rows = list(csv.reader(csv_file))
+        self.assertEqual(rows[0], ['source', 'target', 'kind'])
+        self.assertEqual(len(rows), len(EDGES) + 1)
+
+    def test_export_graphml(self):
+        """GraphML output is well-formed and declares every node once."""
+        path = os.path.join(self.folder, "graph.graphml")
+        export_graphml(EDGES, path)
+        namespace = {'g': 'http://graphml.graphdrawing.org/xmlns'}
+        tree = ElementTree.parse(path)
+        nodes = tree.findall('.//g:node', namespace)
+        self.assertEqual(len(nodes), 4)
+        self.assertEqual(len(tree.findall('.//g:edge', namespace)), len(EDGES))
+
+@unittest.skipUnless(HAS_SCIPY, "numpy and scipy are required for graph analysis")
+class TestGraphAnalysis(unittest.TestCase):
+    """Test suite for PageRank, degree, depth and orphan detection."""
+
+    def setUp(self):
+        internal = [(source, target) for source, target, kind in EDGES if kind == 'internal']
+        self.analysis = analyze_graph(internal, ROOT, pages=[ROOT, "http://example.com/orphan"])
+        self.position = {url: i for i, url in enumerate(self.analysis['urls'])}
+
+    def metric(self, name, url):
+        return self.analysis[name][self.position[url]]
+
+    def test_pagerank_sums_to_one(self):
+        self.assertAlmostEqual(self.analysis['pagerank'].sum(), 1.0)
+        self.assertGreater(self.metric('pagerank', "http://example.com/b"),
+                           self.metric('pagerank', "http://example.com/a"))
+
+    def test_degrees_ignore_repeated_links(self):
+        self.assertEqual(self.metric('out_degree', "http://example.com/a"), 1)
+        self.assertEqual(self.metric('in_degree', "http://example.com/b"), 2)
+
+    def test_depth_and_orphans(self):
+        self.assertEqual(self.metric('depth', ROOT), 0)
+        self.assertEqual(self.metric('depth', "http://example.com/b"), 1)
+        self.assertEqual(self.metric('depth', "http://example.com/orphan"), -1)
+        self.assertEqual(self.analysis['orphans'], ["http://example.com/orphan"])
+        self.assertEqual(list(self.analysis['depth_distribution']), [1, 2])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+"""Test cases for crawl budgets and adaptive per-host limits."""
+
+import unittest
+
+from limits import CrawlBudget, HostLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCrawlBudget(unittest.TestCase):
+    """Test suite for time and byte budgets."""
+
+    def test_time_budget(self):
+        """The budget is exhausted once the time limit has passed."""
+        clock = FakeClock()
+        budget = CrawlBudget(max_seconds=60, clock=clock)
+        self.assertIsNone(budget.exhausted())
+        clock.now = 60
+        self.assertIn("time budget", budget.exhausted())
+
+    def test_byte_budget(self):
+        """The budget is exhausted once enough bytes have been downloaded."""
+        budget = CrawlBudget(max_bytes=1000)
+        budget.charge(600)
+        self.assertIsNone(budget.exhausted())
+        budget.charge(400)
+        self.assertIn("byte budget", budget.exhausted())
+
+
+class TestHostLimiter(unittest.TestCase):
+    """Test suite for AIMD concurrency limits."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.limiter = HostLimiter(initial=2, minimum=1, maximum=4, target_latency=1.0, clock=self.clock)
+        self.url = "https://example.com/page"
+
+    def test_limit_enforced_per_host(self):
+        """A host at its limit gets no more slots, other hosts are unaffected."""
+        tokens = [self.limiter.try_acquire(self.url) for _ in range(2)]
+        self.assertIsNone(self.limiter.try_acquire(self.url))
+        self.assertIsNotNone(self.limiter.try_acquire("https://other.example/"))
+        self.limiter.release(tokens[0], 0.1, True)
+        self.assertIsNotNone(self.limiter.try_acquire(self.url))
+
+    def test_additive_increase(self):
+        """Fast successes raise the limit by about one per round, up to the maximum."""
+        for _ in range(20):
+            self.clock.now += 1
+            self.limiter.release(self.limiter.acquire(self.url), 0.1, True)
+        self.assertEqual(self.limiter.limit(self.url), 4)
+
+    def test_multiplicative_decrease_once_per_burst(self):
+        """Errors halve the limit once for requests that were already in flight."""
+        for _ in range(20):
+            self.limiter.release(self.limiter.acquire(self.url), 0.1, True)
+        tokens = [self.limiter.acquire(self.url) for _ in range(4)]
+        self.clock.now += 1
+        for token in tokens:
+            self.limiter.release(token, 0.1, False)
+        self.assertEqual(self.limiter.limit(self.url), 2)
+
+        self.clock.now += 1
+        self.limiter.release(self.limiter.acquire(self.url), 5.0, True)  # slow response
+        self.assertEqual(self.limiter.limit(self.url), 1)
+
+if __name__ == '__main__':
+    unittest.main()
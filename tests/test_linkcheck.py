@@ -0,0 +1,90 @@
+"""Test cases for external link checking."""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import requests
+import responses
+
+from linkcheck import LinkChecker, check_external_links, group_external_links
+from sitemap import SitemapManager
+
+class TestLinkChecker(unittest.TestCase):
+    """Test suite for HEAD/GET validation, caching and reporting."""
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.cache_path = os.path.join(self.folder, "cache.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    @responses.activate
+    def test_get_fallback_when_head_rejected(self):
+        responses.add(responses.HEAD, "https://a.test/", status=405)
+        responses.add(responses.GET, "https://a.test/", status=200)
+        result = LinkChecker().check_url("https://a.test/")
+        self.assertTrue(result['ok'])
+        self.assertEqual(result['method'], 'GET')
+
+    @responses.activate
+    def test_get_fallback_when_head_fails(self):
+        """A HEAD request that times out is retried with GET."""
+        responses.add(responses.HEAD, "https://a.test/", body=requests.exceptions.ReadTimeout("stalled"))
+        responses.add(responses.GET, "https://a.test/", status=200)
+        result = LinkChecker().check_url("https://a.test/")
+        self.assertTrue(result['ok'])
+        self.assertIsNone(result['error'])
+
+    @responses.activate
+    def test_connection_errors_are_broken(self):
+        responses.add(responses.HEAD, "https://down.test/", body=requests.exceptions.ConnectionError("refused"))
+        responses.add(responses.GET, "https://down.test/", body=requests.exceptions.ConnectionError("refused"))
+        result = LinkChecker().check_url("https://down.test/")
+        self.assertFalse(result['ok'])
+        self.assertIn("ConnectionError", result['error'])
+
+    def test_cache_is_bounded(self):
+        """Saving drops expired results and then the oldest ones."""
+        checker = LinkChecker(cache_path=self.cache_path, max_cache_entries=2)
+        now = time.time()
+        checker.cache = {f"https://a.test/{age}": {'ok': True, 'checked_at': now - age} for age in (1, 2, 3)}
+        checker.cache["https://a.test/expired"] = {'ok': True, 'checked_at': now - checker.cache_ttl - 1}
+        checker.save_cache()
+        self.assertEqual(sorted(LinkChecker(cache_path=self.cache_path).cache),
+                         ["https://a.test/1", "https://a.test/2"])
+
+    @responses.activate
+    def test_results_are_cached_across_runs(self):
+        responses.add(responses.HEAD, "https://a.test/", status=200)
+        LinkChecker(cache_path=self.cache_path).check(["https://a.test/", "https://a.test/"])
+        self.assertEqual(len(responses.calls), 1)
+
+        results = LinkChecker(cache_path=self.cache_path).check(["https://a.test/"])
+        self.assertTrue(results["https://a.test/"]['ok'])
+        self.assertEqual(len(responses.calls), 1)
+
+    def test_group_external_links_dedups(self):
+        edges = [("p1", "https://a.test/"), ("p1", "https://a.test/"), ("p2", "https://a.test/")]
+        self.assertEqual(group_external_links(edges), {"https://a.test/": ["p1", "p2"]})
+
+    @responses.activate
+    def test_broken_links_map_to_source_pages(self):
+        responses.add(responses.HEAD, "https://ok.test/", status=200)
+        responses.add(responses.HEAD, "https://gone.test/", status=404)
+        responses.add(responses.GET, "https://gone.test/", status=404)
+        sitemap = SitemapManager(autosave=False)
+        sitemap.add_external_edge("http://example.com/a", "https://ok.test/")
+        sitemap.add_external_edge("http://example.com/a", "https://gone.test/")
+        sitemap.add_external_edge("http://example.com/b", "https://gone.test/")
+        sitemap.add_external_edge("http://example.com/b", "mailto:someone@example.com")
+
+        broken = check_external_links(sitemap, LinkChecker())
+        self.assertEqual(broken, [("https://gone.test/", 404, None,
+                                   ["http://example.com/a", "http://example.com/b"])])
+
+if __name__ == '__main__':
+    unittest.main()
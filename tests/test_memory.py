@@ -0,0 +1,183 @@
+"""Test cases for memory caps, spilling and reporting."""
+
+import itertools
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+import crawler
+from crawler import Crawler
+from memory import DiskDict, DiskEdgeIndex, DiskList, DiskSet, MemoryLimit, deep_sizeof, memory_report
+from sitemap import EdgeIndex, SitemapManager
+
+PAGES = {
+    "https://example.com": "<html><body><h1>Home</h1><a href='/a'>A</a><a href='/b'>B</a></body></html>",
+    "https://example.com/a": "<html><body><h1>Page A</h1></body></html>",
+    "https://example.com/b": "<html><body><h1>Page B</h1></body></html>",
+}
+
+
+class TestMemory(unittest.TestCase):
+    """Test suite for DiskDict, MemoryLimit and the crawler's memory cap."""
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        cwd = os.getcwd()
+        os.chdir(self.folder)
+        self.addCleanup(os.chdir, cwd)
+        self.robots_parser = Mock()
+        self.robots_parser.is_allowed.return_value = True
+        patcher = patch('crawler.fetch_page', side_effect=lambda url: PAGES.get(url))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def make_crawler(self, **kwargs):
+        return Crawler("https://example.com", robots_parser=self.robots_parser, delay=0, **kwargs)
+
+    def test_disk_dict(self):
+        """A DiskDict behaves like a dict that keeps insertion order."""
+        store = DiskDict(os.path.join(self.folder, "state.sqlite"), [("b", {"parent": "x"})])
+        store["a"] = "text"
+        store["b"] = {"parent": "y"}
+        self.assertEqual(len(store), 2)
+        self.assertIn("a", store)
+        self.assertNotIn("c", store)
+        self.assertEqual(store["b"], {"parent": "y"})
+        self.assertEqual(list(store.items()), [("b", {"parent": "y"}), ("a", "text")])
+        del store["a"]
+        with self.assertRaises(KeyError):
+            store["a"]
+        store.close()
+
+    def test_disk_set_and_list(self):
+        """DiskSet and DiskList support the operations the crawl uses on sets and the frontier."""
+        seen = DiskSet(os.path.join(self.folder, "set.sqlite"), [b"\x00digest", "url"])
+        seen.add("url")
+        seen.add("other")
+        self.assertEqual(len(seen), 3)
+        self.assertIn(b"\x00digest", seen)
+        seen.discard("url")
+        self.assertEqual(list(seen), [b"\x00digest", "other"])
+        seen.remove()
+        self.assertFalse(os.path.exists(seen.path))
+
+        queue = DiskList(os.path.join(self.folder, "list.sqlite"), ["a", "b"])
+        queue.append("c")
+        self.assertEqual((len(queue), queue[-1], queue[1:]), (3, "c", ["b", "c"]))
+        self.assertIn("b", queue)
+        self.assertEqual(queue.pop(), "c")
+        queue.append("d")
+        self.assertEqual(list(queue), ["a", "b", "d"])
+        self.assertEqual([queue.pop(), queue.pop(), queue.pop()], ["d", "b", "a"])
+        self.assertFalse(queue)
+        with self.assertRaises(IndexError):
+            queue.pop()
+        queue.close()
+
+    def test_disk_edge_index(self):
+        """A DiskEdgeIndex keeps the ids, counts and order of the EdgeIndex it was made from."""
+        edges = EdgeIndex()
+        edges.add("https://a.com/", "https://b.com/")
+        edges.add("https://a.com/", "https://b.com/")
+        disk = DiskEdgeIndex(os.path.join(self.folder, "edges.sqlite"), edges)
+        self.assertTrue(disk.add("https://a.com/", "https://c.com/"))
+        self.assertFalse(disk.add("https://a.com/", "https://c.com/"))
+        disk.add("https://c.com/", "https://a.com/")
+        self.assertEqual(len(disk), 3)
+        self.assertEqual(list(disk.items()), [("https://a.com/", "https://b.com/", 2),
+                                              ("https://a.com/", "https://c.com/", 2),
+                                              ("https://c.com/", "https://a.com/", 1)])
+        self.assertIn(("https://c.com/", "https://a.com/"), disk)
+        self.assertNotIn(("https://b.com/", "https://a.com/"), disk)
+        self.assertEqual(disk.targets("https://a.com/"), ["https://b.com/", "https://c.com/"])
+        self.assertEqual(disk.id_pairs(), [(0, 1), (0, 2), (2, 0)])
+        disk.close()
+
+    def test_spills_above_threshold(self):
+        """Page text and parent links move to disk once memory passes the spill threshold."""
+        usage = [10]
+        limit = MemoryLimit(100, os.path.join(self.folder, "state"), rss=lambda: usage[0])
+        sitemap = SitemapManager("https://example.com", autosave=False)
+        sitemap.page_contents["https://example.com"] = "Home"
+        self.assertIsNone(limit.check(sitemap))
+        self.assertIsInstance(sitemap.page_contents, dict)
+
+        usage[0] = 80
+        self.assertIsNone(limit.check(sitemap))
+        self.assertIsInstance(sitemap.page_contents, DiskDict)
+        self.assertIsInstance(sitemap.parent_urls, DiskDict)
+        self.assertIsInstance(sitemap.visited_urls, DiskSet)
+        self.assertIsInstance(sitemap.unvisited_urls, DiskList)
+        self.assertIsInstance(sitemap.queued_urls, DiskSet)
+        self.assertIsInstance(sitemap.internal_edges, DiskEdgeIndex)
+        self.assertEqual(sitemap.page_contents["https://example.com"], "Home")
+        sitemap.add_url("https://example.com", "/a")
+        sitemap.mark_visited("https://example.com/a")
+        self.assertEqual(sitemap.parent_urls["https://example.com/a"]['parent'], "https://example.com")
+        self.assertIn('"https://example.com" -> "https://example.com/a"', sitemap.render_sitemap())
+
+        usage[0] = 100
+        self.assertIn("memory limit", limit.check(sitemap))
+        self.assertEqual(limit.peak, 100)
+
+    def test_crawl_stops_at_limit(self):
+        """No new fetches start once the memory limit is reached."""
+        usage = itertools.chain([10], itertools.repeat(200))
+        limited = self.make_crawler(memory_limit=MemoryLimit(100, "state", rss=lambda: next(usage)))
+        pages = list(limited.iter_pages())
+        self.assertEqual(len(pages), 2)
+        self.assertIn("memory limit", limited.stop_reason)
+
+    def test_spilled_crawl_completes_and_cleans_up(self):
+        """A crawl spilled from its first page finds the same pages, and closing deletes the state."""
+        unlimited = self.make_crawler()
+        expected = [page.url for page in unlimited.iter_pages()]
+        limit = MemoryLimit(100, "state", rss=lambda: 80)
+        spilled = self.make_crawler(memory_limit=limit)
+        self.assertEqual([page.url for page in spilled.iter_pages()], expected)
+        self.assertIsInstance(spilled.depths, DiskDict)
+        self.assertIsInstance(spilled._seen_texts, DiskSet)
+        self.assertEqual(list(spilled.sitemap.internal_edges), list(unlimited.sitemap.internal_edges))
+        self.assertEqual(spilled.depths["https://example.com/a"], 1)
+        self.assertTrue(os.listdir("state"))
+        limit.close()
+        self.assertFalse(os.path.exists("state"))
+
+    def test_parsed_trees_released(self):
+        """Every parsed tree is decomposed before the next page is fetched."""
+        soups = []
+        parse_html = crawler.parse_html
+        with patch('crawler.parse_html', side_effect=lambda html: soups.append(parse_html(html)) or soups[-1]):
+            list(self.make_crawler().iter_pages())
+        self.assertEqual(len(soups), 3)
+        self.assertTrue(all(soup.decomposed for soup in soups))
+
+    def test_memory_report(self):
+        """The report sizes each structure, largest first."""
+        report = memory_report({'small': [], 'large': ["x" * 10000]})
+        self.assertEqual(list(report['structures']), ['large', 'small'])
+        self.assertGreater(report['structures']['large'], 10000)
+        self.assertGreater(report['rss'], 0)
+        self.assertEqual(deep_sizeof(("x" * 100,) * 2), deep_sizeof(("x" * 100,)) + 8)
+        self.assertNotIn('structure_allocations', report)
+
+    def test_memory_report_attributes_allocations(self):
+        """With tracemalloc tracing, each structure lists the lines that allocated its objects."""
+        import tracemalloc
+        tracemalloc.start()
+        self.addCleanup(tracemalloc.stop)
+        pages = ["x" * 10000 + str(i) for i in range(10)]
+        report = memory_report({'pages': pages, 'empty': {}})
+        location, size = report['structure_allocations']['pages'][0]
+        self.assertTrue(location.startswith(__file__ + ':'))
+        self.assertGreater(size, 100000)
+        self.assertEqual(list(report['structure_allocations']), ['pages', 'empty'])
+        self.assertTrue(report['top_allocations'])
+
+if __name__ == '__main__':
+    unittest.main()
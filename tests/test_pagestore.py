@@ -0,0 +1,109 @@
+"""Test cases for the compressed page store."""
+
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+
+from crawler import export_page_store
+from pagestore import PageStore
+
+class TestPageStore(unittest.TestCase):
+    """Test suite for storing, reopening and exporting pages."""
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_put_and_get(self):
+        """Pages can be read back by URL in any order."""
+        with PageStore(self.folder) as store:
+            store.put("http://example.com/a", "Page A")
+            store.put("http://example.com/b", "Page B")
+            self.assertEqual(store.get("http://example.com/b"), "Page B")
+            self.assertEqual(store.get("http://example.com/a"), "Page A")
+            self.assertIsNone(store.get("http://example.com/missing"))
+            self.assertEqual(len(store), 2)
+
+    def test_identical_content_is_stored_once(self):
+        """Pages with the same text share one compressed record."""
+        with PageStore(self.folder) as store:
+            first = store.put("http://example.com/a?page=1", "Same text")
+            second = store.put("http://example.com/a?page=2", "Same text")
+            self.assertEqual(first, second)
+            self.assertEqual(len(store.hash_index), 1)
+            self.assertEqual(store.get_by_hash(first), "Same text")
+
+    def test_reopen_loads_index(self):
+        """A closed store can be reopened and appended to."""
+        with PageStore(self.folder) as store:
+            store.put("http://example.com/a", "Page A")
+        with PageStore(self.folder) as store:
+            self.assertIn("http://example.com/a", store)
+            store.put("http://example.com/b", "Page B")
+            self.assertEqual(store.get("http://example.com/a"), "Page A")
+            self.assertEqual(store.get("http://example.com/b"), "Page B")
+
+    def test_segment_rotation(self):
+        """A new segment is started once the current one is full."""
+        with PageStore(self.folder, segment_size=1) as store:
+            store.put("http://example.com/a", "Page A")
+            store.put("http://example.com/b", "Page B")
+            self.assertEqual(store.get("http://example.com/a"), "Page A")
+            self.assertEqual(store.get("http://example.com/b"), "Page B")
+        segments = [name for name in os.listdir(self.folder) if name.startswith("segment-")]
+        self.assertEqual(len(segments), 2)
+
+    def test_warc_segments(self):
+        """WARC mode writes gzip segments made of WARC resource records."""
+        with PageStore(self.folder, warc=True) as store:
+            store.put("http://example.com/a", "Page A")
+            self.assertEqual(store.get("http://example.com/a"), "Page A")
+        with gzip.open(os.path.join(self.folder, "segment-00000.warc.gz"), 'rb') as segment:
+            data = segment.read()
+        self.assertTrue(data.startswith(b"WARC/1.1\r\n"))
+        self.assertIn(b"WARC-Target-URI: http://example.com/a", data)
+
+    def test_manifest_records_settings(self):
+        """A store reopens with the compression and WARC mode it was written with."""
+        with PageStore(self.folder, warc=True) as store:
+            store.put("http://example.com/a", "Page A")
+        with PageStore(self.folder) as store:
+            self.assertTrue(store.warc)
+            self.assertEqual(store.get("http://example.com/a"), "Page A")
+        with self.assertRaises(ValueError):
+            PageStore(self.folder, warc=False)
+
+        os.remove(os.path.join(self.folder, "store.json"))
+        with self.assertRaises(ValueError):
+            PageStore(self.folder)
+
+    def test_index_compacted_on_close(self):
+        """Storing a URL again leaves one index line for it once the store is closed."""
+        with PageStore(self.folder) as store:
+            for version in range(5):
+                store.put("http://example.com/a", f"Version {version}")
+                store.put("http://example.com/a", f"Version {version}")
+            store.put("http://example.com/b", "Page B")
+        with open(os.path.join(self.folder, "index.jsonl")) as index_file:
+            self.assertEqual(len(index_file.readlines()), 2)
+        with PageStore(self.folder) as store:
+            self.assertEqual(store.get("http://example.com/a"), "Version 4")
+            self.assertEqual(list(store.url_index), ["http://example.com/a", "http://example.com/b"])
+
+    def test_export_txt(self):
+        """Exported text output uses the same START/END banners as crawling."""
+        output_file_path = os.path.join(self.folder, "export.txt")
+        with PageStore(os.path.join(self.folder, "store")) as store:
+            store.put("http://example.com/a", "Page A")
+            export_page_store(store, output_file_path, 'txt')
+        with open(output_file_path) as output_file:
+            content = output_file.read()
+        self.assertIn("####### START HTTP://EXAMPLE.COM/A #######", content)
+        self.assertIn("Page A", content)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,201 @@
+"""Test cases for the headless-browser render tier."""
+
+import functools
+import http.server
+import importlib.util
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+from crawler import Crawler, crawl, render_page
+from render import RenderCache, RenderPolicy, RenderPool, RenderResult
+from sitemap import SitemapManager
+
+SCRIPTED_PAGE = """<html><body><div id="app"></div><img src="/logo.png">
+<script>document.getElementById('app').innerHTML = '<h1>Rendered</h1><a href="/next">Next</a>';</script>
+</body></html>"""
+
+
+class FakeSession:
+    """Session that renders by appending a marker, tracking concurrency."""
+    active = 0
+    peak = 0
+    created = 0
+    lock = threading.Lock()
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.closed = False
+        with FakeSession.lock:
+            FakeSession.created += 1
+
+    def render(self, url):
+        with FakeSession.lock:
+            FakeSession.active += 1
+            FakeSession.peak = max(FakeSession.peak, FakeSession.active)
+        time.sleep(self.delay)
+        with FakeSession.lock:
+            FakeSession.active -= 1
+        if url.endswith('/broken'):
+            raise RuntimeError("navigation failed")
+        if url.endswith('/missing'):
+            return RenderResult(url, 404, {}, "<html><body><h1>Not Found page</h1></body></html>")
+        return RenderResult(url, 200, {}, f"<html><body><h1>Rendered {url}</h1></body></html>")
+
+    def close(self):
+        self.closed = True
+
+
+class TestRenderPool(unittest.TestCase):
+    """Test suite for pooling, caching and routing of renders."""
+
+    def setUp(self):
+        FakeSession.active = FakeSession.peak = FakeSession.created = 0
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_policy(self):
+        """URLs are routed by pattern and pages by text length."""
+        policy = RenderPolicy([r'/app/'], min_text_length=20)
+        self.assertTrue(policy.matches("https://example.com/app/page"))
+        self.assertFalse(policy.matches("https://example.com/docs"))
+        self.assertTrue(policy.is_thin("  Loading...  "))
+        self.assertFalse(RenderPolicy().enabled)
+
+    def test_concurrency_capped_by_workers(self):
+        """No more pages render at once than there are workers."""
+        with RenderPool(RenderPolicy(), workers=2, session_factory=functools.partial(FakeSession, 0.05)) as pool:
+            futures = [pool.submit(f"https://example.com/{i}") for i in range(6)]
+            results = [future.result() for future in futures]
+        self.assertEqual(len(results), 6)
+        self.assertEqual(FakeSession.peak, 2)
+        self.assertEqual(FakeSession.created, 2)
+
+    def test_cache_reused_across_pools(self):
+        """Rendered pages are cached on disk and reused by later runs."""
+        with RenderPool(RenderPolicy(), 1, RenderCache(self.folder), FakeSession) as pool:
+            first = pool.render("https://example.com/page")
+        with RenderPool(RenderPolicy(), 1, RenderCache(self.folder), FakeSession) as pool:
+            second = pool.render("https://example.com/page")
+            self.assertEqual(pool.stats()['cache_hits'], 1)
+        self.assertEqual(first, second)
+        self.assertEqual(FakeSession.created, 1)
+
+    def test_sessions_recycled(self):
+        """Sessions are replaced after max_renders_per_session pages."""
+        with RenderPool(RenderPolicy(), 1, session_factory=FakeSession, max_renders_per_session=2) as pool:
+            for i in range(5):
+                pool.render(f"https://example.com/{i}")
+        self.assertEqual(FakeSession.created, 3)
+
+    def test_failure_returns_none(self):
+        """A failed render is logged and reported as None."""
+        with RenderPool(RenderPolicy(), 1, session_factory=FakeSession) as pool:
+            self.assertIsNone(pool.render("https://example.com/broken"))
+            self.assertEqual(pool.stats()['failures'], 1)
+
+    def test_error_pages_not_kept(self):
+        """Rendered error pages are neither cached nor crawled, and a quiet crawl prints nothing."""
+        cache = RenderCache(self.folder)
+        with RenderPool(RenderPolicy([r'/']), 1, cache, FakeSession) as pool:
+            self.assertIsNone(render_page(pool, "https://example.com/missing"))
+            self.assertIsNone(cache.get("https://example.com/missing"))
+            robots_parser = Mock()
+            robots_parser.is_allowed.return_value = True
+            cwd = os.getcwd()
+            os.chdir(self.folder)
+            try:
+                with patch('sys.stdout', new_callable=io.StringIO) as stdout:
+                    pages = list(Crawler("https://example.com/missing", robots_parser=robots_parser, delay=0,
+                                         renderer=pool).iter_pages())
+                    pages += list(Crawler("https://example.com/page", robots_parser=robots_parser, delay=0,
+                                          renderer=pool).iter_pages())
+            finally:
+                os.chdir(cwd)
+        self.assertEqual([page.url for page in pages], ["https://example.com/page"])
+        self.assertEqual(stdout.getvalue(), "")
+
+    def test_failed_session_replaced(self):
+        """A session whose render fails is closed and the next render starts a new one."""
+        with RenderPool(RenderPolicy(), 1, session_factory=FakeSession) as pool:
+            self.assertIsNone(pool.render("https://example.com/broken"))
+            self.assertIsNotNone(pool.render("https://example.com/page"))
+        self.assertEqual(FakeSession.created, 2)
+
+    def test_crawl_renders_concurrently(self):
+        """Thin pages are rendered on the fetch workers, up to the pool's workers at once."""
+        cwd = os.getcwd()
+        os.chdir(self.folder)
+        try:
+            base_url = "https://example.com"
+            links = "".join(f"<a href='/{i}'>Page number {i}</a>" for i in range(6))
+            sitemap = SitemapManager(base_url)
+            robots_parser = Mock()
+            robots_parser.is_allowed.return_value = True
+            with RenderPool(RenderPolicy(min_text_length=50), 2,
+                            session_factory=functools.partial(FakeSession, 0.05)) as pool, \
+                    patch('crawler.fetch_page', side_effect=lambda url: f"<html><body>{links}</body></html>"
+                          if url == base_url else "<html><body><div id='app'></div></body></html>"):
+                crawl(base_url, sitemap, base_url, robots_parser, renderer=pool, fetch_workers=4)
+        finally:
+            os.chdir(cwd)
+        self.assertEqual(FakeSession.peak, 2)
+        self.assertEqual(sitemap.page_contents[f"{base_url}/3"], f"Rendered {base_url}/3")
+
+    def test_crawl_renders_thin_pages(self):
+        """Crawl re-renders pages whose fetched text is below the threshold."""
+        cwd = os.getcwd()
+        os.chdir(self.folder)
+        try:
+            base_url = "https://example.com"
+            sitemap = SitemapManager(base_url)
+            robots_parser = Mock()
+            robots_parser.is_allowed.return_value = True
+            with RenderPool(RenderPolicy(min_text_length=10), 1, session_factory=FakeSession) as pool, \
+                    patch('crawler.fetch_page', return_value="<html><body><div id='app'></div></body></html>"):
+                crawl(base_url, sitemap, base_url, robots_parser, renderer=pool)
+        finally:
+            os.chdir(cwd)
+        self.assertEqual(sitemap.page_contents[base_url], f"Rendered {base_url}")
+
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@unittest.skipUnless(importlib.util.find_spec('playwright'), "playwright is not installed")
+class TestPlaywrightSession(unittest.TestCase):
+    """Renders a scripted page from a local static server in a real browser."""
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        with open(os.path.join(self.folder, 'index.html'), 'w') as page:
+            page.write(SCRIPTED_PAGE)
+        handler = functools.partial(QuietHandler, directory=self.folder)
+        self.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/index.html"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.folder)
+
+    def test_render_runs_scripts(self):
+        """Script-built content appears in the rendered HTML."""
+        with RenderPool(RenderPolicy([r'.']), workers=1) as pool:
+            result = pool.render(self.url)
+        self.assertIsNotNone(result)
+        self.assertIn('<h1>Rendered</h1>', result.html)
+        self.assertEqual(result.status_code, 200)
+
+if __name__ == '__main__':
+    unittest.main()
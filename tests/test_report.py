@@ -0,0 +1,74 @@
+"""Test cases for reports over crawl output."""
+
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from crawler import format_txt_entry, format_jsonl_entry
+from pagestore import PageStore
+from report import build_report, index_txt, main
+
+
+class TestReport(unittest.TestCase):
+    """Test suite for indexing content files and summarizing sites."""
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.site = os.path.join(self.folder, "example.com")
+        os.makedirs(self.site)
+        with open(os.path.join(self.site, "example-com-content_2025-01-01.txt"), 'w') as txt_file:
+            txt_file.write(format_txt_entry("https://example.com/", "Home page " * 200))
+            txt_file.write(format_txt_entry("https://example.com/a", "Same  text"))
+            txt_file.write(format_txt_entry("https://example.com/b", "same text\n"))
+            txt_file.write(format_txt_entry("https://example.com/About", "About us " * 20))
+            txt_file.write("\n####### START HTTPS://EXAMPLE.COM/CUT #######\n\nInterrupted")
+        with open(os.path.join(self.site, "example-com-content_2025-01-02.jsonl"), 'w') as jsonl_file:
+            jsonl_file.write(format_jsonl_entry({'url': "https://example.com/c", 'text': "Same text"}))
+            jsonl_file.write(format_jsonl_entry({'url': "https://example.com/About", 'text': "About us " * 20}))
+        with PageStore(os.path.join(self.site, "example-com-content_2025-01-03.store")) as store:
+            store.put("https://example.com/d", "Stored page")
+        with open(os.path.join(self.site, "example.com-sitemap_2025-01-01.dot"), 'w') as dot_file:
+            dot_file.write('digraph SiteMap {\n'
+                           '    "https://example.com/" -> "https://github.com/x" [URL="https://github.com/x", '
+                           'style=dotted, color=blue, label="3"];\n'
+                           '    "https://example.com/a" -> "https://github.com/y" [URL="https://github.com/y", '
+                           'style=dotted, color=blue];\n'
+                           '    "https://example.com/" -> "https://docs.test/" [URL="https://docs.test/", '
+                           'style=dotted, color=blue];\n'
+                           '    "https://example.com/" -> "https://example.com/a";\n'
+                           '}\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_index_txt(self):
+        """Complete entries are indexed; a truncated last entry is skipped."""
+        entries = index_txt(os.path.join(self.site, "example-com-content_2025-01-01.txt"))
+        self.assertEqual([url for url, _, _ in entries], ["https://example.com/", "https://example.com/a",
+                                                          "https://example.com/b", "https://example.com/about"])
+        self.assertEqual(entries[0][1], len("Home page " * 200))
+
+    def test_site_summary(self):
+        """Pages from every content format are counted, clustered and sized."""
+        for processes in (1, 2):
+            summary = build_report([self.folder], processes=processes)[self.site]
+            # /About is in the text and JSON Lines files and counts once
+            self.assertEqual(summary['pages'], 6)
+            self.assertEqual(summary['duplicate_clusters'], 1)
+            self.assertEqual(sorted(summary['top_clusters'][0]),
+                             ["https://example.com/a", "https://example.com/b", "https://example.com/c"])
+            self.assertEqual(summary['histogram']['1-4 KB'], 1)
+            self.assertEqual(summary['sizes']['max'], len("Home page " * 200))
+            self.assertEqual(summary['top_domains'], [("github.com", 4), ("docs.test", 1)])
+
+    @patch('sys.stdout', new_callable=io.StringIO)
+    def test_json_output(self, mock_stdout):
+        main([self.site, '--json', '--processes', '1'])
+        self.assertEqual(json.loads(mock_stdout.getvalue())[self.site]['pages'], 6)
+
+if __name__ == '__main__':
+    unittest.main()
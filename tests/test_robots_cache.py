@@ -0,0 +1,90 @@
+"""Test cases for the shared robots.txt cache."""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+import responses
+
+from crawler import Crawler
+from robots_cache import MAX_TTL, RobotsCache
+
+ROBOTS = """
+User-agent: *
+Disallow: /private/
+Crawl-delay: 1
+"""
+
+
+class TestRobotsCache(unittest.TestCase):
+    """Test suite for per-origin, in-memory and on-disk robots.txt caching."""
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.now = 1000.0
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def make_cache(self, folder=None):
+        cache = RobotsCache(folder, clock=lambda: self.now)
+        self.addCleanup(cache.close)
+        return cache
+
+    @responses.activate
+    def test_fetched_once_per_origin(self):
+        """Every URL of an origin shares one fetch; other origins get their own."""
+        responses.add(responses.GET, "https://a.com/robots.txt", body=ROBOTS)
+        responses.add(responses.GET, "https://b.com/robots.txt", status=404)
+        cache = self.make_cache()
+        cache.prefetch("https://b.com/")
+        self.assertFalse(cache.is_allowed("https://a.com/private/page"))
+        self.assertTrue(cache.is_allowed("https://a.com/public"))
+        self.assertTrue(cache.is_allowed("https://b.com/private/page"))
+        self.assertEqual(cache.get("https://A.com/x").crawl_delay, 1)
+        self.assertEqual(len(responses.calls), 2)
+        self.assertEqual(cache.fetches, 2)
+
+    @responses.activate
+    def test_reused_across_runs_until_expiry(self):
+        """Rules saved on disk are reused by a later cache until they are 24 hours old."""
+        responses.add(responses.GET, "https://a.com/robots.txt", body=ROBOTS)
+        self.make_cache(self.folder).get("https://a.com/")
+
+        second_run = self.make_cache(self.folder)
+        self.assertFalse(second_run.is_allowed("https://a.com/private/"))
+        self.assertEqual(len(responses.calls), 1)
+
+        self.now += 24 * 60 * 60
+        self.make_cache(self.folder).get("https://a.com/")
+        self.assertEqual(len(responses.calls), 2)
+
+        self.assertEqual(RobotsCache(ttl=48 * 60 * 60).ttl, MAX_TTL)
+
+    @responses.activate
+    def test_server_errors_are_not_saved(self):
+        """A failed fetch allows everything for this run but is retried next run."""
+        responses.add(responses.GET, "https://a.com/robots.txt", status=503)
+        self.assertTrue(self.make_cache(self.folder).is_allowed("https://a.com/private/"))
+        self.make_cache(self.folder).get("https://a.com/")
+        self.assertEqual(len(responses.calls), 2)
+
+    def test_crawler_prefetches_new_origins(self):
+        """Each origin's robots.txt is prefetched once, when its first link is queued."""
+        pages = {"https://a.com": "<a href='/x'>X</a><a href='http://a.com/y'>Y</a>",
+                 "http://a.com/y": "<a href='http://a.com/z'>Z</a>"}
+        cwd = os.getcwd()
+        os.chdir(self.folder)
+        self.addCleanup(os.chdir, cwd)
+        cache = self.make_cache()
+        allowed = Mock()
+        allowed.is_allowed.return_value = True
+        with patch('crawler.fetch_page', side_effect=lambda url: pages.get(url)), \
+                patch.object(cache, 'get', return_value=allowed), patch.object(cache, 'prefetch') as prefetch:
+            list(Crawler("https://a.com", robots_cache=cache, delay=0).iter_pages())
+        self.assertEqual(sorted(call.args[0] for call in prefetch.call_args_list), ["http://a.com", "https://a.com"])
+
+if __name__ == '__main__':
+    unittest.main()
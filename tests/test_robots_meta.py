@@ -0,0 +1,148 @@
+"""Test cases for canonical links, meta robots and X-Robots-Tag handling."""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+import responses
+from bs4 import BeautifulSoup
+from urllib3 import HTTPHeaderDict
+
+from crawler import FetchedPage, crawl
+from transport import RequestsBackend
+from sitemap import SitemapManager
+from utils import get_canonical_url, get_robots_directives, parse_robots_directives
+
+class TestRobotsDirectives(unittest.TestCase):
+    """Test suite for parsing robots directives."""
+
+    def test_parse_directives(self):
+        """Directives are lower-cased, 'none' expands and user-agent scoped values are ignored."""
+        self.assertEqual(parse_robots_directives("NOINDEX, follow"), {'noindex', 'follow'})
+        self.assertEqual(parse_robots_directives("none"), {'noindex', 'nofollow'})
+        self.assertEqual(parse_robots_directives("googlebot: noindex"), set())
+        self.assertEqual(parse_robots_directives("googlebot: noindex, nofollow"), set())
+        self.assertEqual(parse_robots_directives("noarchive, otherbot: noindex, nofollow"), {'noarchive'})
+        self.assertEqual(parse_robots_directives("unavailable_after: 2030-01-01, noindex"),
+                         {'unavailable_after', 'noindex'})
+
+    def test_meta_and_header(self):
+        """Meta robots tags and the X-Robots-Tag header are combined."""
+        soup = BeautifulSoup('<html><head><meta name="Robots" content="nofollow"></head></html>', 'html.parser')
+        directives = get_robots_directives(soup, {'X-Robots-Tag': 'noindex'})
+        self.assertEqual(directives, {'noindex', 'nofollow'})
+
+    @responses.activate
+    def test_repeated_headers(self):
+        """A user-agent scope in one X-Robots-Tag header does not hide the next header's directives."""
+        soup = BeautifulSoup('<html></html>', 'html.parser')
+        headers = HTTPHeaderDict()
+        headers.add('X-Robots-Tag', 'googlebot: nofollow')
+        headers.add('X-Robots-Tag', 'noindex')
+        self.assertEqual(get_robots_directives(soup, headers), {'noindex'})
+
+        responses.add(responses.GET, "https://example.com/", body="<html></html>",
+                      headers=[('X-Robots-Tag', 'googlebot: nofollow'), ('X-Robots-Tag', 'noindex')])
+        backend = RequestsBackend()
+        page = backend.fetch("https://example.com/")
+        backend.close()
+        self.assertEqual(get_robots_directives(soup, page.headers), {'noindex'})
+
+    def test_canonical_url(self):
+        """Relative canonical links are resolved and normalized."""
+        soup = BeautifulSoup('<html><head><link rel="canonical" href="/page#top"></head></html>', 'html.parser')
+        self.assertEqual(get_canonical_url(soup, "https://example.com/page?utm_source=x"), "https://example.com/page")
+
+
+class TestCrawlerRobotsMeta(unittest.TestCase):
+    """Test suite for honoring page-level directives while crawling."""
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.folder = tempfile.mkdtemp()
+        os.chdir(self.folder)
+        self.base_url = "https://example.com"
+        self.sitemap = SitemapManager(self.base_url)
+        self.robots_parser = Mock()
+        self.robots_parser.is_allowed.return_value = True
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.folder)
+
+    def crawl_pages(self, pages, **kwargs):
+        with patch('crawler.fetch_page', side_effect=lambda url: pages.get(url)), patch('time.sleep'):
+            crawl(self.base_url, self.sitemap, self.base_url, self.robots_parser, max_pages=10, **kwargs)
+        return self.sitemap
+
+    def test_canonical_duplicate_skipped(self):
+        """A page whose canonical URL was already crawled is not stored again."""
+        pages = {
+            "https://example.com": "<html><body><h1>Home</h1><a href='/a'>A</a></body></html>",
+            "https://example.com/a": "<html><body><p>Article</p><a href='/a?print=1'>Print</a></body></html>",
+            "https://example.com/a?print=1": "<html><head><link rel='canonical' href='/a'></head>"
+                                             "<body><p>Article, printable</p></body></html>",
+        }
+        sitemap = self.crawl_pages(pages)
+        self.assertIn("https://example.com/a", sitemap.page_contents)
+        self.assertNotIn("https://example.com/a?print=1", sitemap.page_contents)
+
+    def test_canonical_url_not_fetched_again(self):
+        """The canonical URL of a crawled page is not queued or fetched."""
+        pages = {
+            "https://example.com": "<html><head><link rel='canonical' href='/home'></head>"
+                                   "<body><h1>Home</h1><a href='/home'>Home</a></body></html>",
+        }
+        with patch('crawler.fetch_page', side_effect=lambda url: pages.get(url)) as fetch, patch('time.sleep'):
+            crawl(self.base_url, self.sitemap, self.base_url, self.robots_parser, max_pages=10)
+        fetch.assert_called_once_with(self.base_url)
+        self.assertNotIn("https://example.com/home", self.sitemap.unvisited_urls)
+
+    def test_noindex_not_stored(self):
+        """Pages marked noindex are crawled for links but their content is not stored."""
+        pages = {
+            "https://example.com": FetchedPage(self.base_url, 200, "OK", {'X-Robots-Tag': 'noindex'},
+                                               b"<html><body><h1>Home</h1><a href='/next'>Next</a></body></html>"),
+            "https://example.com/next": "<html><body><p>Next</p></body></html>",
+        }
+        sitemap = self.crawl_pages(pages)
+        self.assertNotIn(self.base_url, sitemap.page_contents)
+        self.assertIn("https://example.com/next", sitemap.page_contents)
+
+    def test_nofollow_links_not_queued(self):
+        """Links marked rel=nofollow are recorded as edges but not crawled."""
+        pages = {
+            "https://example.com": "<html><body><a href='/open'>Open</a>"
+                                   "<a href='/login' rel='nofollow'>Login</a></body></html>",
+            "https://example.com/open": "<html><body><p>Open</p></body></html>",
+        }
+        sitemap = self.crawl_pages(pages)
+        self.assertIn("https://example.com/open", sitemap.visited_urls)
+        self.assertNotIn("https://example.com/login", sitemap.visited_urls)
+        self.assertIn((self.base_url, "https://example.com/login"), sitemap.internal_edges)
+
+    def test_nofollow_is_per_anchor(self):
+        """A nofollow anchor does not stop another anchor with the same href from being followed."""
+        pages = {
+            "https://example.com": "<html><body><a href='/docs' rel='nofollow'>Sponsored</a>"
+                                   "<a href='/docs'>Docs</a></body></html>",
+            "https://example.com/docs": "<html><body><p>Docs</p></body></html>",
+        }
+        sitemap = self.crawl_pages(pages)
+        self.assertIn("https://example.com/docs", sitemap.visited_urls)
+
+    def test_ignore_robots_meta(self):
+        """Directives are ignored when respect_robots_meta is False."""
+        pages = {
+            "https://example.com": "<html><head><meta name='robots' content='noindex, nofollow'></head>"
+                                   "<body><h1>Home</h1><a href='/next'>Next</a></body></html>",
+            "https://example.com/next": "<html><body><p>Next</p></body></html>",
+        }
+        sitemap = self.crawl_pages(pages, respect_robots_meta=False)
+        self.assertIn(self.base_url, sitemap.page_contents)
+        self.assertIn("https://example.com/next", sitemap.page_contents)
+
+if __name__ == '__main__':
+    unittest.main()
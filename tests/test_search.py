@@ -0,0 +1,135 @@
+"""Test cases for the full-text search index."""
+
+import io
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+from crawler import Crawler, SearchSink
+from extractors import get_extractor
+from search import SearchIndex, main
+
+PAGES = {
+    "https://example.com": "<html><head><title>Home</title></head><body><p>Welcome to the crawler docs.</p>"
+                           "<a href='/pricing'>Pricing</a><a href='/faq'>FAQ</a></body></html>",
+    "https://example.com/pricing": "<html><head><title>Pricing plans</title></head>"
+                                   "<body><p>Plans for every crawler team.</p></body></html>",
+    "https://example.com/faq": "<html><head><title>FAQ</title></head>"
+                               "<body><p>Which pricing plans exist? See the pricing page.</p></body></html>",
+}
+
+
+class TestSearch(unittest.TestCase):
+    """Test suite for SearchIndex, SearchSink and the search command."""
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, "search.sqlite")
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_batched_commits(self):
+        """Pages become visible to other connections once their batch is committed."""
+        index = SearchIndex(self.path, batch_size=2)
+        reader = SearchIndex(self.path)
+        index.add("https://example.com/a", "first page")
+        self.assertEqual(reader.search("page"), [])
+        index.add("https://example.com/b", "second page")
+        self.assertEqual(len(reader.search("page")), 2)
+        index.add("https://example.com/c", "third page")
+        index.close()
+        self.assertEqual(len(reader.search("page")), 3)
+        reader.close()
+
+    def test_upsert_by_url(self):
+        """Adding a URL again replaces its text instead of duplicating it."""
+        with SearchIndex(self.path) as index:
+            index.add("https://example.com/a", "old words")
+            index.add("https://example.com/a", "new words")
+            self.assertEqual(len(index), 1)
+            self.assertEqual(index.search("old"), [])
+            self.assertEqual([url for url, _, _, _ in index.search("new")], ["https://example.com/a"])
+        with SearchIndex(self.path) as index:
+            index.add("https://example.com/a", "newer words")
+            self.assertEqual(len(index), 1)
+            self.assertEqual(index.search("new"), [])
+
+    def test_ranking_and_snippet(self):
+        """Title matches rank first and matched words are marked in the snippet."""
+        with SearchIndex(self.path) as index:
+            index.add("https://example.com/faq", "Which pricing plans exist? See the pricing page.", "FAQ")
+            index.add("https://example.com/pricing", "Plans for every team.", "Pricing")
+            results = index.search("Pricing plan")
+            self.assertEqual([url for url, _, _, _ in results],
+                             ["https://example.com/pricing", "https://example.com/faq"])
+            self.assertEqual(results[0][1], "Pricing")
+            self.assertIn("[pricing] [plans]", results[1][2])
+            self.assertEqual(index.search('"plans"'), index.search('plans'))
+            self.assertEqual(index.search("   "), [])
+
+    def test_raw_query(self):
+        """Raw queries use FTS5 operators; plain queries treat them as words."""
+        with SearchIndex(self.path) as index:
+            index.add("https://example.com/a", "crawling robots")
+            index.add("https://example.com/b", "crawler pages")
+            self.assertEqual([url for url, _, _, _ in index.search("crawl* NOT robots", raw=True)],
+                             ["https://example.com/b"])
+            self.assertEqual(index.search("crawl* NOT robots"), [])
+
+    def test_read_only(self):
+        """A read-only index can search but leaves the file unchanged."""
+        with SearchIndex(self.path) as index:
+            index.add("https://example.com/a", "crawler docs")
+        with open(self.path, 'rb') as index_file:
+            before = index_file.read()
+        with SearchIndex(self.path, read_only=True) as index:
+            self.assertEqual(len(index.search("docs")), 1)
+            with self.assertRaises(sqlite3.OperationalError):
+                index.add("https://example.com/b", "more docs")
+        with open(self.path, 'rb') as index_file:
+            self.assertEqual(index_file.read(), before)
+
+    def test_segments_merged(self):
+        """Closing a writer merges the segments of its batches; optimize() can be run on demand."""
+        data_rows = "SELECT COUNT(*) FROM pages_data"
+        index = SearchIndex(self.path, batch_size=1)
+        for i in range(5):
+            index.add(f"https://example.com/{i}", f"page {i} docs")
+        written = index._connection.execute(data_rows).fetchone()[0]
+        index.close()
+        with SearchIndex(self.path, read_only=True) as index:
+            self.assertLess(index._connection.execute(data_rows).fetchone()[0], written)
+        with SearchIndex(self.path) as index:
+            index.optimize()
+            self.assertEqual(len(index.search("docs")), 5)
+
+    def test_crawl_indexes_pages(self):
+        """A crawl with a SearchSink indexes every page with its title."""
+        robots_parser = Mock()
+        robots_parser.is_allowed.return_value = True
+        index = SearchIndex(self.path)
+        with patch('crawler.fetch_page', side_effect=lambda url: PAGES.get(url)):
+            crawler = Crawler("https://example.com", robots_parser=robots_parser, delay=0,
+                              extractor=get_extractor('body'), sinks=[SearchSink(index, close_index=True)])
+            list(crawler.iter_pages())
+            crawler.close()
+        with SearchIndex(self.path) as index:
+            self.assertEqual(len(index), 3)
+            self.assertEqual([(url, title) for url, title, _, _ in index.search("pricing plans")],
+                             [("https://example.com/pricing", "Pricing plans"), ("https://example.com/faq", "FAQ")])
+
+    @patch('sys.stdout', new_callable=io.StringIO)
+    def test_command(self, mock_stdout):
+        with SearchIndex(self.path) as index:
+            index.add("https://example.com/a", "crawler docs", "Docs")
+        main([self.path, "docs"])
+        self.assertEqual(mock_stdout.getvalue(), "https://example.com/a\n  Docs\n  crawler [docs]\n")
+        main([self.path, "missing", "--optimize"])
+        self.assertIn("No matching pages.", mock_stdout.getvalue())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+"""Test cases for the sitemap edge index."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from sitemap import EdgeIndex, SitemapManager
+
+
+class TestEdgeIndex(unittest.TestCase):
+    """Test suite for deduplicated, counted link edges."""
+
+    def test_repeated_links_are_counted_once(self):
+        """Each distinct link is stored once with the number of times it was seen."""
+        edges = EdgeIndex()
+        self.assertTrue(edges.add("https://a.com/", "https://b.com/"))
+        self.assertFalse(edges.add("https://a.com/", "https://b.com/"))
+        edges.add("https://a.com/", "https://c.com/")
+        edges.add("https://c.com/", "https://a.com/")
+
+        self.assertEqual(len(edges), 3)
+        self.assertEqual(list(edges), [("https://a.com/", "https://b.com/"), ("https://a.com/", "https://c.com/"),
+                                       ("https://c.com/", "https://a.com/")])
+        self.assertEqual(edges.count("https://a.com/", "https://b.com/"), 2)
+        self.assertEqual(edges.count("https://b.com/", "https://a.com/"), 0)
+        self.assertIn(("https://c.com/", "https://a.com/"), edges)
+        self.assertNotIn(("https://b.com/", "https://c.com/"), edges)
+        self.assertEqual(edges.targets("https://a.com/"), ["https://b.com/", "https://c.com/"])
+        self.assertEqual(edges.targets("https://unknown.com/"), [])
+        self.assertEqual(edges.id_pairs(), [(0, 1), (0, 2), (2, 0)])
+
+    def test_sitemap_renders_unique_external_edges(self):
+        """A link repeated on a page is one edge per page, drawn once with its count."""
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+        cwd = os.getcwd()
+        os.chdir(folder)
+        self.addCleanup(os.chdir, cwd)
+
+        sitemap = SitemapManager("https://example.com", autosave=False)
+        pages = ["https://example.com", "https://example.com/a", "https://example.com/b"]
+        for page in pages:
+            sitemap.add_external_edge(page, "https://social.com/")
+            sitemap.add_external_edge(page, "https://social.com/")
+        self.assertEqual(len(sitemap.external_edges), 3)
+        self.assertEqual(list(sitemap.external_edges.items()),
+                         [(page, "https://social.com/", 2) for page in pages])
+        dot = sitemap.render_sitemap()
+        self.assertEqual(dot.count('-> "https://social.com/"'), 3)
+        self.assertEqual(dot.count('label="2"'), 3)
+
+    def test_queue_membership(self):
+        """A queued URL is not queued twice, and can be queued again once taken."""
+        sitemap = SitemapManager("https://example.com", autosave=False)
+        sitemap.add_url("https://example.com", "/a")
+        sitemap.add_url("https://example.com/b", "/a")
+        self.assertEqual(sitemap.unvisited_urls, ["https://example.com/a"])
+        self.assertEqual(sitemap.get_next_url(), "https://example.com/a")
+        self.assertEqual(sitemap.queued_urls, set())
+        sitemap.add_url("https://example.com", "/a")
+        self.assertEqual(sitemap.unvisited_urls, ["https://example.com/a"])
+
+    def test_cross_links_are_linear(self):
+        """Pages without a parent are joined to the first one, not to each other."""
+        sitemap = SitemapManager("https://example.com", autosave=False)
+        for i in range(4):
+            sitemap.mark_visited(f"https://example.com/{i}")
+        cross_links = sitemap.render_sitemap().split("Cross-Links")[1].split("External Links")[0]
+        self.assertEqual(cross_links.count('->'), 3)
+
+if __name__ == '__main__':
+    unittest.main()
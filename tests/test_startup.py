@@ -0,0 +1,35 @@
+"""Test cases for the command line startup path."""
+
+import io
+import os
+import subprocess
+import sys
+import unittest
+from unittest.mock import patch
+
+import crawler
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class TestStartup(unittest.TestCase):
+    """Test suite for lazy imports and the console entry point."""
+
+    def test_import_is_lean(self):
+        """Importing the crawler loads no HTTP, HTML or optional feature modules."""
+        heavy = ['requests', 'bs4', 'xlsxwriter', 'linkcheck', 'extractors', 'render', 'dns_cache', 'pagestore',
+                 'warc', 'xml.sax.saxutils', 'robots_cache', 'concurrent.futures',
+                 'memory', 'sqlite3', 'search']
+        code = f"import sys, crawler; print([name for name in {heavy!r} if name in sys.modules])"
+        result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), '[]')
+
+    @patch('sys.stdout', new_callable=io.StringIO)
+    def test_main_help(self, mock_stdout):
+        """main() parses the given arguments."""
+        with self.assertRaises(SystemExit) as context:
+            crawler.main(['--help'])
+        self.assertEqual(context.exception.code, 0)
+        self.assertIn('--output-format', mock_stdout.getvalue())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,266 @@
+"""Test cases for the HTTP backends."""
+
+import asyncio
+import gzip
+import importlib.util
+import socket
+import threading
+import unittest
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+from crawler import fetch_page, parse_html
+from limits import CrawlBudget
+from transport import FetchedPage, RequestsBackend, HttpxBackend, TransportStats, supported_encodings, get_backend
+
+PAGE = ("<html><body>" + "<p>Repeated paragraph text.</p>" * 200 + "</body></html>").encode('utf-8')
+
+HAS_HTTPX = bool(importlib.util.find_spec('httpx') and importlib.util.find_spec('h2'))
+
+
+def compress(encoding, data):
+    """Compresses data with a content-encoding, using whichever library is installed."""
+    if encoding == 'gzip':
+        return gzip.compress(data)
+    if encoding == 'deflate':
+        return zlib.compress(data)
+    if encoding == 'br':
+        try:
+            import brotlicffi as brotli
+        except ImportError:
+            import brotli
+        return brotli.compress(data)
+    if encoding == 'zstd':
+        try:
+            from backports import zstd
+            return zstd.compress(data)
+        except ImportError:
+            import zstandard
+            return zstandard.ZstdCompressor().compress(data)
+    raise ValueError(encoding)
+
+
+def negotiate(path, accept_encoding):
+    """Returns the body and content-encoding to serve for a request.
+
+    /enc/<encoding> asks for that encoding if the client accepts it; any
+    other page is gzip-encoded if the client accepts gzip.
+    """
+    accepted = [encoding.strip() for encoding in accept_encoding.split(',')]
+    wanted = path[len('/enc/'):] if path.startswith('/enc/') else 'gzip'
+    if wanted in accepted:
+        return compress(wanted, PAGE), wanted
+    return PAGE, None
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if self.path == '/missing':
+            self.send_error(404)
+            return
+        body, encoding = negotiate(self.path, self.headers.get('Accept-Encoding', ''))
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestTransport(unittest.TestCase):
+    """Test suite for content negotiation, error handling and statistics."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_supported_encodings(self):
+        """gzip and deflate are always offered, after brotli and zstd."""
+        encodings = supported_encodings()
+        self.assertEqual(encodings[-2:], ['gzip', 'deflate'])
+        with self.assertRaises(ValueError):
+            supported_encodings('ftp')
+
+    def test_encodings_follow_library(self):
+        """Only encodings urllib3 itself can decode are offered, whatever else is installed."""
+        with patch('urllib3.util.request.ACCEPT_ENCODING', 'gzip,deflate,br'):
+            self.assertEqual(supported_encodings('requests'), ['br', 'gzip', 'deflate'])
+        with patch('urllib3.util.request.ACCEPT_ENCODING', 'gzip,deflate'):
+            self.assertEqual(RequestsBackend().accept_encoding, 'gzip, deflate')
+
+    def test_encoding_round_trip(self):
+        """Every encoding the requests backend offers is decoded back to the page."""
+        backend = RequestsBackend()
+        encodings = supported_encodings('requests')
+        for encoding in encodings:
+            with self.subTest(encoding=encoding):
+                page = backend.fetch(f"{self.base_url}/enc/{encoding}")
+                self.assertEqual(page.content, PAGE)
+        backend.close()
+        self.assertEqual(backend.stats.summary()['HTTP/1.1']['encodings'], dict.fromkeys(encodings, 1))
+
+    def test_compressed_response(self):
+        """A gzip response is decoded and its wire size recorded."""
+        backend = RequestsBackend()
+        page = backend.fetch(self.base_url + '/')
+        backend.close()
+        self.assertEqual(page.content, PAGE)
+        self.assertEqual(page.text, PAGE.decode('utf-8'))
+        self.assertEqual(page.http_version, 'HTTP/1.1')
+        stats = backend.stats.summary()['HTTP/1.1']
+        self.assertEqual(stats['requests'], 1)
+        self.assertEqual(stats['encodings'], {'gzip': 1})
+        self.assertEqual(stats['body_bytes'], len(PAGE))
+        self.assertLess(stats['wire_bytes'], len(PAGE) / 10)
+        self.assertGreater(stats['compression_ratio'], 10)
+
+    def test_fetched_page_decoding(self):
+        """Without a declared charset, the parser detects it from the document."""
+        body = '<html><head><meta charset="iso-8859-1"></head><body>café</body></html>'.encode('latin-1')
+        page = FetchedPage("http://example.com/", 200, "OK", {}, body)
+        self.assertEqual(parse_html(page).body.get_text(), "café")
+        self.assertEqual(FetchedPage("http://example.com/", 200, "OK", {}, body, 'latin-1').text.count("é"), 1)
+        self.assertFalse(FetchedPage("http://example.com/", 200, "OK", {}, b""))
+
+    def test_http_error(self):
+        """HTTP errors and connection failures return None and count as errors."""
+        backend = RequestsBackend(timeout=2)
+        self.assertIsNone(fetch_page(self.base_url + '/missing', backend=backend))
+        self.assertIsNone(fetch_page("http://127.0.0.1:1/", backend=backend))
+        backend.close()
+        self.assertEqual(backend.stats.summary()['HTTP/1.1']['errors'], 2)
+
+    def test_budget_charged_with_wire_bytes(self):
+        """Each backend charges the budget with wire bytes, error responses included."""
+        backends = [RequestsBackend(timeout=2)] + ([HttpxBackend(timeout=2)] if HAS_HTTPX else [])
+        for backend in backends:
+            with self.subTest(backend=backend.name):
+                budget = CrawlBudget()
+                fetch_page(self.base_url + '/', backend=backend, budget=budget)
+                wire_bytes = budget.bytes_downloaded
+                self.assertLess(wire_bytes, len(PAGE) / 10)
+                self.assertIsNone(fetch_page(self.base_url + '/missing', backend=backend, budget=budget))
+                self.assertGreater(budget.bytes_downloaded, wire_bytes)
+                backend.close()
+
+    def test_stats_summary(self):
+        """Summaries compute ratios, averages and bandwidth per protocol."""
+        stats = TransportStats()
+        stats.record('HTTP/2', 0.5, 1024, 4096, 'br')
+        stats.record('HTTP/2', 1.5, 1024, 4096, 'br', error=True)
+        summary = stats.summary()['HTTP/2']
+        self.assertEqual(summary['requests'], 2)
+        self.assertEqual(summary['errors'], 1)
+        self.assertEqual(summary['compression_ratio'], 4.0)
+        self.assertEqual(summary['avg_latency_ms'], 1000.0)
+        self.assertEqual(summary['max_latency_ms'], 1500.0)
+        self.assertEqual(summary['bandwidth_kbps'], 1.0)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            get_backend('ftp')
+
+    @unittest.skipUnless(HAS_HTTPX, "httpx[http2] is not installed")
+    def test_httpx_backend(self):
+        """The httpx backend falls back to HTTP/1.1 and decodes the response."""
+        backend = HttpxBackend(timeout=2)
+        page = backend.fetch(self.base_url + '/')
+        backend.close()
+        self.assertEqual(page.content, PAGE)
+        self.assertEqual(page.http_version, 'HTTP/1.1')
+        self.assertEqual(backend.stats.summary()['HTTP/1.1']['encodings'], {'gzip': 1})
+
+
+async def h2_app(scope, receive, send):
+    """ASGI app serving PAGE with the same negotiation as Handler."""
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            await send({'type': message['type'] + '.complete'})
+            if message['type'] == 'lifespan.shutdown':
+                return
+    headers = dict(scope['headers'])
+    body, encoding = negotiate(scope['path'], headers.get(b'accept-encoding', b'').decode())
+    response_headers = [(b'content-type', b'text/html; charset=utf-8'),
+                        (b'content-length', str(len(body)).encode())]
+    if encoding:
+        response_headers.append((b'content-encoding', encoding.encode()))
+    await send({'type': 'http.response.start', 'status': 200, 'headers': response_headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+@unittest.skipUnless(HAS_HTTPX and importlib.util.find_spec('hypercorn'), "httpx[http2] or hypercorn is not installed")
+class TestHttp2(unittest.TestCase):
+    """Fetches from a local cleartext HTTP/2 server with the httpx backend."""
+
+    @classmethod
+    def setUpClass(cls):
+        from hypercorn.asyncio import serve
+        from hypercorn.config import Config
+
+        server_socket = socket.socket()
+        server_socket.bind(('127.0.0.1', 0))
+        cls.base_url = f"http://127.0.0.1:{server_socket.getsockname()[1]}"
+        config = Config()
+        config.bind = [f"fd://{server_socket.detach()}"]  # hypercorn takes over and closes the socket
+        config.accesslog = config.errorlog = None
+        cls.loop = asyncio.new_event_loop()
+        cls.stopped = asyncio.Event()
+        started = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(cls.loop)
+            cls.loop.call_soon(started.set)
+            cls.loop.run_until_complete(serve(h2_app, config, shutdown_trigger=cls.stopped.wait))
+
+        cls.thread = threading.Thread(target=run, daemon=True)
+        cls.thread.start()
+        started.wait()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.loop.call_soon_threadsafe(cls.stopped.set)
+        cls.thread.join(5)
+        cls.loop.close()
+
+    def setUp(self):
+        self.backend = HttpxBackend(timeout=5, prior_knowledge=True)
+
+    def tearDown(self):
+        self.backend.close()
+
+    def test_http2_requests(self):
+        """Concurrent requests are served over HTTP/2 and decoded."""
+        with ThreadPoolExecutor(4) as executor:
+            pages = list(executor.map(self.backend.fetch, [f"{self.base_url}/{i}" for i in range(8)]))
+        self.assertTrue(all(page.content == PAGE and page.http_version == 'HTTP/2' for page in pages))
+        stats = self.backend.stats.summary()
+        self.assertEqual(list(stats), ['HTTP/2'])
+        self.assertEqual(stats['HTTP/2']['encodings'], {'gzip': 8})
+
+    def test_encoding_round_trip(self):
+        """Every encoding the httpx backend offers is decoded back to the page."""
+        encodings = supported_encodings('httpx')
+        for encoding in encodings:
+            with self.subTest(encoding=encoding):
+                page = self.backend.fetch(f"{self.base_url}/enc/{encoding}")
+                self.assertEqual(page.content, PAGE)
+        self.assertEqual(self.backend.stats.summary()['HTTP/2']['encodings'], dict.fromkeys(encodings, 1))
+
+if __name__ == '__main__':
+    unittest.main()
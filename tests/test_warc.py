@@ -0,0 +1,93 @@
+"""Test cases for WARC archiving and offline reprocessing."""
+
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+
+import responses
+
+from crawler import crawl
+from reprocess import reprocess
+from sitemap import SitemapManager
+from warc import WarcWriter, index_warc_records, iter_warc_records, parse_http_response
+
+class TestWarcArchive(unittest.TestCase):
+    """Test suite for writing responses and rebuilding output from them."""
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.folder = tempfile.mkdtemp()
+        os.chdir(self.folder)
+        self.base_url = "https://example.com/"
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.folder)
+
+    def test_write_and_read_response(self):
+        """Archived responses keep their status, headers and body."""
+        with WarcWriter("warc", "example.com") as writer:
+            writer.write_response("https://example.com/", 200, "OK",
+                                  {'Content-Type': 'text/html', 'Content-Encoding': 'gzip'}, b"<html></html>")
+
+        records = list(iter_warc_records(writer.paths[0]))
+        self.assertEqual([headers['WARC-Type'] for headers, _ in records], ['warcinfo', 'response'])
+        status_code, headers, body = parse_http_response(records[1][1])
+        self.assertEqual(status_code, 200)
+        self.assertEqual(headers['content-type'], 'text/html')
+        self.assertNotIn('content-encoding', headers)
+        self.assertEqual(body, b"<html></html>")
+
+    def test_rotation(self):
+        """A new archive file is started once the current one is full."""
+        with WarcWriter("warc", "example.com", max_size=1) as writer:
+            writer.write_response("https://example.com/a", 200, "OK", {}, b"a")
+            writer.write_response("https://example.com/b", 200, "OK", {}, b"b")
+        self.assertEqual(len(writer.paths), 2)
+
+    def test_record_offsets(self):
+        """Records can be read from the offsets found by indexing, in plain and gzip files."""
+        with WarcWriter("warc", "example.com") as writer:
+            for name in "abc":
+                writer.write_response(f"https://example.com/{name}", 200, "OK", {}, name.encode() * 1000)
+        with open(writer.paths[0], 'rb') as compressed, open("plain.warc", 'wb') as plain:
+            plain.write(gzip.decompress(compressed.read()))
+        for path in (writer.paths[0], "plain.warc"):
+            offsets = index_warc_records(path)
+            self.assertEqual(len(offsets), 4)
+            records = list(iter_warc_records(path, offsets[2], 1))
+            self.assertEqual([headers['WARC-Target-URI'] for headers, _ in records], ["https://example.com/b"])
+            self.assertEqual(len(list(iter_warc_records(path, offsets[1]))), 3)
+        with open(writer.paths[0], 'ab') as compressed:
+            compressed.write(gzip.compress(b"WARC/1.1\r\n")[:10])
+        self.assertEqual(len(index_warc_records(writer.paths[0])), 4)
+
+    @responses.activate
+    def test_crawl_then_reprocess(self):
+        """Reprocessing an archived crawl rebuilds the same pages and links."""
+        responses.add(responses.GET, "https://example.com/robots.txt", status=404)
+        responses.add(responses.GET, self.base_url, content_type='text/html',
+                      body="<html><body><h1>Home</h1><a href='/about'>About</a>"
+                           "<a href='https://external.com/'>Out</a></body></html>")
+        responses.add(responses.GET, "https://example.com/about", content_type='text/html',
+                      body="<html><body><h1>About</h1></body></html>")
+
+        sitemap = SitemapManager(self.base_url)
+        with WarcWriter("warc", "example.com") as archive:
+            crawl(self.base_url, sitemap, self.base_url, max_pages=2, archive=archive)
+        self.assertEqual(archive.record_count, 2)
+
+        rebuilt = reprocess(archive.paths, processes=1)
+        self.assertEqual(rebuilt.visited_urls, sitemap.visited_urls)
+        self.assertEqual(rebuilt.page_contents, sitemap.page_contents)
+        self.assertEqual(list(rebuilt.external_edges), [(self.base_url, "https://external.com/")])
+
+        # Ranges of one record each, spread over two processes, give the same result
+        split = reprocess(archive.paths, processes=2, records_per_task=1)
+        self.assertEqual(split.visited_urls, sitemap.visited_urls)
+        self.assertEqual(split.page_contents, sitemap.page_contents)
+
+if __name__ == '__main__':
+    unittest.main()
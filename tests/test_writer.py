@@ -0,0 +1,74 @@
+"""Test cases for the background output writer."""
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from sitemap import SitemapManager
+from writer import BackgroundWriter
+
+class TestBackgroundWriter(unittest.TestCase):
+    """Test suite for batched appends and coalesced rewrites."""
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, "content.txt")
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_appends_are_written_in_order(self):
+        """Queued appends end up in the file in submission order."""
+        with BackgroundWriter() as writer:
+            for i in range(100):
+                writer.append(self.path, f"{i}\n")
+        with open(self.path) as output_file:
+            self.assertEqual(output_file.read(), "".join(f"{i}\n" for i in range(100)))
+
+    def test_appends_are_batched(self):
+        """Appends queued while the worker is busy are written in one call."""
+        release = threading.Event()
+        with BackgroundWriter() as writer:
+            writer.replace(os.path.join(self.folder, "slow.txt"), lambda: release.wait() and "done")
+            for i in range(50):
+                writer.append(self.path, "x")
+            release.set()
+            writer.flush()
+            self.assertLessEqual(writer.write_calls, 3)
+        with open(self.path) as output_file:
+            self.assertEqual(output_file.read(), "x" * 50)
+
+    def test_replace_is_coalesced(self):
+        """Only the latest pending rewrite of a file is rendered."""
+        release = threading.Event()
+        rendered = []
+        path = os.path.join(self.folder, "sitemap.dot")
+        with BackgroundWriter() as writer:
+            writer.replace(os.path.join(self.folder, "slow.txt"), lambda: release.wait() and "done")
+            for i in range(10):
+                writer.replace(path, lambda i=i: rendered.append(i) or str(i))
+            release.set()
+        self.assertEqual(rendered, [9])
+        with open(path) as output_file:
+            self.assertEqual(output_file.read(), "9")
+
+    def test_sitemap_uses_writer(self):
+        """Sitemap rewrites are handed to the writer and land on disk on close."""
+        cwd = os.getcwd()
+        os.chdir(self.folder)
+        try:
+            with BackgroundWriter() as writer:
+                sitemap = SitemapManager("http://example.com", writer=writer)
+                sitemap.mark_visited("http://example.com")
+                sitemap.add_external_edge("http://example.com", "http://external.com")
+            dot_files = [name for name in os.listdir(sitemap.output_folder) if name.endswith(".dot")]
+            self.assertEqual(len(dot_files), 1)
+            with open(os.path.join(sitemap.output_folder, dot_files[0])) as dot_file:
+                self.assertIn('"http://example.com" -> "http://external.com"', dot_file.read())
+        finally:
+            os.chdir(cwd)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,305 @@
+"""HTTP backends used to fetch pages, with per-protocol transfer statistics.
+
+Two backends are available. RequestsBackend keeps a connection pool per
+thread and speaks HTTP/1.1. HttpxBackend uses one shared httpx client that
+can negotiate HTTP/2, multiplexing concurrent requests to a host over a
+single connection. Each advertises exactly the content-encodings its HTTP
+library can decode: gzip and deflate always, brotli and zstd depending on
+the library version and the compression packages installed. httpx and h2
+are only imported when HttpxBackend is used.
+"""
+
+import importlib.util
+import threading
+import time
+
+from config import CONNECT_TIMEOUT, READ_TIMEOUT
+
+
+class FetchedPage:
+    """The raw body of a fetched page and its HTTP response details.
+
+    Only the body bytes are kept. The text is decoded from them each time the
+    text attribute is read, so a page is not held in memory twice; the HTML
+    parser reads the bytes directly.
+
+    Args:
+        url (str): Final URL after redirects
+        status_code (int): HTTP status code
+        reason (str): HTTP reason phrase
+        headers (Mapping): Response headers
+        content (bytes): Response body with any content-encoding removed
+        encoding (str, optional): Charset declared in the Content-Type header.
+            If omitted, the parser detects it from the document and text
+            decodes as UTF-8.
+        http_version (str, optional): Protocol used, e.g. 'HTTP/1.1' or 'HTTP/2'
+    """
+    __slots__ = ('url', 'status_code', 'reason', 'headers', 'content', 'encoding', 'http_version')
+
+    def __init__(self, url, status_code, reason, headers, content, encoding=None, http_version=None):
+        self.url = url
+        self.status_code = status_code
+        self.reason = reason
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding
+        self.http_version = http_version
+
+    @property
+    def text(self):
+        """The body decoded as text."""
+        try:
+            return self.content.decode(self.encoding or 'utf-8', errors='replace')
+        except LookupError:
+            return self.content.decode('utf-8', errors='replace')
+
+    def __bool__(self):
+        return bool(self.content)
+
+
+# Content-encodings in order of preference
+ENCODING_PREFERENCE = ('zstd', 'br', 'gzip', 'deflate')
+
+
+def supported_encodings(backend='requests'):
+    """Returns the content-encodings a backend's HTTP library can decode, best first.
+
+    Installing a compression package is not enough: urllib3 before 2.0 and
+    httpx before 0.27.1 cannot decode zstd, and urllib3 2.x uses
+    backports.zstd rather than zstandard. So the list is taken from the
+    library itself, urllib3's ACCEPT_ENCODING for requests and httpx's
+    registered decoders for httpx.
+
+    Args:
+        backend (str): 'requests' or 'httpx'
+    """
+    if backend == 'httpx':
+        from httpx._decoders import SUPPORTED_DECODERS
+        available = set(SUPPORTED_DECODERS)
+    elif backend == 'requests':
+        from urllib3.util.request import ACCEPT_ENCODING
+        available = {encoding.strip() for encoding in ACCEPT_ENCODING.split(',')}
+    else:
+        raise ValueError(f"Unknown HTTP library: {backend}")
+    return [encoding for encoding in ENCODING_PREFERENCE if encoding in available]
+
+
+def _timeout_pair(timeout):
+    if timeout is None:
+        return CONNECT_TIMEOUT, READ_TIMEOUT
+    if isinstance(timeout, (int, float)):
+        return timeout, timeout
+    return timeout
+
+
+class TransportStats:
+    """Counts requests, errors, bytes and latency for each HTTP version."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._protocols = {}
+
+    def record(self, http_version, latency, wire_bytes=0, body_bytes=0, encoding=None, error=False):
+        """Records one request.
+
+        Args:
+            http_version (str): Protocol used, e.g. 'HTTP/1.1' or 'HTTP/2'
+            latency (float): Seconds from sending the request to reading the body
+            wire_bytes (int): Body bytes received before decoding
+            body_bytes (int): Body bytes after decoding
+            encoding (str, optional): Content-Encoding of the response
+            error (bool): Whether the request failed
+        """
+        with self._lock:
+            stats = self._protocols.get(http_version)
+            if stats is None:
+                stats = self._protocols[http_version] = {'requests': 0, 'errors': 0, 'wire_bytes': 0,
+                                                         'body_bytes': 0, 'total_latency': 0.0,
+                                                         'max_latency': 0.0, 'encodings': {}}
+            stats['requests'] += 1
+            stats['errors'] += error
+            stats['wire_bytes'] += wire_bytes
+            stats['body_bytes'] += body_bytes
+            stats['total_latency'] += latency
+            stats['max_latency'] = max(stats['max_latency'], latency)
+            encoding = encoding or 'identity'
+            stats['encodings'][encoding] = stats['encodings'].get(encoding, 0) + 1
+
+    def summary(self):
+        """Returns the statistics for each protocol.
+
+        Returns:
+            dict: http_version -> dict with 'requests', 'errors', 'wire_bytes',
+            'body_bytes', 'compression_ratio', 'avg_latency_ms', 'max_latency_ms',
+            'bandwidth_kbps' and 'encodings' (count per content-encoding)
+        """
+        with self._lock:
+            protocols = {version: dict(stats, encodings=dict(stats['encodings']))
+                         for version, stats in self._protocols.items()}
+        for stats in protocols.values():
+            total_latency = stats.pop('total_latency')
+            stats['compression_ratio'] = stats['body_bytes'] / stats['wire_bytes'] if stats['wire_bytes'] else 1.0
+            stats['avg_latency_ms'] = total_latency / stats['requests'] * 1000 if stats['requests'] else 0.0
+            stats['max_latency_ms'] = stats.pop('max_latency') * 1000
+            stats['bandwidth_kbps'] = stats['wire_bytes'] / total_latency / 1024 if total_latency else 0.0
+        return protocols
+
+
+class RequestsBackend:
+    """Fetches pages over HTTP/1.1 with requests, reusing connections per thread.
+
+    Args:
+        timeout (float or tuple, optional): Default timeout in seconds, or a
+            (connect, read) pair. Defaults to CONNECT_TIMEOUT and READ_TIMEOUT.
+    """
+    name = 'requests'
+
+    def __init__(self, timeout=None):
+        self.timeout = _timeout_pair(timeout)
+        self.stats = TransportStats()
+        self.accept_encoding = ', '.join(supported_encodings(self.name))
+        self._local = threading.local()
+        self._sessions = []
+        self._lock = threading.Lock()
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            import requests
+            session = self._local.session = requests.Session()
+            session.headers['Accept-Encoding'] = self.accept_encoding
+            with self._lock:
+                self._sessions.append(session)
+        return session
+
+    def fetch(self, url, timeout=None, budget=None):
+        """Fetches a URL.
+
+        Args:
+            url (str): The URL to fetch
+            timeout (float or tuple, optional): Timeout overriding the default
+            budget (CrawlBudget, optional): Charged with the bytes read off the
+                wire for every response, error responses included
+
+        Returns:
+            FetchedPage: The decoded page, or None if the request failed or
+            returned an HTTP error status
+        """
+        import requests
+        start = time.perf_counter()
+        try:
+            response = self._session().get(url, timeout=_timeout_pair(timeout) if timeout else self.timeout)
+            content = response.content
+        except requests.exceptions.RequestException:
+            self.stats.record('HTTP/1.1', time.perf_counter() - start, error=True)
+            return None
+        http_version = {10: 'HTTP/1.0', 11: 'HTTP/1.1'}.get(response.raw.version, 'HTTP/1.1')
+        # raw.tell() counts the bytes read off the wire, before content decoding
+        wire_bytes = response.raw.tell() or len(content)
+        self.stats.record(http_version, time.perf_counter() - start, wire_bytes,
+                          len(content), response.headers.get('Content-Encoding'), not response.ok)
+        if budget is not None:
+            budget.charge(wire_bytes)
+        if not response.ok:
+            return None
+        # requests falls back to ISO-8859-1 for text/* without a charset; leave detection to the parser instead
+        encoding = response.encoding if 'charset' in response.headers.get('Content-Type', '').lower() else None
+        # The raw headers keep repeated header lines apart, unlike response.headers
+        return FetchedPage(response.url, response.status_code, response.reason, response.raw.headers, content,
+                           encoding, http_version)
+
+    def close(self):
+        """Closes the sessions of every thread."""
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            session.close()
+        self._local = threading.local()
+
+
+class HttpxBackend:
+    """Fetches pages with httpx, negotiating HTTP/2 where the server supports it.
+
+    One client is shared by all threads, so concurrent requests to a host are
+    multiplexed over a single HTTP/2 connection.
+
+    Args:
+        timeout (float or tuple, optional): Default timeout in seconds, or a
+            (connect, read) pair. Defaults to CONNECT_TIMEOUT and READ_TIMEOUT.
+        http2 (bool): Offer HTTP/2
+        prior_knowledge (bool): Speak HTTP/2 without negotiation, needed for
+            cleartext http:// servers that only accept HTTP/2
+        max_connections (int): Maximum open connections across all hosts
+    """
+    name = 'httpx'
+
+    def __init__(self, timeout=None, http2=True, prior_knowledge=False, max_connections=100):
+        try:
+            import httpx
+        except ImportError:
+            raise ImportError("The httpx backend requires the 'httpx' package (pip install 'httpx[http2]')")
+        if http2 and not importlib.util.find_spec('h2'):
+            raise ImportError("HTTP/2 requires the 'h2' package (pip install 'httpx[http2]')")
+        self._httpx = httpx
+        self._protocol = 'HTTP/2' if http2 else 'HTTP/1.1'  # reported for requests that fail before a response
+        self.timeout = _timeout_pair(timeout)
+        self.stats = TransportStats()
+        self.accept_encoding = ', '.join(supported_encodings(self.name))
+        self.client = httpx.Client(http1=not prior_knowledge, http2=http2, follow_redirects=True,
+                                   timeout=self._timeout(self.timeout),
+                                   limits=httpx.Limits(max_connections=max_connections),
+                                   headers={'Accept-Encoding': self.accept_encoding})
+
+    def _timeout(self, timeout):
+        connect, read = timeout
+        return self._httpx.Timeout(read, connect=connect)
+
+    def fetch(self, url, timeout=None, budget=None):
+        """Fetches a URL.
+
+        Args:
+            url (str): The URL to fetch
+            timeout (float or tuple, optional): Timeout overriding the default
+            budget (CrawlBudget, optional): Charged with the bytes read off the
+                wire for every response, error responses included
+
+        Returns:
+            FetchedPage: The decoded page, or None if the request failed or
+            returned an HTTP error status
+        """
+        start = time.perf_counter()
+        try:
+            if timeout:
+                response = self.client.get(url, timeout=self._timeout(_timeout_pair(timeout)))
+            else:
+                response = self.client.get(url)
+            content = response.content
+        except self._httpx.HTTPError:
+            self.stats.record(self._protocol, time.perf_counter() - start, error=True)
+            return None
+        self.stats.record(response.http_version, time.perf_counter() - start, response.num_bytes_downloaded,
+                          len(content), response.headers.get('content-encoding'), response.is_error)
+        if budget is not None:
+            budget.charge(response.num_bytes_downloaded)
+        if response.is_error:
+            return None
+        return FetchedPage(str(response.url), response.status_code, response.reason_phrase, response.headers,
+                           content, response.charset_encoding, response.http_version)
+
+    def close(self):
+        """Closes the client and its connections."""
+        self.client.close()
+
+
+BACKENDS = {
+    'requests': RequestsBackend,
+    'http2': HttpxBackend,
+}
+
+
+def get_backend(name, timeout=None):
+    """Creates one of the backends in BACKENDS by name."""
+    try:
+        return BACKENDS[name](timeout)
+    except KeyError:
+        raise ValueError(f"Unknown HTTP backend: {name}")
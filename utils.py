@@ -1,12 +1,12 @@
 """Utility functions for web crawling and URL handling."""
 
 import logging
-import requests
 import time
 import os
 from urllib.parse import urlparse, urljoin
 import re
 from urllib.parse import urlparse, urlunparse, parse_qs, urlencode
+from config import CONNECT_TIMEOUT, READ_TIMEOUT
 
 # HTML Processing Functions
 def extract_text_from_html(soup):
@@ -65,25 +65,55 @@ def save_content(url, text):
 class RobotsParser:
     """Handles fetching and parsing of robots.txt files."""
     
-    def __init__(self, base_url):
-        """Initialize with base URL and fetch robots.txt."""
+    def __init__(self, base_url, fetch=True):
+        """Initialize with base URL and fetch robots.txt unless fetch is False."""
         self.base_url = base_url
         self.robots_url = urljoin(base_url, '/robots.txt')
         self.crawl_delay = 0  # Default no delay
         self.rules = {'*': {'disallow': [], 'allow': []}}  # Default all allowed
         self.last_request_time = 0
-        self.fetch_and_parse()
+        self._compile()
+        if fetch:
+            self.fetch_and_parse()
     
     def fetch_and_parse(self):
-        """Fetch and parse the robots.txt file."""
+        """Fetch and parse the robots.txt file.
+        
+        Returns:
+            bool: True if the server gave a definitive answer (the file or a 4xx
+            status meaning there are no rules), False on server or network errors
+        """
+        import requests
         try:
-            response = requests.get(self.robots_url, timeout=10)
+            response = requests.get(self.robots_url, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
             if response.status_code == 200:
                 self._parse_robots_txt(response.text)
-            else:
-                logging.warning(f"No robots.txt found at {self.robots_url}")
+                return True
+            logging.warning(f"No robots.txt found at {self.robots_url}")
+            return response.status_code < 500
         except Exception as e:
             logging.error(f"Error fetching robots.txt: {e}")
+            return False
+
+    def to_dict(self):
+        """Returns the parsed rules as JSON-serializable data."""
+        return {'base_url': self.base_url, 'rules': self.rules, 'crawl_delay': self.crawl_delay}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Creates a parser from to_dict() data without fetching robots.txt."""
+        parser = cls(data['base_url'], fetch=False)
+        parser.rules = data['rules']
+        parser.crawl_delay = data['crawl_delay']
+        parser._compile()
+        return parser
+
+    def _compile(self):
+        # (allow, disallow) prefix tuples, specific user-agents before '*', so
+        # is_allowed() needs one str.startswith call per list
+        agents = [agent for agent in self.rules if agent != '*'] + (['*'] if '*' in self.rules else [])
+        self._rule_sets = [(tuple(self.rules[agent]['allow']), tuple(self.rules[agent]['disallow']))
+                           for agent in agents]
     
     def _parse_robots_txt(self, content):
         """Parse robots.txt content and extract rules."""
@@ -111,33 +141,18 @@ class RobotsParser:
                     self.crawl_delay = max(self.crawl_delay, delay)
                 except ValueError:
                     pass
+        self._compile()
 
     def is_allowed(self, url):
         """Check if URL is allowed to be crawled based on robots.txt rules."""
         path = urlparse(url).path
         
-        # First check specific user-agent rules
-        for agent, rules in self.rules.items():
-            if agent == '*':
-                continue
-                
-            for allow in rules['allow']:
-                if path.startswith(allow):
-                    return True
-                    
-            for disallow in rules['disallow']:
-                if path.startswith(disallow):
-                    return False
-        
-        # Then check wildcard rules
-        if '*' in self.rules:
-            for allow in self.rules['*']['allow']:
-                if path.startswith(allow):
-                    return True
-                    
-            for disallow in self.rules['*']['disallow']:
-                if path.startswith(disallow):
-                    return False
+        # Specific user-agent rules are checked first, then wildcard rules
+        for allow, disallow in self._rule_sets:
+            if path.startswith(allow):
+                return True
+            if path.startswith(disallow):
+                return False
         
         return True  # Default allow if no matching rules
         
@@ -150,6 +165,95 @@ class RobotsParser:
                 time.sleep(self.crawl_delay - time_since_last)
             self.last_request_time = time.time()
 
+# Page-level robots directives
+# Directives whose value follows a colon, so "name: value" is not a user-agent prefix
+VALUED_ROBOTS_DIRECTIVES = {'unavailable_after', 'max-snippet', 'max-image-preview', 'max-video-preview'}
+
+def parse_robots_directives(value):
+    """Parses a meta robots content or X-Robots-Tag header value.
+    
+    Directives scoped to a named user agent are ignored. The scope lasts for
+    the rest of the value, so in "googlebot: noindex, nofollow" both
+    directives apply to googlebot only; pass each header line separately. "none" is expanded to noindex and
+    nofollow.
+    
+    Args:
+        value (str): Comma-separated directives
+    
+    Returns:
+        set: Lower-cased directive names
+    """
+    directives = set()
+    scoped = False
+    for token in value.lower().split(','):
+        name, _, rest = token.partition(':')
+        name = name.strip()
+        if rest and name not in VALUED_ROBOTS_DIRECTIVES:
+            scoped = True  # a user agent name; it and what follows are for that agent
+            continue
+        if scoped:
+            continue
+        if name == 'none':
+            directives.update(('noindex', 'nofollow'))
+        elif name:
+            directives.add(name)
+    return directives
+
+
+def get_robots_directives(soup, headers=None):
+    """Collects robots directives from meta tags and the X-Robots-Tag header.
+    
+    Args:
+        soup (BeautifulSoup): The parsed page
+        headers (Mapping, optional): HTTP response headers
+    
+    Returns:
+        set: Lower-cased directive names such as 'noindex' and 'nofollow'
+    """
+    directives = set()
+    for meta in soup.find_all('meta', attrs={'name': True, 'content': True}):
+        if meta['name'].strip().lower() == 'robots':
+            directives |= parse_robots_directives(meta['content'])
+    # Each header line is parsed on its own, so a user-agent scope in one does not swallow the next
+    for name, value in header_items(headers):
+        if name.lower() == 'x-robots-tag':
+            directives |= parse_robots_directives(value)
+    return directives
+
+
+def header_items(headers):
+    """Returns (name, value) pairs of response headers, one per header line.
+    
+    requests and httpx join repeated headers with ", " in their mappings.
+    httpx.Headers keeps the separate lines in multi_items(), and urllib3's
+    HTTPHeaderDict, which RequestsBackend passes on, keeps them in items().
+    
+    Args:
+        headers (Mapping, optional): Response headers
+    """
+    if headers is None:
+        return []
+    if hasattr(headers, 'multi_items'):
+        return headers.multi_items()
+    return headers.items()
+
+
+def canonical_link_url(link, url):
+    """Returns the normalized absolute URL of a <link rel="canonical"> tag, or None for other links."""
+    if link.get('href') and 'canonical' in [rel.lower() for rel in link.get('rel') or ()]:
+        return normalize_url(urljoin(url or '', link['href'].strip()))
+    return None
+
+
+def get_canonical_url(soup, url):
+    """Returns the normalized absolute URL from <link rel="canonical">, or None."""
+    for link in soup.find_all('link', href=True):
+        canonical_url = canonical_link_url(link, url)
+        if canonical_url:
+            return canonical_url
+    return None
+
+
 # URL Normalization
 def normalize_url(url, params_to_remove=['utm_source', 'session_id']):
     """Normalizes a URL by removing fragments and specified query parameters.
@@ -0,0 +1,277 @@
+"""Helpers for reading and writing WARC/1.1 records.
+
+Only the subset of the WARC format needed by the crawler is implemented:
+records are serialized as a header block followed by a payload, and each
+record is compressed as its own gzip member so files stay readable by
+standard WARC tooling.
+"""
+
+import gzip
+import os
+import uuid
+import zlib
+from datetime import datetime, timezone
+
+WARC_VERSION = "WARC/1.1"
+
+# Archive files are rotated once they grow past this many bytes
+DEFAULT_MAX_SIZE = 1024 * 1024 * 1024
+
+
+def format_warc_record(record_type, target_uri, payload, content_type, extra_headers=None):
+    """Serializes a single uncompressed WARC record.
+
+    Args:
+        record_type (str): WARC-Type of the record (e.g. 'response', 'resource')
+        target_uri (str): URL the record describes, or None for records such as
+            'warcinfo' that do not describe a URL
+        payload (bytes): Record block content
+        content_type (str): MIME type of the block
+        extra_headers (dict, optional): Additional WARC headers to include
+
+    Returns:
+        bytes: The serialized record, including the trailing blank lines
+    """
+    headers = {
+        'WARC-Type': record_type,
+        'WARC-Record-ID': f"<urn:uuid:{uuid.uuid4()}>",
+        'WARC-Date': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'Content-Type': content_type,
+    }
+    if target_uri is not None:
+        headers['WARC-Target-URI'] = target_uri
+    if extra_headers:
+        headers.update(extra_headers)
+    headers['Content-Length'] = str(len(payload))
+
+    lines = [WARC_VERSION] + [f"{name}: {value}" for name, value in headers.items()]
+    header_block = ("\r\n".join(lines) + "\r\n\r\n").encode('utf-8')
+    return header_block + payload + b"\r\n\r\n"
+
+
+def parse_warc_record(data):
+    """Splits an uncompressed WARC record into its headers and payload.
+
+    Args:
+        data (bytes): A single serialized record as produced by format_warc_record
+
+    Returns:
+        tuple: (headers, payload) where headers is a dict of WARC header fields
+
+    Raises:
+        ValueError: If the data does not start with a WARC version line
+    """
+    header_end = data.find(b"\r\n\r\n")
+    if header_end == -1 or not data.startswith(b"WARC/"):
+        raise ValueError("Data is not a WARC record")
+
+    headers = {}
+    for line in data[:header_end].decode('utf-8').split("\r\n")[1:]:
+        name, _, value = line.partition(':')
+        headers[name.strip()] = value.strip()
+
+    start = header_end + 4
+    length = int(headers.get('Content-Length', len(data) - start))
+    return headers, data[start:start + length]
+
+
+def format_http_response(status_code, reason, headers, body):
+    """Serializes an HTTP response as the block of a WARC 'response' record.
+
+    ``requests`` hands back bodies with any content-encoding already removed,
+    so the encoding and framing headers are dropped and Content-Length is
+    rewritten to describe the body that is actually stored.
+
+    Args:
+        status_code (int): HTTP status code
+        reason (str): HTTP reason phrase
+        headers (Mapping): Response headers
+        body (bytes): Decoded response body
+
+    Returns:
+        bytes: Status line, headers and body in HTTP/1.1 wire format
+    """
+    skipped = {'content-encoding', 'transfer-encoding', 'content-length'}
+    lines = [f"HTTP/1.1 {status_code} {reason or ''}".rstrip()]
+    lines += [f"{name}: {value}" for name, value in headers.items() if name.lower() not in skipped]
+    lines.append(f"Content-Length: {len(body)}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode('iso-8859-1', errors='replace') + body
+
+
+def parse_http_response(block):
+    """Splits a WARC 'response' record block into status, headers and body.
+
+    Args:
+        block (bytes): Block as produced by format_http_response
+
+    Returns:
+        tuple: (status_code, headers, body) with lower-cased header names
+    """
+    header_end = block.find(b"\r\n\r\n")
+    if header_end == -1:
+        return None, {}, block
+
+    lines = block[:header_end].decode('iso-8859-1').split("\r\n")
+    parts = lines[0].split(' ', 2)
+    status_code = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else None
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip()
+    return status_code, headers, block[header_end + 4:]
+
+
+def _read_record_headers(warc_file, path):
+    """Reads the version line and headers of the next record, or returns None at the end of the file."""
+    while True:
+        version = warc_file.readline()
+        if not version:
+            return None
+        if version.strip():
+            break
+    if not version.startswith(b"WARC/"):
+        raise ValueError(f"Malformed WARC record in {path}")
+
+    headers = {}
+    for line in iter(warc_file.readline, b""):
+        line = line.rstrip(b"\r\n")
+        if not line:
+            break
+        name, _, value = line.decode('utf-8').partition(':')
+        headers[name.strip()] = value.strip()
+    return headers
+
+
+def iter_warc_records(path, offset=0, count=None):
+    """Yields (headers, payload) for records in a WARC file.
+
+    Both plain ``.warc`` files and ``.warc.gz`` files made of concatenated
+    gzip members are supported.
+
+    Args:
+        path (str): Path to the WARC file
+        offset (int): Byte offset of the first record to read, as returned by
+            index_warc_records()
+        count (int, optional): Number of records to read. All remaining
+            records if omitted.
+    """
+    with open(path, 'rb') as raw_file:
+        raw_file.seek(offset)
+        warc_file = gzip.GzipFile(fileobj=raw_file) if path.endswith('.gz') else raw_file
+        while count is None or count > 0:
+            headers = _read_record_headers(warc_file, path)
+            if headers is None:
+                return
+            payload = warc_file.read(int(headers.get('Content-Length', 0)))
+            warc_file.read(4)  # trailing CRLF CRLF
+            if count is not None:
+                count -= 1
+            yield headers, payload
+
+
+def index_warc_records(path, chunk_size=1024 * 1024):
+    """Returns the byte offset at which each record of a WARC file starts.
+
+    The offsets let a file be split into ranges that are read independently
+    with iter_warc_records(). In a ``.warc.gz`` file every record is its own
+    gzip member, so the members are decompressed to find where each ends;
+    nothing is parsed. A truncated last record is left out.
+
+    Args:
+        path (str): Path to the WARC file
+        chunk_size (int): Bytes read at a time while scanning
+    """
+    offsets = []
+    with open(path, 'rb') as warc_file:
+        size = os.fstat(warc_file.fileno()).st_size
+        if not path.endswith('.gz'):
+            while True:
+                offset = warc_file.tell()
+                headers = _read_record_headers(warc_file, path)
+                if headers is None:
+                    return offsets
+                end = warc_file.tell() + int(headers.get('Content-Length', 0)) + 4
+                if end > size:
+                    return offsets
+                offsets.append(offset)
+                warc_file.seek(end)
+
+        position = 0
+        while position < size:
+            warc_file.seek(position)
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            consumed = 0
+            while not decompressor.eof:
+                chunk = warc_file.read(chunk_size)
+                if not chunk:
+                    return offsets  # truncated member
+                decompressor.decompress(chunk)  # only the member boundary is needed
+                consumed += len(chunk)
+            offsets.append(position)
+            position += consumed - len(decompressor.unused_data)
+    return offsets
+
+
+class WarcWriter:
+    """Writes fetched responses to size-rotated ``.warc.gz`` files.
+
+    Each record is compressed as a separate gzip member, and every file
+    starts with a 'warcinfo' record describing the crawl.
+
+    Args:
+        folder (str): Directory to write archives to. Created if missing.
+        prefix (str): File name prefix, usually the crawled site name
+        max_size (int): Size in bytes after which a new file is started
+    """
+    def __init__(self, folder, prefix='crawl', max_size=DEFAULT_MAX_SIZE):
+        self.folder = folder
+        self.prefix = prefix
+        self.max_size = max_size
+        self.paths = []
+        self.record_count = 0
+        self._file = None
+        self._serial = 0
+        self._timestamp = datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')
+        os.makedirs(folder, exist_ok=True)
+
+    def _open(self):
+        """Returns the archive to append to, rotating it when full."""
+        if self._file is not None and self._file.tell() >= self.max_size:
+            self._file.close()
+            self._file = None
+        if self._file is None:
+            path = os.path.join(self.folder, f"{self.prefix}-{self._timestamp}-{self._serial:05d}.warc.gz")
+            self._serial += 1
+            self._file = open(path, 'wb')
+            self.paths.append(path)
+            info = b"software: WebCrawler\r\nformat: WARC File Format 1.1\r\n"
+            self._file.write(gzip.compress(format_warc_record(
+                'warcinfo', None, info, 'application/warc-fields', {'WARC-Filename': os.path.basename(path)})))
+        return self._file
+
+    def write_response(self, url, status_code, reason, headers, body):
+        """Archives a single HTTP response.
+
+        Args:
+            url (str): URL the response was fetched from
+            status_code (int): HTTP status code
+            reason (str): HTTP reason phrase
+            headers (Mapping): Response headers
+            body (bytes): Response body
+        """
+        block = format_http_response(status_code, reason, headers, body)
+        record = format_warc_record('response', url, block, 'application/http; msgtype=response')
+        self._open().write(gzip.compress(record))
+        self.record_count += 1
+
+    def close(self):
+        """Closes the current archive file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,168 @@
+"""Background thread for batched output file writes.
+
+Keeps disk I/O off the crawl thread: content appends and sitemap rewrites are
+queued, batched per file and written by a single worker thread that keeps
+its file handles open and fsyncs them periodically.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+
+# Markers placed on the queue alongside (path, text) append jobs
+_REPLACE = object()
+_FLUSH = object()
+_STOP = object()
+
+
+class BackgroundWriter:
+    """Writes output files from a background thread.
+
+    Appends are grouped per file and written with one call per batch.
+    Whole-file rewrites are coalesced: if a file is scheduled for rewriting
+    several times before the worker gets to it, only the latest content
+    producer runs. The queue is bounded, so a crawl that outpaces the disk is
+    slowed down instead of buffering without limit.
+
+    Args:
+        max_queue (int): Maximum number of pending jobs before callers block
+        batch_size (int): Maximum number of jobs handled per batch
+        fsync_interval (float): Seconds between fsyncs of the open files.
+            0 disables periodic fsync; files are still fsynced on close.
+    """
+    def __init__(self, max_queue=10000, batch_size=1000, fsync_interval=5.0):
+        self.batch_size = batch_size
+        self.fsync_interval = fsync_interval
+        self.write_calls = 0
+        self.fsync_calls = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._files = {}
+        self._pending_replace = {}
+        self._lock = threading.Lock()
+        self._last_fsync = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name='background-writer', daemon=True)
+        self._thread.start()
+
+    def append(self, path, text):
+        """Queues text to be appended to a file."""
+        self._queue.put((path, text))
+
+    def replace(self, path, render):
+        """Queues a rewrite of a whole file.
+
+        Args:
+            path (str): File to rewrite
+            render (callable): Called on the writer thread to produce the new
+                file content as a string
+        """
+        with self._lock:
+            already_pending = path in self._pending_replace
+            self._pending_replace[path] = render
+        if not already_pending:
+            self._queue.put((_REPLACE, path))
+
+    def flush(self):
+        """Blocks until every job queued so far has been written."""
+        done = threading.Event()
+        self._queue.put((_FLUSH, done))
+        done.wait()
+
+    def close(self):
+        """Writes all pending jobs, fsyncs and closes every file."""
+        if not self._thread.is_alive():
+            return
+        self._queue.put((_STOP, None))
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _run(self):
+        """Worker loop: collects a batch of jobs and writes it."""
+        running = True
+        while running:
+            try:
+                batch = [self._queue.get(timeout=self.fsync_interval or None)]
+            except queue.Empty:
+                batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            appends = {}
+            replaces = []
+            waiters = []
+            for kind, value in batch:
+                if kind is _STOP:
+                    running = False
+                elif kind is _FLUSH:
+                    waiters.append(value)
+                elif kind is _REPLACE:
+                    replaces.append(value)
+                else:
+                    appends.setdefault(kind, []).append(value)
+
+            for path, texts in appends.items():
+                self._write_append(path, ''.join(texts))
+            for path in replaces:
+                self._write_replace(path)
+
+            if not running:
+                self._close_files()
+            elif self.fsync_interval and time.monotonic() - self._last_fsync >= self.fsync_interval:
+                self._fsync_files()
+            for done in waiters:
+                self._flush_files()
+                done.set()
+
+    def _write_append(self, path, text):
+        try:
+            output_file = self._files.get(path)
+            if output_file is None:
+                output_file = self._files[path] = open(path, 'a')
+            output_file.write(text)
+            self.write_calls += 1
+        except Exception as e:
+            logging.error(f"Error writing to {path}: {e}")
+
+    def _write_replace(self, path):
+        with self._lock:
+            render = self._pending_replace.pop(path, None)
+        if render is None:
+            return
+        try:
+            content = render()
+            temp_path = f"{path}.tmp"
+            with open(temp_path, 'w') as output_file:
+                output_file.write(content)
+            os.replace(temp_path, path)
+            self.write_calls += 1
+        except Exception as e:
+            logging.error(f"Error rewriting {path}: {e}")
+
+    def _flush_files(self):
+        for output_file in self._files.values():
+            output_file.flush()
+
+    def _fsync_files(self):
+        for path, output_file in self._files.items():
+            try:
+                output_file.flush()
+                os.fsync(output_file.fileno())
+                self.fsync_calls += 1
+            except OSError as e:
+                logging.error(f"Error syncing {path}: {e}")
+        self._last_fsync = time.monotonic()
+
+    def _close_files(self):
+        self._fsync_files()
+        for output_file in self._files.values():
+            output_file.close()
+        self._files.clear()